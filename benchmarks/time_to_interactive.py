@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Time to interactive benchmark
+
+Starts the menu headless (Qt offscreen platform) against a generated XDG
+tree and reads the milestones that it marks (see
+'attachments.mark_milestone'), relative to the process start:
+
+    first-frame     The window has been painted
+    home-populated  Recents and Pin's are complete
+    search-results  The results of the first keystroke are shown
+
+'search-latency' is the time from the keystroke to its results. Each run
+is repeated with cold caches (new $HOME, $XDG_CACHE_HOME and bytecode
+cache) and warm caches (after a first run that is not counted). The OS
+page cache is not dropped. Percentiles in milliseconds are printed as
+JSON:
+
+    python benchmarks/time_to_interactive.py --runs 10 --apps 300
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'src', 'main.py')
+MILESTONES = ('first-frame', 'home-populated', 'search-results')
+CATEGORIES = (
+    'Development', 'Education', 'AudioVideo;Video', 'Game', 'Graphics',
+    'Network', 'Office', 'Settings', 'System', 'Utility')
+
+
+def create_fixture(path: str, apps: int) -> dict:
+    """Create the XDG data dirs
+
+    System apps with the categories of the menu and a few user apps.
+
+    :param path: Dir of the fixture
+    :param apps: Number of system apps
+    :return: Environment variables of the XDG tree
+    """
+    system_dir = os.path.join(path, 'share', 'applications')
+    user_dir = os.path.join(path, 'local', 'applications')
+    os.makedirs(system_dir)
+    os.makedirs(user_dir)
+
+    for number in range(apps):
+        with open(os.path.join(system_dir, f'app{number}.desktop'), 'w') as f:
+            f.write(
+                '[Desktop Entry]\n'
+                'Type=Application\n'
+                f'Name=Fixture App {number}\n'
+                f'GenericName=Generic fixture {number % 17}\n'
+                f'Comment=Benchmark application number {number}\n'
+                f'Exec=fixture-app-{number} %U\n'
+                f'Icon=fixture-icon-{number % 40}\n'
+                f'Categories={CATEGORIES[number % len(CATEGORIES)]};\n')
+
+    for number in range(3):
+        with open(os.path.join(user_dir, f'user{number}.desktop'), 'w') as f:
+            f.write(
+                '[Desktop Entry]\n'
+                'Type=Application\n'
+                f'Name=User App {number}\n'
+                f'Exec=user-app-{number}\n')
+
+    return {
+        'XDG_DATA_HOME': os.path.join(path, 'local'),
+        'XDG_DATA_DIRS': os.path.join(path, 'share'),
+        'XDG_CONFIG_DIRS': os.path.join(path, 'etc')}
+
+
+def run_menu(
+        xdg_env: dict, home_path: str, keystroke: str,
+        timeout: float) -> dict | None:
+    """Run the menu once
+
+    :param xdg_env: Environment variables of the XDG tree
+    :param home_path: $HOME of the run, with the config and caches
+    :param keystroke: Text typed when the Home page is complete
+    :param timeout: Seconds to wait for the menu to close
+    :return:
+        Milliseconds from the process start to each milestone, or None if
+        the menu failed or did not reach all milestones
+    """
+    milestones_path = os.path.join(home_path, 'milestones')
+    if os.path.exists(milestones_path):
+        os.remove(milestones_path)
+
+    env = dict(os.environ)
+    env.update(xdg_env)
+    env.update({
+        'HOME': home_path,
+        'XDG_CONFIG_HOME': os.path.join(home_path, '.config'),
+        'XDG_CACHE_HOME': os.path.join(home_path, '.cache'),
+        'PYTHONPYCACHEPREFIX': os.path.join(home_path, '.pycache'),
+        'QT_QPA_PLATFORM': 'offscreen',
+        'TUXMENU_MILESTONES_FILE': milestones_path,
+        'TUXMENU_BENCHMARK_KEYSTROKE': keystroke})
+
+    start_time = time.monotonic()
+    try:
+        process = subprocess.run(
+            [sys.executable, MAIN_PATH], env=env, timeout=timeout,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except subprocess.TimeoutExpired:
+        print('Run timed out', file=sys.stderr)
+        return None
+
+    milestones = {}
+    if os.path.isfile(milestones_path):
+        with open(milestones_path, 'r') as f:
+            for line in f:
+                name, value = line.split()
+                milestones.setdefault(
+                    name, (float(value) - start_time) * 1000)
+
+    if process.returncode != 0 or not all(x in milestones for x in MILESTONES):
+        print(process.stderr.decode(errors='replace')[-2000:], file=sys.stderr)
+        return None
+
+    milestones['search-latency'] = (
+        milestones['search-results'] - milestones['keystroke'])
+    del milestones['keystroke']
+    return milestones
+
+
+def percentile(values: list, percent: float) -> float:
+    """Percentile with linear interpolation
+
+    :param values: Sorted values
+    :param percent: Percentile, like: 90
+    """
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summary(runs: list) -> dict:
+    """Statistics of each milestone
+
+    :param runs: Milestones of the successful runs
+    """
+    result = {}
+    for name in MILESTONES + ('search-latency',):
+        values = sorted(x[name] for x in runs)
+        if not values:
+            continue
+        result[name] = {
+            'min': round(values[0], 1),
+            'p50': round(percentile(values, 50), 1),
+            'p90': round(percentile(values, 90), 1),
+            'p95': round(percentile(values, 95), 1),
+            'max': round(values[-1], 1),
+            'mean': round(sum(values) / len(values), 1)}
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Time to interactive benchmark of the menu')
+    parser.add_argument(
+        '--runs', type=int, default=5, help='runs of each cache state')
+    parser.add_argument(
+        '--apps', type=int, default=300, help='apps of the fixture')
+    parser.add_argument(
+        '--keystroke', default='f', help='text typed on the Home page')
+    parser.add_argument(
+        '--timeout', type=float, default=60, help='seconds per run')
+    parser.add_argument('--output', help='JSON file instead of stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='tuxmenu-tti-') as tmp_path:
+        xdg_env = create_fixture(os.path.join(tmp_path, 'xdg'), args.apps)
+
+        cold_runs = []
+        for number in range(args.runs):
+            cold_runs.append(run_menu(
+                xdg_env, os.path.join(tmp_path, f'cold{number}'),
+                args.keystroke, args.timeout))
+
+        warm_home_path = os.path.join(tmp_path, 'warm')
+        run_menu(xdg_env, warm_home_path, args.keystroke, args.timeout)
+        warm_runs = []
+        for _ in range(args.runs):
+            warm_runs.append(run_menu(
+                xdg_env, warm_home_path, args.keystroke, args.timeout))
+
+    result = {
+        'apps': args.apps,
+        'runs': args.runs,
+        'keystroke': args.keystroke,
+        'failed-runs': {
+            'cold': cold_runs.count(None), 'warm': warm_runs.count(None)},
+        'cold': summary([x for x in cold_runs if x]),
+        'warm': summary([x for x in warm_runs if x])}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# Prebuilt index of the system desktop files, shared by all sessions.
+#
+# Written by the 'tuxmenu-index' command (this module) from package manager
+# hooks, like 'update-desktop-database', and mapped read-only by the menu,
+# so every session uses the same pages of the page cache. Little-endian:
+#
+#   header      magic, counts and offsets of the sections
+#   dirs        indexed dirs with their mtime, to detect a stale index
+#   records     fixed-size entries: ID, URL, key/value pairs, flags and the
+#               bitset of categories, in order of priority
+#   order       record numbers sorted by desktop file ID, for lookups
+#   pairs       section, key and value of each line of the desktop files
+#   categories  category names of the bitsets
+#   strings     UTF-8 string table, each string stored once
+import mmap
+import os
+import struct
+
+MAGIC = b'TUXIDX\x00\x01'
+HEADER = struct.Struct('<8s6I6Q')
+DIR = struct.Struct('<IIq')
+RECORD = struct.Struct('<8I')
+ORDER = struct.Struct('<I')
+PAIR = struct.Struct('<6I')
+CATEGORY = struct.Struct('<II')
+BITSET_WORD = struct.Struct('<Q')
+
+# Record flags
+HAS_DESKTOP_ENTRY = 1
+IS_APPLICATION = 2
+NO_DISPLAY = 4
+HIDDEN = 8
+
+
+def default_index_path() -> str:
+    """Index file path
+
+    $TUXMENU_INDEX or the system cache '/var/cache/tuxmenu/desktop-index'.
+    """
+    return (
+        os.environ.get('TUXMENU_INDEX') or
+        '/var/cache/tuxmenu/desktop-index')
+
+
+def pack_index(dirs: list, desktop_files: list) -> bytes:
+    """Index file content
+
+    :param dirs: Indexed dirs, like: [('/usr/share/applications', mtime_ns)]
+    :param desktop_files:
+        Tuples of desktop file ID, URL and content dict (see
+        'DesktopFile.content') in order of priority
+    """
+    strings = bytearray()
+    string_refs = {}
+
+    def string_ref(value: str) -> tuple:
+        # Offset and length in the string table
+        if value not in string_refs:
+            data = value.encode('utf-8', 'surrogateescape')
+            string_refs[value] = (len(strings), len(data))
+            strings.extend(data)
+        return string_refs[value]
+
+    categories = sorted({
+        category
+        for _, _, content in desktop_files
+        for category in content.get('[Desktop Entry]', {}).get(
+            'Categories', '').split(';')
+        if category})
+    category_bits = {x: n for n, x in enumerate(categories)}
+    bitset_words = (len(categories) + 63) // 64
+
+    dir_data = b''.join(
+        DIR.pack(*string_ref(path), mtime_ns) for path, mtime_ns in dirs)
+
+    record_data = bytearray()
+    pair_data = bytearray()
+    pair_count = 0
+    for desktop_file_id, url, content in desktop_files:
+        first_pair = pair_count
+        for section, values in content.items():
+            for key, value in values.items():
+                pair_data += PAIR.pack(
+                    *string_ref(section), *string_ref(key),
+                    *string_ref(value))
+                pair_count += 1
+
+        desktop_entry = content.get('[Desktop Entry]')
+        flags = 0
+        bitset = 0
+        if desktop_entry is not None:
+            flags |= HAS_DESKTOP_ENTRY
+            if desktop_entry.get('Type') == 'Application':
+                flags |= IS_APPLICATION
+            if desktop_entry.get('NoDisplay') == 'true':
+                flags |= NO_DISPLAY
+            if desktop_entry.get('Hidden') == 'true':
+                flags |= HIDDEN
+            for category in desktop_entry.get('Categories', '').split(';'):
+                if category:
+                    bitset |= 1 << category_bits[category]
+
+        record_data += RECORD.pack(
+            *string_ref(desktop_file_id), *string_ref(url),
+            first_pair, pair_count - first_pair, flags, 0)
+        for word in range(bitset_words):
+            record_data += BITSET_WORD.pack(
+                (bitset >> (word * 64)) & 0xFFFFFFFFFFFFFFFF)
+
+    order_data = b''.join(
+        ORDER.pack(x) for x in sorted(
+            range(len(desktop_files)), key=lambda x: desktop_files[x][0]))
+    category_data = b''.join(
+        CATEGORY.pack(*string_ref(x)) for x in categories)
+
+    offset = HEADER.size
+    offsets = []
+    for data in (dir_data, record_data, order_data, pair_data, category_data):
+        offsets.append(offset)
+        offset += len(data)
+    offsets.append(offset)
+
+    header = HEADER.pack(
+        MAGIC, len(dirs), len(desktop_files), pair_count, len(categories),
+        bitset_words, 0, *offsets)
+    return b''.join((
+        header, dir_data, record_data, order_data, pair_data, category_data,
+        strings))
+
+
+class MappedIndex(object):
+    """Memory-mapped index file
+
+    Reads the records directly from the read-only mapping of the file, so
+    the pages are shared with the other processes that use the index.
+    """
+    def __init__(self, path: str) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param path: Index file path
+        :raises OSError: If the file can't be read
+        :raises ValueError: If it is not an index file
+        """
+        with open(path, 'rb') as f:
+            self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if (self.__mmap.size() < HEADER.size or
+                self.__mmap[:len(MAGIC)] != MAGIC):
+            self.__mmap.close()
+            raise ValueError(f'{path}: not a desktop file index')
+
+        (_, self.__dir_count, self.__record_count, _, self.__category_count,
+         self.__bitset_words, _, self.__dirs_offset, self.__records_offset,
+         self.__order_offset, self.__pairs_offset, self.__categories_offset,
+         self.__strings_offset) = HEADER.unpack_from(self.__mmap, 0)
+        self.__record_size = (
+            RECORD.size + self.__bitset_words * BITSET_WORD.size)
+        self.__strings = {}  # Decoded strings by offset, shared by records
+        self.__path = path
+
+    @classmethod
+    def open(cls, dirs: list, path: str = None):
+        """Open the index if it is current
+
+        :param dirs: Dirs that the index must have, in order of priority
+        :param path: Index file path, see 'default_index_path'
+        :return: MappedIndex object, or None if there is no index, or if it
+            is invalid or does not match the dirs and their mtime
+        """
+        path = path if path else default_index_path()
+        try:
+            mapped_index = cls(path)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            is_current = mapped_index.dirs == [
+                (x, os.stat(x).st_mtime_ns) for x in dirs]
+        except OSError:
+            is_current = False
+
+        if not is_current:
+            mapped_index.close()
+            return None
+        return mapped_index
+
+    @property
+    def dirs(self) -> list:
+        """Indexed dirs
+
+        List of tuples with the dir and its mtime in nanoseconds.
+        """
+        dirs = []
+        for number in range(self.__dir_count):
+            string_offset, string_length, mtime_ns = DIR.unpack_from(
+                self.__mmap, self.__dirs_offset + number * DIR.size)
+            dirs.append((self.__string(string_offset, string_length), mtime_ns))
+        return dirs
+
+    @property
+    def categories(self) -> list:
+        """All categories of the desktop files"""
+        return [
+            self.__string(*CATEGORY.unpack_from(
+                self.__mmap, self.__categories_offset + x * CATEGORY.size))
+            for x in range(self.__category_count)]
+
+    def desktop_file_id(self, number: int) -> str:
+        """Desktop file ID of a record
+
+        :param number: Record number
+        """
+        return self.__string(*self.__record(number)[0:2])
+
+    def url(self, number: int) -> str:
+        """Desktop file path of a record
+
+        :param number: Record number
+        """
+        return self.__string(*self.__record(number)[2:4])
+
+    def flags(self, number: int) -> int:
+        """Flags of a record
+
+        HAS_DESKTOP_ENTRY, IS_APPLICATION, NO_DISPLAY and HIDDEN bits.
+
+        :param number: Record number
+        """
+        return self.__record(number)[6]
+
+    def content(self, number: int) -> dict:
+        """Desktop file content of a record
+
+        Same dict as 'DesktopFile.content'.
+
+        :param number: Record number
+        """
+        record = self.__record(number)
+        start = self.__pairs_offset + record[4] * PAIR.size
+        content = {}
+        string = self.__string
+        for values in PAIR.iter_unpack(
+                self.__mmap[start:start + record[5] * PAIR.size]):
+            section = string(values[0], values[1])
+            if section not in content:
+                content[section] = {}
+            content[section][string(values[2], values[3])] = string(
+                values[4], values[5])
+        return content
+
+    def has_category(self, number: int, category_number: int) -> bool:
+        """Whether the record has a category
+
+        :param number: Record number
+        :param category_number: Position of the category in 'categories'
+        """
+        word, bit = divmod(category_number, 64)
+        value = BITSET_WORD.unpack_from(
+            self.__mmap,
+            self.__records_offset + number * self.__record_size +
+            RECORD.size + word * BITSET_WORD.size)[0]
+        return bool(value >> bit & 1)
+
+    def numbers_in_category(self, category: str) -> list:
+        """Records of a category, in order of priority
+
+        :param category: Category name, like: "Development"
+        """
+        categories = self.categories
+        if category not in categories:
+            return []
+        category_number = categories.index(category)
+        return [
+            x for x in range(self.__record_count)
+            if self.has_category(x, category_number)]
+
+    def find(self, desktop_file_id: str) -> int | None:
+        """Record number of a desktop file ID
+
+        Binary search in the sorted order section.
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        :return: Record number or None if not found
+        """
+        low = 0
+        high = self.__record_count
+        while low < high:
+            middle = (low + high) // 2
+            number = ORDER.unpack_from(
+                self.__mmap, self.__order_offset + middle * ORDER.size)[0]
+            middle_id = self.desktop_file_id(number)
+            if middle_id == desktop_file_id:
+                return number
+            if middle_id < desktop_file_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def close(self) -> None:
+        """Unmap the file"""
+        self.__mmap.close()
+
+    def __record(self, number: int) -> tuple:
+        # Record values without the bitset
+        return RECORD.unpack_from(
+            self.__mmap, self.__records_offset + number * self.__record_size)
+
+    def __string(self, offset: int, length: int) -> str:
+        # String of the string table
+        value = self.__strings.get(offset)
+        if value is None:
+            start = self.__strings_offset + offset
+            value = self.__mmap[start:start + length].decode(
+                'utf-8', 'surrogateescape')
+            self.__strings[offset] = value
+        return value
+
+    def __len__(self) -> int:
+        return self.__record_count
+
+    def __str__(self) -> str:
+        return f'<MappedIndex: {self.__path}>'
+
+
+def main() -> None:
+    """tuxmenu-index command
+
+    Indexes the desktop files of the system dirs ($XDG_DATA_DIRS).
+    """
+    import argparse
+    import logging
+    import time
+
+    import attachments
+
+    parser = argparse.ArgumentParser(
+        prog='tuxmenu-index',
+        description='Build the shared index of the system desktop files')
+    parser.add_argument(
+        '--output', default=default_index_path(),
+        help='index file (default: %(default)s)')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    # The first dir is the user dir, overlaid by each session
+    dirs = [
+        x for x in attachments.DesktopFileLocations().file_dirs[1:]
+        if os.path.isdir(x)]
+
+    index_dirs = []
+    desktop_files = []
+    desktop_file_ids = set()
+    for desktop_dir in dirs:
+        index_dirs.append((desktop_dir, os.stat(desktop_dir).st_mtime_ns))
+        for file_name in os.listdir(desktop_dir):
+            if (file_name in desktop_file_ids or '~' in file_name or
+                    not file_name.endswith('.desktop')):
+                continue
+            desktop_file_ids.add(file_name)
+
+            url = os.path.join(desktop_dir, file_name)
+            try:
+                content = attachments.DesktopFile(url=url).content
+            except (OSError, UnicodeDecodeError) as err:
+                logging.error(f'{url}: {err}')
+                continue
+            desktop_files.append((file_name, url, content))
+
+    data = pack_index(dirs=index_dirs, desktop_files=desktop_files)
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    attachments.write_file_atomically(path=args.output, data=data)
+    # Readable by every session
+    os.chmod(args.output, 0o644)
+
+    print(
+        f'{args.output}: {len(desktop_files)} desktop files, '
+        f'{len(data)} bytes, '
+        f'{(time.perf_counter() - start_time) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,81 @@
 #   www.freedesktop.org/wiki/Specifications/
 #   www.freedesktop.org/wiki/Specifications/basedir-spec/
 #   www.freedesktop.org/wiki/Specifications/desktop-entry-spec/
+import atexit
+import collections
+import fcntl
 import json
+import locale
+import logging
+import math
 import os
+import queue
 import re
-import subprocess
-from subprocess import getoutput
+import sys
+import threading
+import time
+
+
+def write_file_atomically(path: str, data: bytes) -> None:
+    """Write a file atomically
+
+    The data is written to a temporary file in the same dir, synced to disk
+    and renamed over the destination, so readers never see a partial file.
+
+    :param path: Destination file path
+    :param data: File content
+    """
+    import tempfile  # Not needed to show the menu or by 'tuxmenu --query'
+
+    dir_path = os.path.dirname(path)
+    file_descriptor, tmp_path = tempfile.mkstemp(
+        dir=dir_path, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    dir_descriptor = os.open(dir_path, os.O_RDONLY)
+    try:
+        os.fsync(dir_descriptor)
+    finally:
+        os.close(dir_descriptor)
+
+
+def write_json_atomically(path: str, data: dict | list) -> None:
+    """Write a JSON file atomically
+
+    See 'write_file_atomically'.
+
+    :param path: Destination file path
+    :param data: Object that can be serialized to JSON
+    """
+    write_file_atomically(path=path, data=json.dumps(data).encode())
+
+
+def mark_milestone(name: str) -> None:
+    """Record a milestone of the run
+
+    Appends the name and the monotonic clock time, which is shared by all
+    processes, to the file in $TUXMENU_MILESTONES_FILE. Used by the time
+    to interactive benchmark. Does nothing if the variable is not set.
+
+    :param name: Milestone name, like: "first-frame"
+    """
+    path = os.environ.get('TUXMENU_MILESTONES_FILE')
+    if not path:
+        return
+
+    try:
+        with open(path, 'a') as f:
+            f.write(f'{name} {time.monotonic()}\n')
+    except OSError as err:
+        logging.error(err)
 
 
 class DesktopFileLocations(object):
@@ -67,14 +137,14 @@ class DesktopFileLocations(object):
 
     @staticmethod
     def __find_dirs() -> list:
-        xdg_data_home = getoutput('echo $XDG_DATA_HOME')
+        xdg_data_home = os.environ.get('XDG_DATA_HOME')
         xdg_data_home = (
             os.path.join(xdg_data_home, 'applications') if xdg_data_home else
             os.path.join(os.environ['HOME'], '.local/share/applications'))
 
         desktop_file_dirs = [xdg_data_home]
 
-        xdg_data_dirs = getoutput('echo $XDG_DATA_DIRS')
+        xdg_data_dirs = os.environ.get('XDG_DATA_DIRS')
         if xdg_data_dirs:
             for data_dir in xdg_data_dirs.split(':'):
                 if os.path.isdir(data_dir) and 'applications' in os.listdir(data_dir):
@@ -89,13 +159,15 @@ class DesktopFileLocations(object):
     def __find_urls_by_priority(self) -> list:
         # Get url in order of precedence
 
-        checked_file_names = []
+        checked_file_names = set()
         desktop_files = []
         for desktop_dir in self.__file_dirs:
+            if not os.path.isdir(desktop_dir):
+                continue
             for desktop_file in os.listdir(desktop_dir):
 
                 if desktop_file not in checked_file_names:
-                    checked_file_names.append(desktop_file)
+                    checked_file_names.add(desktop_file)
 
                     if ('~' not in desktop_file
                             and desktop_file.endswith('.desktop')):
@@ -108,6 +180,8 @@ class DesktopFileLocations(object):
         # Get all url
         desktop_files = []
         for desktop_dir in self.__file_dirs:
+            if not os.path.isdir(desktop_dir):
+                continue
             for desktop_file in os.listdir(desktop_dir):
                 if ('~' not in desktop_file
                         and desktop_file.endswith('.desktop')):
@@ -127,16 +201,34 @@ class DesktopFile(object):
     internally by menus to find applications. This object converts these files
     into a dictionary to provide easy access to their values.
     """
-    def __init__(self, url: str) -> None:
+    __exec_file_field_codes = (
+        '%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N', '%v', '%m')
+    __terminal_argv = None
+
+    def __init__(
+            self, url: str, desktop_file_id: str = None,
+            content: dict = None) -> None:
         """Class constructor
 
         Initialize class properties.
 
         :param url:
             String from a desktop file like: "/path/file.desktop"
+        :param desktop_file_id:
+            Desktop file ID like: "org.kde.dolphin.desktop". If not
+            informed, the file name of the URL is used
+        :param content:
+            Content already parsed, like from the prebuilt index. If not
+            informed, the file is read on first access
         """
         self.__url = os.path.abspath(url)
-        self.__content = None
+        self.__desktop_file_id = (
+            desktop_file_id if desktop_file_id else
+            os.path.basename(self.__url))
+        self.__content = content
+        self.__sort_key = None
+        self.__exec_argv = None
+        self.__origin = False
 
     @property
     def content(self) -> dict:
@@ -173,6 +265,210 @@ class DesktopFile(object):
         """
         return self.__url
 
+    @property
+    def desktop_file_id(self) -> str:
+        """Desktop file ID
+
+        Identifies the application regardless of where the file is installed,
+        like: "firefox.desktop". Two files with the same ID are the same app.
+        """
+        return self.__desktop_file_id
+
+    @property
+    def sort_key(self) -> str:
+        """Key used to sort apps
+
+        The lowercase app name, or the URL if the file does not have a
+        '[Desktop Entry]'. It is calculated only once.
+        """
+        if self.__sort_key is None:
+            if '[Desktop Entry]' in self.content:
+                self.__sort_key = self.content[
+                    '[Desktop Entry]'].get('Name', self.__url).lower()
+            else:
+                self.__sort_key = self.__url
+        return self.__sort_key
+
+    @property
+    def exec_argv(self) -> tuple:
+        """Command to launch the app
+
+        The 'Exec' key split into arguments following the quoting rules of
+        the desktop entry spec. File and URL field codes are removed, '%i',
+        '%c' and '%k' are expanded, and the terminal is added when
+        'Terminal=true'. It is calculated only once.
+
+        Example:
+        >>> desktop_file = DesktopFile(
+        ...     url='/usr/share/applications/firefox.desktop')
+        >>> desktop_file.exec_argv
+        ('firefox',)
+        """
+        if self.__exec_argv is None:
+            self.__exec_argv = self.__parse_exec()
+        return self.__exec_argv
+
+    @property
+    def origin(self) -> str | None:
+        """Package format of the app
+
+        'Flatpak', 'Snap', 'AppImage' or None for system packages. It is
+        calculated only once.
+        """
+        if self.__origin is False:
+            self.__origin = self.__find_origin()
+        return self.__origin
+
+    @property
+    def working_dir(self) -> str | None:
+        """Working directory of the app
+
+        Value of the 'Path' key, or None if it was not set.
+        """
+        desktop_entry = self.content.get('[Desktop Entry]', {})
+        return desktop_entry.get('Path') or None
+
+    def launch(self) -> None:
+        """Launch the app
+
+        Starts the app in a new session, so it keeps running after
+        the menu is closed.
+        """
+        import subprocess  # Not needed to show the menu
+
+        try:
+            subprocess.Popen(
+                self.exec_argv, cwd=self.working_dir,
+                start_new_session=True)
+        except (OSError, ValueError) as err:
+            logging.error(err)
+
+    def __find_origin(self) -> str | None:
+        # Flatpak exports, snapd desktop dir, X-AppImage-* keys and Exec
+        desktop_entry = self.content.get('[Desktop Entry]', {})
+        exec_value = desktop_entry.get('Exec', '')
+        # The command is only needed (and parsed) if it can match
+        exec_argv = (
+            self.exec_argv
+            if 'flatpak' in exec_value or '/snap/bin/' in exec_value else ())
+        command = os.path.basename(exec_argv[0]) if exec_argv else ''
+
+        if ('/flatpak/exports/' in self.__url
+                or 'X-Flatpak' in desktop_entry
+                or command == 'flatpak'):
+            return 'Flatpak'
+
+        if (self.__url.startswith('/var/lib/snapd/desktop/')
+                or 'X-SnapInstanceName' in desktop_entry
+                or (exec_argv and exec_argv[0].startswith('/snap/bin/'))):
+            return 'Snap'
+
+        # APPIMAGE_EXTRACT_AND_RUN=1 /opt/Telegram/Telegram
+        if (any(key.startswith('X-AppImage-') for key in desktop_entry)
+                or 'appimage' in exec_value.lower()):
+            return 'AppImage'
+
+        return None
+
+    def __parse_exec(self) -> tuple:
+        # Exec value -> argv
+        desktop_entry = self.content.get('[Desktop Entry]', {})
+        if 'Exec' not in desktop_entry:
+            return ()
+
+        argv = []
+        for arg, quoted in self.__split_exec(
+                self.__unescape_string(desktop_entry['Exec'])):
+            if quoted:
+                argv.append(arg)
+            elif arg == '%i':
+                if desktop_entry.get('Icon'):
+                    argv += ['--icon', desktop_entry['Icon']]
+            elif arg in self.__exec_file_field_codes:
+                continue
+            else:
+                argv.append(re.sub(
+                    r'%(.)', lambda match: self.__expand_field_code(
+                        match.group(1), desktop_entry), arg))
+
+        if desktop_entry.get('Terminal') == 'true':
+            argv = self.terminal_argv() + argv
+
+        return tuple(argv)
+
+    def __expand_field_code(self, code: str, desktop_entry: dict) -> str:
+        # Field code inside an argument, like: "--name=%c"
+        if code == '%':
+            return '%'
+        if code == 'c':
+            return desktop_entry.get('Name', '')
+        if code == 'k':
+            return self.__url
+        return ''
+
+    @staticmethod
+    def __unescape_string(value: str) -> str:
+        # Escape sequences of string values: "\s", "\n", "\t", "\r", "\\"
+        escapes = {'s': ' ', 'n': '\n', 't': '\t', 'r': '\r', '\\': '\\'}
+        return re.sub(
+            r'\\(.)',
+            lambda match: escapes.get(match.group(1), match.group(0)),
+            value)
+
+    @staticmethod
+    def __split_exec(value: str) -> list:
+        # Split on spaces, except inside double quotes where '"', '`', '$'
+        # and '\\' are escaped with a backslash
+        args = []
+        arg, quoted, in_quotes = None, False, False
+        chars = iter(value)
+        for char in chars:
+            if in_quotes:
+                if char == '"':
+                    in_quotes = False
+                elif char == '\\':
+                    arg += next(chars, '')
+                else:
+                    arg += char
+            elif char in ' \t\n':
+                if arg is not None:
+                    args.append((arg, quoted))
+                arg, quoted = None, False
+            elif char == '"':
+                arg, quoted, in_quotes = arg if arg else '', True, True
+            else:
+                arg = (arg if arg else '') + char
+
+        if arg is not None:
+            args.append((arg, quoted))
+
+        return args
+
+    @classmethod
+    def terminal_argv(cls) -> list:
+        """Command prefix to run an app in a terminal
+
+        Uses $TERMINAL or the first terminal emulator found. The result is
+        found only once.
+        """
+        if cls.__terminal_argv is None:
+            import shutil  # Only for apps with Terminal=true
+
+            cls.__terminal_argv = ['xterm', '-e']
+            terminals = [
+                ('x-terminal-emulator', '-e'), ('konsole', '-e'),
+                ('gnome-terminal', '--'), ('xfce4-terminal', '-x'),
+                ('lxterminal', '-e'), ('xterm', '-e')]
+            if os.environ.get('TERMINAL'):
+                terminals.insert(0, (os.environ['TERMINAL'], '-e'))
+
+            for terminal, execute_flag in terminals:
+                if shutil.which(terminal):
+                    cls.__terminal_argv = [terminal, execute_flag]
+                    break
+
+        return list(cls.__terminal_argv)
+
     def __parse_file_to_dict(self) -> None:
         # Open file
         with open(self.__url, 'r') as desktop_file:
@@ -200,35 +496,32 @@ class DesktopFile(object):
 
             self.__content[escope_header] = escope_keys_and_values
 
+    def __sort_value(self, obj) -> str:
+        # Other operand as a precomputed sort key
+        return obj.sort_key if isinstance(obj, DesktopFile) else obj
+
     def __gt__(self, obj) -> bool:
-        if '[Desktop Entry]' in self.content:
-            return self.content['[Desktop Entry]']['Name'].lower() > obj
-        return self.url > obj
+        return self.sort_key > self.__sort_value(obj)
 
     def __lt__(self, obj) -> bool:
-        if '[Desktop Entry]' in self.content:
-            return self.content['[Desktop Entry]']['Name'].lower() < obj
-        return self.url < obj
-
-    def __eq__(self, obj) -> bool:
-        if '[Desktop Entry]' in self.content:
-            return self.content['[Desktop Entry]']['Name'].lower() == obj
-        return self.url == obj
+        return self.sort_key < self.__sort_value(obj)
 
     def __ge__(self, obj) -> bool:
-        if '[Desktop Entry]' in self.content:
-            return self.content['[Desktop Entry]']['Name'].lower() >= obj
-        return self.url >= obj
+        return self.sort_key >= self.__sort_value(obj)
 
     def __le__(self, obj) -> bool:
-        if '[Desktop Entry]' in self.content:
-            return self.content['[Desktop Entry]']['Name'].lower() <= obj
-        return self.url <= obj
+        return self.sort_key <= self.__sort_value(obj)
+
+    def __eq__(self, obj) -> bool:
+        if isinstance(obj, DesktopFile):
+            return self.__desktop_file_id == obj.desktop_file_id
+        return self.__desktop_file_id == obj
 
     def __ne__(self, obj) -> bool:
-        if '[Desktop Entry]' in self.content:
-            return self.content['[Desktop Entry]']['Name'].lower() != obj
-        return self.url != obj
+        return not self.__eq__(obj)
+
+    def __hash__(self) -> int:
+        return hash(self.__desktop_file_id)
 
     def __str__(self) -> str:
         if '[Desktop Entry]' in self.content:
@@ -236,21 +529,285 @@ class DesktopFile(object):
         return f'<DesktopFile: {self.url.split("/")[-1]}>'
 
 
+class DesktopFileRegistry(object):
+    """Ordered collection of desktop files indexed by ID.
+
+    Works like a list of 'DesktopFile' objects, but membership tests and
+    lookups by desktop file ID are done in constant time. An app that is
+    already in the registry is not added again.
+    """
+    def __init__(self, desktop_files: list = None) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param desktop_files: Initial list of DesktopFile objects
+        """
+        self.__order = []
+        self.__index = {}
+        for desktop_file in desktop_files if desktop_files else []:
+            self.append(desktop_file)
+
+    def get(self, desktop_file_id: str) -> DesktopFile | None:
+        """Get a desktop file by ID
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        :return: DesktopFile object or None if not found
+        """
+        return self.__index.get(desktop_file_id)
+
+    def ids(self) -> list:
+        """Desktop file IDs
+
+        String list of all IDs in the registry order.
+        """
+        return [x.desktop_file_id for x in self.__order]
+
+    def append(self, desktop_file: DesktopFile) -> None:
+        """Add a desktop file to the end
+
+        :param desktop_file: DesktopFile object
+        """
+        if desktop_file.desktop_file_id not in self.__index:
+            self.__index[desktop_file.desktop_file_id] = desktop_file
+            self.__order.append(desktop_file)
+
+    def insert(self, index: int, desktop_file: DesktopFile) -> None:
+        """Insert a desktop file at position
+
+        :param index: Position in the registry
+        :param desktop_file: DesktopFile object
+        """
+        if desktop_file.desktop_file_id not in self.__index:
+            self.__index[desktop_file.desktop_file_id] = desktop_file
+            self.__order.insert(index, desktop_file)
+
+    def remove(self, desktop_file: DesktopFile | str) -> None:
+        """Remove a desktop file
+
+        :param desktop_file: DesktopFile object or desktop file ID
+        """
+        desktop_file_id = self.__key(desktop_file)
+        self.__order.remove(self.__index.pop(desktop_file_id))
+
+    def pop(self, index: int = -1) -> DesktopFile:
+        """Remove and return a desktop file
+
+        :param index: Position in the registry, default is the last item
+        """
+        desktop_file = self.__order.pop(index)
+        del self.__index[desktop_file.desktop_file_id]
+        return desktop_file
+
+    @staticmethod
+    def __key(desktop_file: DesktopFile | str) -> str:
+        # Desktop file ID from object or ID
+        if isinstance(desktop_file, DesktopFile):
+            return desktop_file.desktop_file_id
+        return desktop_file
+
+    def __contains__(self, desktop_file: DesktopFile | str) -> bool:
+        return self.__key(desktop_file) in self.__index
+
+    def __iter__(self):
+        return iter(self.__order)
+
+    def __len__(self) -> int:
+        return len(self.__order)
+
+    def __getitem__(self, index: int | slice) -> DesktopFile | list:
+        return self.__order[index]
+
+    def __bool__(self) -> bool:
+        return bool(self.__order)
+
+    def __str__(self) -> str:
+        return f'<DesktopFileRegistry: {len(self.__order)}>'
+
+
+class DesktopFileIndex(object):
+    """Shared index of desktop files by ID.
+
+    Each desktop file is parsed only once and the same 'DesktopFile' object
+    is shared by the menu schema and the saved apps. Files with the same ID
+    follow the priority of 'DesktopFileLocations.ulrs_by_priority'.
+
+    If the prebuilt index of the system dirs (see 'appindex') is current,
+    the system files are read from its memory mapping and only the user dir
+    is listed and parsed.
+    """
+    def __init__(
+            self, desktop_file_locations: DesktopFileLocations = None,
+            mapped_index_path: str = None) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param desktop_file_locations: DesktopFileLocations object
+        :param mapped_index_path:
+            Prebuilt index path, see 'appindex.default_index_path'
+        """
+        self.__desktop_file_locations = (
+            desktop_file_locations if desktop_file_locations else
+            DesktopFileLocations())
+        self.__mapped_index_path = mapped_index_path
+        self.__mapped_index = False  # Opened on first use
+        self.__lock = threading.Lock()
+        self.__desktop_files_by_id = {}
+        self.__desktop_files = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the index has been built
+
+        Before that, 'get' looks for the files directly in the desktop
+        file dirs.
+        """
+        return self.__desktop_files is not None
+
+    @property
+    def desktop_files(self) -> list:
+        """All desktop files
+
+        List of 'DesktopFile' objects in order of priority. The index is
+        built on first access.
+        """
+        if self.__desktop_files is None:
+            self.build()
+        return self.__desktop_files
+
+    def build(self) -> None:
+        """Build the index
+
+        Find all desktop files. Objects already resolved by 'get' are reused.
+        """
+        with self.__lock:
+            mapped_index = self.__open_mapped_index()
+
+        if not mapped_index:
+            desktop_files = [
+                self.__shared_desktop_file(os.path.basename(x), x)
+                for x in self.__desktop_file_locations.ulrs_by_priority]
+        else:
+            # User files over the system files of the prebuilt index
+            desktop_files = [
+                self.__shared_desktop_file(os.path.basename(x), x)
+                for x in self.__user_urls()]
+            user_desktop_file_ids = {x.desktop_file_id for x in desktop_files}
+            for number in range(len(mapped_index)):
+                desktop_file_id = mapped_index.desktop_file_id(number)
+                if desktop_file_id not in user_desktop_file_ids:
+                    desktop_files.append(self.__shared_desktop_file(
+                        desktop_file_id, mapped_index.url(number),
+                        mapped_index, number))
+
+        self.__desktop_files = desktop_files
+
+    def get(self, desktop_file_id: str) -> DesktopFile | None:
+        """Get a desktop file by ID
+
+        If the index is not ready yet, only this file is looked up, so
+        it does not need to wait for the complete index.
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        :return: DesktopFile object or None if not found
+        """
+        with self.__lock:
+            desktop_file = self.__desktop_files_by_id.get(desktop_file_id)
+            if desktop_file or self.__desktop_files is not None:
+                return desktop_file
+
+            mapped_index = self.__open_mapped_index()
+            file_dirs = self.__desktop_file_locations.file_dirs
+            for desktop_dir in file_dirs[:1] if mapped_index else file_dirs:
+                url = os.path.join(desktop_dir, desktop_file_id)
+                if os.path.isfile(url):
+                    desktop_file = DesktopFile(
+                        url=url, desktop_file_id=desktop_file_id)
+                    self.__desktop_files_by_id[desktop_file_id] = desktop_file
+                    return desktop_file
+
+            number = (
+                mapped_index.find(desktop_file_id) if mapped_index else None)
+            if number is not None:
+                desktop_file = DesktopFile(
+                    url=mapped_index.url(number),
+                    desktop_file_id=desktop_file_id,
+                    content=mapped_index.content(number))
+                self.__desktop_files_by_id[desktop_file_id] = desktop_file
+                return desktop_file
+
+        return None
+
+    def __open_mapped_index(self) -> 'appindex.MappedIndex | None':
+        # Prebuilt index, if it matches the system dirs
+        if self.__mapped_index is False:
+            import appindex  # Only when the index is first used
+
+            self.__mapped_index = appindex.MappedIndex.open(
+                dirs=[
+                    x for x in self.__desktop_file_locations.file_dirs[1:]
+                    if os.path.isdir(x)],
+                path=self.__mapped_index_path)
+        return self.__mapped_index
+
+    def __user_urls(self) -> list:
+        # Desktop files of the user dir
+        user_dir = self.__desktop_file_locations.file_dirs[0]
+        if not os.path.isdir(user_dir):
+            return []
+        return [
+            os.path.join(user_dir, x) for x in os.listdir(user_dir)
+            if '~' not in x and x.endswith('.desktop')]
+
+    def __shared_desktop_file(
+            self, desktop_file_id: str, url: str,
+            mapped_index: 'appindex.MappedIndex' = None,
+            number: int = None) -> DesktopFile:
+        # Object already resolved by 'get' or a new one
+        with self.__lock:
+            desktop_file = self.__desktop_files_by_id.get(desktop_file_id)
+            if not desktop_file:
+                desktop_file = DesktopFile(
+                    url=url, desktop_file_id=desktop_file_id,
+                    content=(
+                        mapped_index.content(number) if mapped_index else
+                        None))
+                self.__desktop_files_by_id[desktop_file_id] = desktop_file
+        return desktop_file
+
+    def __str__(self) -> str:
+        return f'<DesktopFileIndex: {id(self)}>'
+
+
 class MenuSchema(object):
     """Template to build the menu."""
-    def __init__(self) -> None:
+    # Spec category of the desktop entries -> schema category
+    __category_keys = {
+        categ: categ for categ in (
+            'Development', 'Education', 'Multimedia', 'Game', 'Graphics',
+            'Network', 'Office', 'Settings', 'System', 'Utility', 'Others',
+            'AppImage', 'Snap', 'Flatpak')}
+    __category_keys.update({
+        'AudioVideo': 'Multimedia', 'Audio': 'Multimedia',
+        'Video': 'Multimedia'})
+
+    def __init__(
+            self, desktop_file_index: DesktopFileIndex = None,
+            menu_tree=None) -> None:
         """Class constructor
 
         Initialize class properties.
+
+        :param desktop_file_index: Shared DesktopFileIndex object
+        :param menu_tree:
+            'menuspec.MenuTree' object. If it has a root menu, its top-level
+            menus are used as categories instead of the default ones
         """
-        # https://specifications.freedesktop.org/
-        # menu-spec/menu-spec-1.0.html#category-registry
-        self.__schema = {
-            'Home': [], 'All': [], 'Development': [], 'Education': [],
-            'Multimedia': [], 'AudioVideo': [], 'Audio': [], 'Video': [],
-            'Game': [], 'Graphics': [], 'Network': [], 'Office': [],
-            'Settings': [], 'System': [], 'Utility': [], 'Others': [],
-            'AppImage': [], 'Snap': [], 'Flatpak': []}
+        self.__desktop_file_index = (
+            desktop_file_index if desktop_file_index else DesktopFileIndex())
+        self.__menu_root = menu_tree.root if menu_tree else None
+        self.__categories_by_id = {}
         self.__icons_schema = {
             'Home': 'applications-all', 'All': 'applications-all',
             'Development': 'applications-development',
@@ -266,6 +823,25 @@ class MenuSchema(object):
             'Snap': 'application-vnd.snap',
             'Flatpak': 'application-vnd.flatpak.ref.svg'
         }
+        self.__texts_schema = {}
+
+        if self.__menu_root:
+            categories = self.__menu_categories()
+        else:
+            # https://specifications.freedesktop.org/
+            # menu-spec/menu-spec-1.0.html#category-registry
+            categories = (
+                'Development', 'Education',
+                'Multimedia', 'AudioVideo', 'Audio', 'Video',
+                'Game', 'Graphics', 'Network', 'Office',
+                'Settings', 'System', 'Utility', 'Others')
+
+        self.__schema = {
+            categ: DesktopFileRegistry() for categ in (
+                ('Home', 'All') + tuple(categories) +
+                ('AppImage', 'Snap', 'Flatpak'))}
+        for categ in self.__schema:
+            self.__texts_schema.setdefault(categ, categ)
         self.update_schema()
 
     @property
@@ -276,26 +852,100 @@ class MenuSchema(object):
         """
         return self.__icons_schema
 
+    @property
+    def texts_schema(self) -> dict:
+        """Category text schema
+
+        Text displayed for each category. The name of the '.directory' file
+        of the menu, or the category itself.
+        """
+        return self.__texts_schema
+
     @property
     def schema(self) -> dict:
         """Menu template as a dict
 
         A dictionary where the keys (str) are the menu categories, and the
-        values are the applications (DesktoFile) displayed in the category.
+        values are the applications (DesktopFileRegistry) displayed in the
+        category.
         """
         return self.__schema
 
+    def desktop_file(self, desktop_file_id: str) -> DesktopFile | None:
+        """Get an app by desktop file ID
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        :return: DesktopFile object or None if the app is not in the menu
+        """
+        return self.__schema['All'].get(desktop_file_id)
+
+    def search(self, text: str, is_cancelled=None) -> list | None:
+        """Search the apps of the menu
+
+        The text is searched in the name, generic name and comment (in the
+        language of the locale or the default one) and in the command.
+
+        :param text: Lowercase text to search
+        :param is_cancelled: Callable checked every 100 apps, the search
+            stops if it returns True
+        :return: DesktopFile objects list in the menu order, or None if the
+            search was cancelled
+        """
+        desktop_files = []
+        local = locale.getdefaultlocale()[0]
+        escope = '[Desktop Entry]'
+        for number, desk_app in enumerate(self.__schema['All']):
+            if is_cancelled and not number % 100 and is_cancelled():
+                return None
+
+            # Name[<local>]
+            if (f'Name[{local}]' in desk_app.content[escope]
+                    and text in desk_app.content[escope][
+                        f'Name[{local}]'].lower()):
+                desktop_files.append(desk_app)
+
+            # Name: Always exists
+            elif text in desk_app.content[escope]['Name'].lower():
+                desktop_files.append(desk_app)
+
+            # GenericName[<local>]
+            elif (f'GenericName[{local}]' in desk_app.content[escope]
+                  and text in desk_app.content[escope][
+                      f'GenericName[{local}]'].lower()):
+                desktop_files.append(desk_app)
+
+            # GenericName
+            elif ('GenericName' in desk_app.content[escope]
+                  and text in desk_app.content[escope][
+                      'GenericName'].lower()):
+                desktop_files.append(desk_app)
+
+            # Coment[<local>]
+            elif (f'Comment[{local}]' in desk_app.content[escope]
+                  and text in desk_app.content[escope][
+                      f'Comment[{local}]'].lower()):
+                desktop_files.append(desk_app)
+
+            # Coment
+            elif ('Comment' in desk_app.content[escope]
+                  and text in desk_app.content[escope]['Comment'].lower()):
+                desktop_files.append(desk_app)
+
+            # Exec: Always exists
+            elif text in desk_app.content[escope]['Exec'].lower():
+                desktop_files.append(desk_app)
+
+        return desktop_files
+
     def update_schema(self) -> None:
         """Update menu schema
 
         Update "as_dict" property.
         """
         # percorrer urls
-        desktop_file_locations = DesktopFileLocations()
-        for desktop_file_url in desktop_file_locations.ulrs_by_priority:
+        desk_env = os.environ.get('XDG_CURRENT_DESKTOP', '')
+        for desktop_file in self.__desktop_file_index.desktop_files:
             # Get a file and check if it is a valid file
-            desk_env = subprocess.getoutput('echo $XDG_CURRENT_DESKTOP')
-            desktop_file = DesktopFile(url=desktop_file_url)
             desktop_file_is_valid = True
             desktop_entry = None
 
@@ -325,39 +975,149 @@ class MenuSchema(object):
 
             # Check categories and save in correct category
             if desktop_file_is_valid:
+                # Launch command and package format
+                origin = desktop_file.origin
+
                 # Categ 'All'
                 self.__schema['All'].append(desktop_file)
 
+                # Categ 'AppImage', 'Snap' and 'Flatpak'
+                if origin:
+                    self.__schema[origin].append(desktop_file)
+
+                # Menus of the XDG menu file
+                if self.__menu_root:
+                    for categ in self.__categories_by_id.get(
+                            desktop_file.desktop_file_id, ()):
+                        self.__schema[categ].append(desktop_file)
+                    continue
+
                 # Categ 'Others'
                 if 'Categories' not in desktop_entry:
                     self.__schema['Others'].append(desktop_file)
                     continue
 
                 # Remaining categories
-                for categ in self.__schema:
-                    if categ in desktop_entry['Categories'].split(';'):
-                        # Convert 'Audio' and 'Video' for 'Multimedia'
-                        if (categ == 'AudioVideo' or
-                                categ == 'Audio' or categ == 'Video'):
-                            categ = 'Multimedia'
-                            if desktop_file not in self.__schema[categ]:
-                                self.__schema[categ].append(desktop_file)
-                        else:
-                            self.__schema[categ].append(desktop_file)
-
-                if '/snap/bin/' in desktop_entry['Exec']:
-                    self.__schema['Snap'].append(desktop_file)
-                elif '/usr/bin/flatpak' in desktop_entry['Exec']:
-                    self.__schema['Flatpak'].append(desktop_file)
-                # APPIMAGE_EXTRACT_AND_RUN=1 /opt/Telegram/Telegram
-                elif ('AppImage' in desktop_entry['Exec'] or
-                        'Telegram' in desktop_entry['Exec']):
-                    self.__schema['AppImage'].append(desktop_file)
+                categories = set()
+                for categ in desktop_entry['Categories'].split(';'):
+                    # Convert 'Audio' and 'Video' for 'Multimedia'
+                    categ = self.__category_keys.get(categ)
+                    if categ and categ not in categories:
+                        categories.add(categ)
+                        self.__schema[categ].append(desktop_file)
+
+    def __menu_categories(self) -> list:
+        # Top-level menus, with the entries of their submenus
+        categories = []
+        for menu in self.__menu_root['menus']:
+            categ = menu['name']
+            if (menu['no-display'] or categ in categories or categ in (
+                    'Home', 'All', 'AppImage', 'Snap', 'Flatpak')):
+                continue
+            categories.append(categ)
+            self.__texts_schema[categ] = menu['text']
+            self.__icons_schema[categ] = menu['icon'] or 'applications-other'
+
+            menus = [menu]
+            while menus:
+                submenu = menus.pop()
+                if submenu['no-display']:
+                    continue
+                for desktop_file_id in submenu['entries']:
+                    categs = self.__categories_by_id.setdefault(
+                        desktop_file_id, [])
+                    if categ not in categs:
+                        categs.append(categ)
+                menus += submenu['menus']
+
+        return categories
 
     def __str__(self) -> str:
         return f'<MenuSchema: {id(self)}>'
 
 
+class SearchWorker(object):
+    """Runs searches in a background thread
+
+    Each query gets a generation number and only the latest one is run: the
+    queries typed while the thread is busy are skipped, and the running
+    search is asked to stop (see the 'is_cancelled' argument of the search
+    function). Results of a replaced query are never passed to the
+    callback, but the callback should also check the generation, because a
+    new query can start while it is waiting to run.
+    """
+    def __init__(self, search, callback) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param search: Called in the thread with the text and a callable
+            that returns True when the query has been replaced. Returns the
+            results, or None if it was cancelled
+        :param callback: Called in the thread with the generation, the text
+            and the results of the query
+        """
+        self.__search = search
+        self.__callback = callback
+        self.__generation = 0
+        self.__query = None  # Generation and text, not started yet
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    @property
+    def generation(self) -> int:
+        """Generation of the latest query"""
+        return self.__generation
+
+    def search(self, text: str) -> int:
+        """Start a query
+
+        Returns immediately. The previous query is cancelled.
+
+        :param text: Text to search. Empty to only cancel
+        :return: Generation of the query
+        """
+        with self.__condition:
+            self.__generation += 1
+            self.__query = (self.__generation, text) if text else None
+            self.__condition.notify()
+
+        if text and not self.__thread:
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
+
+        return self.__generation
+
+    def __run(self) -> None:
+        # Thread: runs the latest query, when there is one
+        while True:
+            with self.__condition:
+                while not self.__query:
+                    self.__condition.wait()
+                generation, text = self.__query
+                self.__query = None
+
+            try:
+                results = self.__search(
+                    text, lambda: self.__is_cancelled(generation))
+            except Exception as err:
+                logging.error(f'Search "{text}": {err}')
+                continue
+
+            if results is not None and generation == self.__generation:
+                self.__callback(generation, text, results)
+
+    def __is_cancelled(self, generation: int) -> bool:
+        # Whether the query has been replaced. Called often by the search,
+        # so it also releases the interpreter lock, which lets the GUI
+        # thread run without waiting for the switch interval
+        time.sleep(0)
+        return generation != self.__generation
+
+    def __str__(self) -> str:
+        return f'<SearchWorker: {self.__generation}>'
+
+
 class EnergyButtonsSchema(object):
     """Template to build the energy buttons."""
     def __init__(self) -> None:
@@ -365,39 +1125,58 @@ class EnergyButtonsSchema(object):
 
         Initialize class properties.
         """
+        # D-Bus calls: (bus, service, path, interface, method, arguments)
+        login1 = ('org.freedesktop.login1', '/org/freedesktop/login1')
+        login1_manager = ('system', *login1, 'org.freedesktop.login1.Manager')
+        login1_session = (
+            'system', login1[0], '/org/freedesktop/login1/session/auto',
+            'org.freedesktop.login1.Session')
+
         self.__schema = {
             'lock-screen': {
                 'text': 'Lock screen',
                 'icon-name': 'system-lock-screen',  # loginctl unlock-session
-                'command': ['loginctl', 'lock-session']},
+                'command': ['loginctl', 'lock-session'],
+                'dbus': [(*login1_session, 'Lock', [])],
+                'can': None},
             'suspend': {
                 # qdbus6 org.kde.Shutdown /Shutdown suspend
                 'text': 'Suspend',
                 'icon-name': 'system-suspend',
-                'command': ['systemctl', 'suspend']},  # systemctl hibernate
+                'command': ['systemctl', 'suspend'],  # systemctl hibernate
+                'dbus': [(*login1_manager, 'Suspend', [True])],
+                'can': (*login1_manager, 'CanSuspend', [])},
             'reboot': {
                 # qdbus6 org.kde.Shutdown /Shutdown reboot
                 'text': 'Reboot',
                 'icon-name': 'system-reboot',
-                'command': ['systemctl', 'reboot']},
+                'command': ['systemctl', 'reboot'],
+                'dbus': [(*login1_manager, 'Reboot', [True])],
+                'can': (*login1_manager, 'CanReboot', [])},
             'shutdown': {
                 # qdbus6 org.kde.Shutdown /Shutdown powerOff
                 'text': 'Shutdown',
                 'icon-name': 'system-shutdown',
-                'command': ['systemctl', 'poweroff']},
+                'command': ['systemctl', 'poweroff'],
+                'dbus': [(*login1_manager, 'PowerOff', [True])],
+                'can': (*login1_manager, 'CanPowerOff', [])},
             'log-out': {
-                # loginctl terminate-user $USER
-                # loginctl terminate-session $XDG_SESSION_ID
-                
-                # qdbus org.kde.Shutdown /Shutdown logout
+                # The session manager of the desktop asks to save and
+                # closes the apps. Not login1 'Terminate', that kills them
                 # qdbus6 org.kde.Shutdown /Shutdown logout
-                # gnome-session-quit --logout --no-prompt
                 # xfce4-session-logout --logout
                 # lxqt-leave --logout
                 'text': 'Log-out',
                 'icon-name': 'system-log-out',
-                'command': [
-                    'qdbus', 'org.kde.Shutdown', '/Shutdown', 'logout']},
+                'command': ['gnome-session-quit', '--logout'],
+                'dbus': [
+                    ('session', 'org.kde.Shutdown', '/Shutdown',
+                     'org.kde.Shutdown', 'logout', []),
+                    # Logout(show_dialog, allow_save)
+                    ('session', 'org.xfce.SessionManager',
+                     '/org/xfce/SessionManager', 'org.xfce.Session.Manager',
+                     'Logout', [True, True])],
+                'can': None},
             'switch-user': {
                 # loginctl switch-user <user>
                 # qdbus org.kde.SDDM /org/kde/SDDM/Greeter callLogin
@@ -411,7 +1190,9 @@ class EnergyButtonsSchema(object):
                 # dm-tool switch-to-greeter
                 'text': 'Switch user',
                 'icon-name': 'system-switch-user',
-                'command': None}}
+                'command': None,
+                'dbus': [],
+                'can': None}}
 
     @property
     def schema(self) -> dict:
@@ -419,22 +1200,42 @@ class EnergyButtonsSchema(object):
 
         A dictionary that contains the button id as keys. each item stores
         a dictionary with the name of the icon and the command.
+
+        'dbus' is a list of D-Bus calls to try before the command, and 'can'
+        is the D-Bus call that checks if the action is available, like:
+        ('system', service, path, interface, 'CanSuspend', []).
         """
         return self.__schema
 
 
 class SavedApps(object):
-    """Configure saved apps"""
-    def __init__(self, config_name: str):
+    """Configure saved apps
+
+    Changes are written in the background (write-behind). Rapid changes are
+    coalesced into a single write, the file is replaced atomically and a
+    file lock merges the changes of menus running at the same time.
+
+    Apps are saved by desktop file ID and resolved through the shared
+    'DesktopFileIndex' on first access to 'apps'.
+    """
+    def __init__(
+            self, config_name: str,
+            desktop_file_index: DesktopFileIndex = None,
+            save_delay: float = 0.5):
         """Class constructor
 
         Initialize class properties.
 
         :param config_name: Name that will serve as an ID for the configuration
+        :param desktop_file_index: Shared DesktopFileIndex object
+        :param save_delay: Seconds to wait for more changes before writing
         """
+        self.__desktop_file_index = (
+            desktop_file_index if desktop_file_index else DesktopFileIndex())
         self.__config_name = config_name
         self.__config_dirname = 'tuxmenu'
         self.__config_filename = self.__config_name + '.json'
+        self.__save_delay = save_delay
 
         self.__config_dir_path = (
             os.path.join(os.environ['HOME'], '.config', self.__config_dirname))
@@ -443,8 +1244,19 @@ class SavedApps(object):
             os.path.join(
                 self.__config_dir_path,
                 self.__config_filename))
+        self.__config_lock_path = self.__config_file_path + '.lock'
+
+        # Write-behind
+        self.__pending_lock = threading.Lock()
+        self.__write_lock = threading.Lock()
+        self.__pending_ids = None
+        self.__save_thread = None
+        self.__synced_ids = []
+        self.__written_ids = []
+        atexit.register(self.flush)
 
-        self.__apps = self.__load_apps()
+        self.__apps = None
+        self.__load_ids()
 
     @property
     def config_name(self) -> str:
@@ -455,44 +1267,694 @@ class SavedApps(object):
         return self.__config_name
 
     @property
-    def apps(self) -> list:
+    def apps(self) -> DesktopFileRegistry:
         """Saved apps
 
-        Gets a list of 'DesktopFile' objects from applications that
-        have been saved.
+        Gets a registry of 'DesktopFile' objects from applications that
+        have been saved. Apps that are no longer installed are ignored.
         """
+        if self.__apps is None:
+            self.__apps = DesktopFileRegistry()
+            for desktop_file_id in self.__synced_ids:
+                desktop_file = self.__desktop_file_index.get(desktop_file_id)
+                if desktop_file:
+                    self.__apps.append(desktop_file)
         return self.__apps
 
     @apps.setter
     def apps(self, app_list: list) -> None:
-        self.__apps = app_list
+        self.__apps = DesktopFileRegistry(app_list)
 
-    def __load_apps(self) -> list:
+    def __load_ids(self) -> None:
         # Read and load config
         if not os.path.isdir(self.__config_dir_path):
             os.makedirs(self.__config_dir_path)
 
+        self.__synced_ids = self.__read_ids()
+        self.__written_ids = self.__synced_ids
+
+    def __read_ids(self) -> list:
+        # Saved list as it is on disk
         if not os.path.isfile(self.__config_file_path):
             return []
 
-        with open(self.__config_file_path, 'r') as f:
-            json_data = json.load(f)
+        try:
+            with open(self.__config_file_path, 'r') as f:
+                json_data = json.load(f)
+        except (OSError, ValueError) as err:
+            logging.error(err)
+            return []
 
-        urls = []
-        if json_data[self.__config_name]:
-            for url in json_data[self.__config_name]:
-                if os.path.isfile(url):
-                    urls.append(DesktopFile(url=url))
+        # Older versions saved the absolute path of the file
+        desktop_file_ids = []
+        for value in json_data.get(self.__config_name) or []:
+            desktop_file_id = os.path.basename(value)
+            if desktop_file_id not in desktop_file_ids:
+                desktop_file_ids.append(desktop_file_id)
 
-        return urls
+        return desktop_file_ids
 
-    def save_apps(self, url_list_apps: list) -> None:
+    def save_apps(self) -> None:
         """Save the apps
 
-        Save apps from list in settings.
+        Save the IDs of the apps in settings. Returns immediately, the file
+        is written in the background.
         """
-        with open(self.__config_file_path, 'w') as f:
-            json.dump({self.__config_name: url_list_apps}, f)
+        with self.__pending_lock:
+            self.__pending_ids = self.apps.ids()
+            if not self.__save_thread:
+                self.__save_thread = threading.Thread(
+                    target=self.__save_apps_bg, daemon=True)
+                self.__save_thread.start()
+
+    def flush(self) -> None:
+        """Write pending changes
+
+        Blocks until the apps that have not yet been saved are written.
+        """
+        with self.__write_lock:
+            with self.__pending_lock:
+                desktop_file_ids, self.__pending_ids = (
+                    self.__pending_ids, None)
+
+            if desktop_file_ids is not None:
+                self.__write_apps(desktop_file_ids)
+
+    def __save_apps_bg(self) -> None:
+        # Coalesce changes during the delay and write the latest. The list
+        # is taken with the write lock held, so an older list is never
+        # written after a newer one
+        while True:
+            time.sleep(self.__save_delay)
+            with self.__write_lock:
+                with self.__pending_lock:
+                    desktop_file_ids, self.__pending_ids = (
+                        self.__pending_ids, None)
+                    if desktop_file_ids is None:
+                        self.__save_thread = None
+                        return
+
+                self.__write_apps(desktop_file_ids)
+
+    def __write_apps(self, desktop_file_ids: list) -> None:
+        # Merge with the file on disk and replace it atomically. The caller
+        # holds the write lock
+        try:
+            with open(self.__config_lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                # The base is the list of this instance, the apps
+                # that only another instance added are not in it
+                merged_ids = self.__merge_ids(
+                    base=self.__written_ids,
+                    disk=self.__read_ids(),
+                    local=desktop_file_ids)
+
+                write_json_atomically(
+                    path=self.__config_file_path,
+                    data={self.__config_name: merged_ids})
+
+                self.__synced_ids = merged_ids
+                self.__written_ids = desktop_file_ids
+
+        except OSError as err:
+            logging.error(err)
+
+    @staticmethod
+    def __merge_ids(base: list, disk: list, local: list) -> list:
+        # Three-way merge: keep the local order, drop what another instance
+        # removed and append what another instance added
+        base_set, disk_set, local_set = set(base), set(disk), set(local)
+
+        merged = [
+            x for x in local
+            if x in disk_set or x not in base_set]
+        merged += [
+            x for x in disk
+            if x not in base_set and x not in local_set]
+
+        return merged
 
     def __str__(self) -> str:
         return f'<SavedApps: {self.__config_name}>'
+
+
+class UsageStore(object):
+    """App usage history with frecency scores
+
+    Each launch is appended to a log, which is cheap, and the log is
+    compacted in the background into a snapshot. The snapshot records the
+    log file and the bytes of it that have been folded, so a compaction
+    interrupted before the log is replaced does not count a launch twice.
+    The score of an app is the
+    number of launches with an exponential time decay, so recent and
+    frequent apps come first. Other IDs, like category names, can be
+    recorded in a store with another name.
+    """
+    def __init__(
+            self, name: str = 'usage', half_life_days: float = 14.0,
+            compact_threshold: int = 200) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param name: Name of the log and snapshot files
+        :param half_life_days: Days for a launch to be worth half
+        :param compact_threshold: Log lines that trigger a compaction
+        """
+        self.__name = name
+        self.__config_dir_path = (
+            os.path.join(os.environ['HOME'], '.config', 'tuxmenu'))
+        self.__log_path = os.path.join(self.__config_dir_path, name + '.log')
+        self.__snapshot_path = os.path.join(
+            self.__config_dir_path, name + '.json')
+        self.__lock_path = os.path.join(self.__config_dir_path, name + '.lock')
+
+        self.__decay = math.log(2) / (half_life_days * 86400)
+        self.__compact_threshold = compact_threshold
+
+        # Scores are stored relative to the epoch, so that a launch only
+        # adds to one value: score = value * e^(-decay * (now - epoch))
+        self.__epoch = 0
+        self.__values = {}
+        self.__counts = {}
+
+        self.__write_lock = threading.Lock()
+        self.__pending = queue.SimpleQueue()
+        self.__pending_event = threading.Event()
+        self.__append_thread = None
+        atexit.register(self.flush)
+
+        self.__load()
+
+    def record(self, desktop_file_id: str) -> None:
+        """Record an app launch
+
+        The score is updated immediately and the log is written in the
+        background.
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        """
+        timestamp = int(time.time())
+        self.__add(
+            self.__values, self.__counts, self.__epoch,
+            desktop_file_id, timestamp)
+        self.__pending.put(f'{timestamp} {desktop_file_id}\n')
+        self.__pending_event.set()
+
+        if not self.__append_thread:
+            self.__append_thread = threading.Thread(
+                target=self.__append_bg, daemon=True)
+            self.__append_thread.start()
+
+    def score(self, desktop_file_id: str) -> float:
+        """Frecency score of an app
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        :return: Number of launches with time decay, 0 if never launched
+        """
+        value = self.__values.get(desktop_file_id)
+        if not value:
+            return 0.0
+        return value * math.exp(-self.__decay * (time.time() - self.__epoch))
+
+    def count(self, desktop_file_id: str) -> int:
+        """Number of launches of an app
+
+        :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+        """
+        return self.__counts.get(desktop_file_id, 0)
+
+    def ranked_ids(self) -> list:
+        """Used apps ranked by score
+
+        List of desktop file IDs, from the highest score to the lowest.
+        """
+        return sorted(self.__values, key=self.__values.get, reverse=True)
+
+    def flush(self) -> None:
+        """Write pending launches
+
+        Blocks until all recorded launches are in the log.
+        """
+        self.__append_pending()
+
+    def __add(
+            self, values: dict, counts: dict, epoch: int,
+            desktop_file_id: str, timestamp: float) -> None:
+        # Add a launch to the values relative to the epoch
+        values[desktop_file_id] = values.get(desktop_file_id, 0.0) + (
+            math.exp(self.__decay * (timestamp - epoch)))
+        counts[desktop_file_id] = counts.get(desktop_file_id, 0) + 1
+
+    def __load(self) -> None:
+        # Snapshot and log on disk
+        if not os.path.isdir(self.__config_dir_path):
+            os.makedirs(self.__config_dir_path)
+
+        self.__epoch, self.__values, self.__counts, log_lines, _ = (
+            self.__read())
+
+        if log_lines > self.__compact_threshold:
+            threading.Thread(target=self.__compact, daemon=True).start()
+
+    def __read(self) -> tuple:
+        # Read the snapshot and replay the log on top of it. Returns the
+        # inode and the size of the log that has been read
+        epoch, values, counts = int(time.time()), {}, {}
+        folded_log = None
+        if os.path.isfile(self.__snapshot_path):
+            try:
+                with open(self.__snapshot_path, 'r') as f:
+                    json_data = json.load(f)
+                epoch = json_data['epoch']
+                for desktop_file_id, (value, count) in json_data[
+                        'apps'].items():
+                    values[desktop_file_id] = value
+                    counts[desktop_file_id] = count
+                folded_log = json_data.get('log')
+            except (OSError, ValueError, KeyError, TypeError) as err:
+                logging.error(err)
+
+        log_lines = 0
+        log_position = None
+        if os.path.isfile(self.__log_path):
+            with open(self.__log_path, 'rb') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if folded_log and folded_log[0] == inode:
+                    # Already in the snapshot, the log was not replaced
+                    f.seek(folded_log[1])
+
+                for line in f:
+                    timestamp, _, desktop_file_id = (
+                        line.decode(errors='replace').strip().partition(' '))
+                    if desktop_file_id and timestamp.isdigit():
+                        self.__add(
+                            values, counts, epoch,
+                            desktop_file_id, int(timestamp))
+                        log_lines += 1
+                log_position = [inode, f.tell()]
+
+        return epoch, values, counts, log_lines, log_position
+
+    def __append_bg(self) -> None:
+        # Write launches to the log as they are recorded
+        while True:
+            self.__pending_event.wait()
+            self.__pending_event.clear()
+            self.__append_pending()
+
+    def __append_pending(self) -> None:
+        # Append all pending lines under the file lock
+        with self.__write_lock:
+            lines = []
+            while not self.__pending.empty():
+                lines.append(self.__pending.get())
+            if not lines:
+                return
+
+            try:
+                with open(self.__lock_path, 'a') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    with open(self.__log_path, 'a') as f:
+                        f.write(''.join(lines))
+            except OSError as err:
+                logging.error(err)
+
+    def __compact(self) -> None:
+        # Fold the log into a new snapshot with the epoch moved to now
+        with self.__write_lock:
+            try:
+                with open(self.__lock_path, 'a') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                    epoch, values, counts, _, log_position = self.__read()
+                    now = int(time.time())
+                    rebase = math.exp(-self.__decay * (now - epoch))
+                    write_json_atomically(
+                        path=self.__snapshot_path,
+                        data={'epoch': now, 'log': log_position, 'apps': {
+                            x: [values[x] * rebase, counts[x]]
+                            for x in values}})
+
+                    # A new file, whose inode is not the folded one
+                    if log_position:
+                        write_file_atomically(path=self.__log_path, data=b'')
+
+            except OSError as err:
+                logging.error(err)
+
+    def __str__(self) -> str:
+        return f'<UsageStore: {self.__name}>'
+
+
+class HomeSnapshot(object):
+    """Snapshot of the rendered Home page
+
+    An image of the Home page (Recents and Pin's) and the area of each app
+    launcher on it, saved when the menu is closed. The next start shows it
+    on the first frame, before the real widgets are mounted. The files are
+    a cache in $XDG_CACHE_HOME/tuxmenu.
+    """
+    def __init__(self, name: str = 'home-snapshot') -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param name: Name of the image and metadata files
+        """
+        self.__name = name
+        self.__cache_dir_path = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.environ['HOME'], '.cache'), 'tuxmenu')
+        self.__image_path = os.path.join(self.__cache_dir_path, name + '.png')
+        self.__metadata_path = os.path.join(
+            self.__cache_dir_path, name + '.json')
+
+        self.__screen_size = None
+        self.__device_pixel_ratio = None
+        self.__position = (0, 0)
+        self.__tiles = []
+
+        self.__load()
+
+    @property
+    def image_path(self) -> str:
+        """PNG image path
+
+        Image of the page with the size in device pixels.
+        """
+        return self.__image_path
+
+    @property
+    def device_pixel_ratio(self) -> float | None:
+        """Device pixel ratio of the image"""
+        return self.__device_pixel_ratio
+
+    @property
+    def position(self) -> tuple:
+        """Position of the page
+
+        Coordinates (x, y) of the page in the window.
+        """
+        return self.__position
+
+    @property
+    def tiles(self) -> list:
+        """App launcher areas
+
+        List of tuples with the desktop file ID and the area in the page,
+        like: [('firefox.desktop', (x, y, width, height))].
+        """
+        return self.__tiles
+
+    def is_valid(
+            self, screen_size: tuple, device_pixel_ratio: float) -> bool:
+        """Whether the snapshot can be shown
+
+        A snapshot of another screen size or pixel ratio would not match
+        the page.
+
+        :param screen_size: Screen (width, height)
+        :param device_pixel_ratio: Screen device pixel ratio
+        """
+        return (
+            self.__screen_size == tuple(screen_size) and
+            self.__device_pixel_ratio == device_pixel_ratio and
+            os.path.isfile(self.__image_path))
+
+    def save(
+            self, image: bytes, screen_size: tuple,
+            device_pixel_ratio: float, position: tuple, tiles: list) -> None:
+        """Save a new snapshot
+
+        :param image: PNG image of the page
+        :param screen_size: Screen (width, height)
+        :param device_pixel_ratio: Device pixel ratio of the image
+        :param position: Page (x, y) in the window
+        :param tiles: App launcher areas, see 'tiles'
+        """
+        try:
+            if not os.path.isdir(self.__cache_dir_path):
+                os.makedirs(self.__cache_dir_path)
+
+            write_file_atomically(path=self.__image_path, data=image)
+            write_json_atomically(
+                path=self.__metadata_path,
+                data={
+                    'screen-size': list(screen_size),
+                    'device-pixel-ratio': device_pixel_ratio,
+                    'position': list(position),
+                    'tiles': [[x, list(y)] for x, y in tiles]})
+        except OSError as err:
+            logging.error(err)
+            return
+
+        self.__screen_size = tuple(screen_size)
+        self.__device_pixel_ratio = device_pixel_ratio
+        self.__position = tuple(position)
+        self.__tiles = [(x, tuple(y)) for x, y in tiles]
+
+    def __load(self) -> None:
+        # Snapshot metadata on disk
+        if not os.path.isfile(self.__metadata_path):
+            return
+
+        try:
+            with open(self.__metadata_path, 'r') as f:
+                json_data = json.load(f)
+            screen_size = tuple(json_data['screen-size'])
+            device_pixel_ratio = json_data['device-pixel-ratio']
+            position = tuple(json_data['position'])
+            tiles = [(x, tuple(y)) for x, y in json_data['tiles']]
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logging.error(err)
+            return
+
+        self.__screen_size = screen_size
+        self.__device_pixel_ratio = device_pixel_ratio
+        self.__position = position
+        self.__tiles = tiles
+
+    def __str__(self) -> str:
+        return f'<HomeSnapshot: {self.__name}>'
+
+
+class PageCache(object):
+    """Least recently viewed page cache
+
+    Bookkeeping of the pages that have been built, limited by number of
+    pages and estimated bytes. It does not hold the pages, only tells which
+    ones should be removed, so that it can be used with any widget. Pages
+    that are evicted can be built again; the counters show how often it
+    happens and how long it takes.
+    """
+    def __init__(self, max_pages: int = 6, max_bytes: int = None) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param max_pages: Maximum number of pages, or None for no limit
+        :param max_bytes: Maximum estimated bytes, or None for no limit
+        """
+        self.__max_pages = max_pages
+        self.__max_bytes = max_bytes
+        self.__pages = collections.OrderedDict()  # Least recent first
+        self.__evicted = set()
+        self.__counters = {
+            'hits': 0, 'misses': 0, 'evictions': 0,
+            'rebuilds': 0, 'rebuild-seconds': 0.0, 'build-seconds': 0.0}
+
+    @property
+    def counters(self) -> dict:
+        """Cache counters
+
+        Current pages and bytes, hits and misses of 'view', evictions, and
+        number and total seconds of the builds and rebuilds (builds of
+        pages that had been evicted).
+        """
+        return {
+            'pages': len(self.__pages),
+            'bytes': sum(self.__pages.values()),
+            **self.__counters}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__pages
+
+    def view(self, key: str) -> bool:
+        """Mark a page as the most recently viewed
+
+        :param key: Page key, like a category name
+        :return: True if the page is in the cache
+        """
+        if key not in self.__pages:
+            self.__counters['misses'] += 1
+            return False
+
+        self.__counters['hits'] += 1
+        self.__pages.move_to_end(key)
+        return True
+
+    def add(self, key: str, size: int) -> None:
+        """Add a built page as the most recently viewed
+
+        :param key: Page key, like a category name
+        :param size: Estimated bytes of the page
+        """
+        self.__pages[key] = size
+        self.__pages.move_to_end(key)
+
+    def add_build_time(self, key: str, seconds: float) -> None:
+        """Account the time spent building a page
+
+        :param key: Page key, like a category name
+        :param seconds: Build time
+        """
+        if key in self.__evicted:
+            self.__evicted.discard(key)
+            self.__counters['rebuilds'] += 1
+            self.__counters['rebuild-seconds'] += seconds
+        else:
+            self.__counters['build-seconds'] += seconds
+
+    def evict(self, keep: set | list = ()) -> list:
+        """Remove pages over the limits
+
+        The least recently viewed pages are removed first.
+
+        :param keep: Keys that can't be removed, like the visible page
+        :return: Keys of the removed pages, which should be destroyed
+        """
+        evicted = []
+        for key in list(self.__pages):
+            if not self.__is_over_limit():
+                break
+            if key in keep:
+                continue
+
+            del self.__pages[key]
+            self.__evicted.add(key)
+            self.__counters['evictions'] += 1
+            evicted.append(key)
+
+        return evicted
+
+    def __is_over_limit(self) -> bool:
+        # Number of pages or bytes
+        return (
+            self.__max_pages is not None and
+            len(self.__pages) > self.__max_pages or
+            self.__max_bytes is not None and
+            sum(self.__pages.values()) > self.__max_bytes)
+
+    def __str__(self) -> str:
+        return f'<PageCache: {len(self.__pages)}>'
+
+
+class SamplingProfiler(object):
+    """On demand profiler of the calling thread
+
+    While running, a background thread samples the stack of the thread that
+    called 'start', and cProfile traces its calls. 'stop' writes the
+    samples as collapsed stacks ("main;func;func count" lines, the input of
+    flame graph tools) and the cProfile stats, to be read with 'pstats',
+    in $XDG_CACHE_HOME/tuxmenu/profiles.
+    """
+    def __init__(self, interval: float = 0.005) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param interval: Seconds between stack samples
+        """
+        self.__interval = interval
+        self.__profiles_dir_path = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.environ['HOME'], '.cache'), 'tuxmenu', 'profiles')
+        self.__profile = None
+        self.__sampler_thread = None
+        self.__stop_event = threading.Event()
+        self.__stacks = collections.Counter()
+        self.__start_time = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether a profiling session is running"""
+        return self.__profile is not None
+
+    def start(self) -> None:
+        """Start profiling the calling thread
+
+        Does nothing if a session is already running.
+        """
+        if self.__profile:
+            return
+
+        import cProfile  # Only for profiling sessions
+
+        self.__stacks = collections.Counter()
+        self.__stop_event.clear()
+        self.__start_time = time.time()
+        self.__sampler_thread = threading.Thread(
+            target=self.__sample, args=[threading.get_ident()], daemon=True)
+        self.__sampler_thread.start()
+
+        self.__profile = cProfile.Profile()
+        self.__profile.enable()
+
+    def stop(self) -> tuple | None:
+        """Stop profiling and write the results
+
+        Must be called from the same thread as 'start'.
+
+        :return:
+            Paths of the collapsed stacks and the pstats files, or None if
+            no session was running or the files could not be written
+        """
+        if not self.__profile:
+            return None
+
+        self.__profile.disable()
+        self.__stop_event.set()
+        self.__sampler_thread.join()
+        profile = self.__profile
+        self.__profile = None
+
+        name = time.strftime(
+            '%Y%m%d-%H%M%S', time.localtime(self.__start_time)) + (
+            f'-{os.getpid()}')
+        collapsed_path = os.path.join(
+            self.__profiles_dir_path, name + '.collapsed')
+        pstats_path = os.path.join(self.__profiles_dir_path, name + '.pstats')
+        try:
+            if not os.path.isdir(self.__profiles_dir_path):
+                os.makedirs(self.__profiles_dir_path)
+
+            write_file_atomically(
+                path=collapsed_path,
+                data=''.join(
+                    f'{x} {y}\n' for x, y in self.__stacks.items()).encode())
+            profile.dump_stats(pstats_path)
+        except OSError as err:
+            logging.error(err)
+            return None
+
+        return collapsed_path, pstats_path
+
+    def __sample(self, thread_id: int) -> None:
+        # Stack of the profiled thread, outermost frame first
+        while not self.__stop_event.wait(self.__interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame:
+                code = frame.f_code
+                stack.append(
+                    f'{code.co_name} '
+                    f'({os.path.basename(code.co_filename)}:'
+                    f'{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.__stacks[';'.join(reversed(stack))] += 1
+
+    def __str__(self) -> str:
+        return f'<SamplingProfiler: {id(self)}>'
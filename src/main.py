@@ -2,17 +2,17 @@
 import locale
 import logging
 import os
-import shutil
-import subprocess
+import signal
 import sys
 import threading
 import time
+from typing import Iterator
 
-from BlurWindow.blurWindow import GlobalBlur
 from PySide6 import QtCore, QtGui, QtWidgets
 from __feature__ import snake_case
 
 import attachments
+import menuspec
 import widgets
 
 
@@ -23,6 +23,8 @@ class MainWindow(QtWidgets.QMainWindow):
     __mount_pin_apps_signal = QtCore.Signal(object)
     __mount_energy_buttons_signal = QtCore.Signal(object)
     __app_launcher_focus_signal = QtCore.Signal(object)
+    __search_provider_results_signal = QtCore.Signal(object, object, object)
+    __searched_apps_signal = QtCore.Signal(object, object, object)
 
     def __init__(self, *args, **kwargs) -> None:
         """Class constructor
@@ -34,7 +36,6 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.__menu_schema = None
         self.__status_bar_default_text = None
-        self.__energy_buttons_schema = None
         self.__active_context_menu_app_launcher = None
 
         # Main container
@@ -150,8 +151,30 @@ class MainWindow(QtWidgets.QMainWindow):
         self.__app_grid_stacked_layout.add_widget(self.__home_page_container)
         self.__home_page_container.set_layout(self.__home_page_layout)
 
+        # Home page snapshot: image of the last run, shown on the first
+        # frame and removed when the Recents and Pin's grids are mounted.
+        # It is placed over the window, where the page will be
+        self.__home_grids = {}
+        self.__home_snapshot = attachments.HomeSnapshot()
+        self.__home_snapshot_view = None
+        if self.__home_snapshot.is_valid(*self.__screen_geometry()):
+            self.__home_snapshot_view = widgets.HomeSnapshotView(
+                image_path=self.__home_snapshot.image_path,
+                device_pixel_ratio=self.__home_snapshot.device_pixel_ratio,
+                tiles=self.__home_snapshot.tiles,
+                parent=self.__main_container)
+            self.__home_snapshot_view.move(*self.__home_snapshot.position)
+            if self.__home_snapshot_view.is_null():
+                self.__home_snapshot_view.delete_later()
+                self.__home_snapshot_view = None
+            else:
+                self.__home_snapshot_view.clicked_signal().connect(
+                    self.__on_home_snapshot_clicked)
+                self.__app_grid_stacked_layout.set_current_index(1)
+
         # Home page: Recent
-        self.__recent_apps = attachments.SavedApps(config_name='recent-apps')
+        self.__desktop_file_index = attachments.DesktopFileIndex()
+        self.__usage_store = attachments.UsageStore()
 
         self.__mount_recent_apps_signal.connect(self.__mount_recent_apps)
 
@@ -159,8 +182,9 @@ class MainWindow(QtWidgets.QMainWindow):
             target=self.__mount_recent_apps_bg)
 
         # Home page: Pin's
-        self.__pin_update_index = 0
-        self.__pin_apps = attachments.SavedApps(config_name='pin-apps')
+        self.__pin_apps = attachments.SavedApps(
+            config_name='pin-apps',
+            desktop_file_index=self.__desktop_file_index)
 
         self.__mount_pin_apps_signal.connect(self.__mount_pin_apps)
 
@@ -170,6 +194,20 @@ class MainWindow(QtWidgets.QMainWindow):
         # App pages
         self.__app_page_created = []
 
+        # App pages cache: the least recently viewed pages are destroyed
+        # and built again from the index when they are needed
+        self.__page_cache = attachments.PageCache(
+            max_pages=6, max_bytes=512 * 1024 * 1024)
+        self.__page_tile_bytes = 90 * 1024  # Measured size of a tile
+
+        # App pages prewarm: likely next pages are built when idle, within
+        # the frame time budget of the MountScheduler
+        self.__category_usage_store = attachments.UsageStore(
+            name='category-usage')
+        self.__prewarm_pages = 3
+        self.__prewarm_queue = []
+        self.__prewarm_grids = {}  # Built in advance, not yet mounted
+
         # Energy buttons layout
         self.__energy_buttons_pages_have_been_created = False
         self.__energy_buttons_layout = QtWidgets.QVBoxLayout()
@@ -180,9 +218,31 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.__mount_energy_buttons_signal.connect(self.__mount_energy_buttons)
 
+        self.__energy_buttons_schema = None  # Created on mount
+        self.__session_actions = None
+
         self.__energy_buttons_thread = threading.Thread(  # start() on
             target=self.__mount_energy_buttons_bg)    # 'pin' thread
 
+        # App search: apps are matched in a background thread and only the
+        # results of the latest query are applied
+        self.__search_worker = attachments.SearchWorker(
+            search=self.__searched_apps,
+            callback=self.__searched_apps_signal.emit)
+        self.__searched_apps_signal.connect(self.__on_searched_apps)
+        self.__search_start_time = None
+
+        # Search providers: results of other sources (calculator, settings
+        # panels, recent files and commands), each in its own thread. They
+        # are shown under the apps, after the apps of the search. Created
+        # on the first search, see '__search_providers'
+        self.__search_provider_runner = None
+        self.__search_results_view = None
+        self.__search_provider_results_signal.connect(
+            self.__on_search_provider_results)
+        self.__search_provider_results = {}  # Of the latest query
+        self.__search_apps_are_shown = False
+
         # Status bar
         self.__status_bar_temp_text = None
         self.__status_bar = QtWidgets.QLabel(self.__status_bar_temp_text)
@@ -196,6 +256,31 @@ class MainWindow(QtWidgets.QMainWindow):
             'border-top: 1px solid rgba(255, 255, 255, 0.03);'
             'padding: 0px 10px 0px 10px;')
         self.__layout_container.add_widget(self.__status_bar)
+
+        # Performance HUD: created on first use, toggled with Ctrl+Shift+H
+        # or shown at start with TUXMENU_HUD=1
+        self.__performance_hud = None
+        self.__search_seconds = None
+        self.__grid_mount_seconds = None
+        if os.environ.get('TUXMENU_HUD') == '1':
+            self.__toggle_performance_hud()
+
+        # Profiler: started and stopped with SIGUSR1 or Ctrl+Shift+P, and
+        # stopped after 'TUXMENU_PROFILE_SECONDS' (10 by default)
+        self.__profiler = attachments.SamplingProfiler()
+        self.__profiler_timer = QtCore.QTimer(self)
+        self.__profiler_timer.set_single_shot(True)
+        self.__profiler_timer.timeout.connect(self.toggle_profiler)
+
+        # Milestones of the time to interactive benchmark, marked when the
+        # next frame is painted. With 'TUXMENU_BENCHMARK_KEYSTROKE', the
+        # text is typed when the Home page is complete and the menu is
+        # closed when the search results are shown
+        self.__frame_milestones = ['first-frame']
+        self.__home_is_populated = False
+        self.__benchmark_keystroke = os.environ.get(
+            'TUXMENU_BENCHMARK_KEYSTROKE')
+
         self.set_focus()
         self.install_event_filter(self)
 
@@ -217,7 +302,10 @@ class MainWindow(QtWidgets.QMainWindow):
         # Mount category buttons
 
         # Menu schema
-        self.__menu_schema = attachments.MenuSchema()
+        self.__menu_schema = attachments.MenuSchema(
+            desktop_file_index=self.__desktop_file_index,
+            menu_tree=menuspec.MenuTree(
+                desktop_file_index=self.__desktop_file_index))
         menu_schema = self.__menu_schema.schema
 
         # Update number_of_apps
@@ -231,11 +319,14 @@ class MainWindow(QtWidgets.QMainWindow):
             if not apps and categ != 'Home' or categ == 'All':
                 continue
             category_button = widgets.CategoryButton(
-                text=categ, icon_name=self.__menu_schema.icons_schema[categ])
+                text=self.__menu_schema.texts_schema[categ],
+                icon_name=self.__menu_schema.icons_schema[categ])
             setattr(category_button, 'page_index', page_index)
             setattr(category_button, 'category', categ)
             category_button.set_contents_margins(0, 0, 10, 0)
             category_button.clicked_signal().connect(self.__on_category_button)
+            category_button.enter_event_signal().connect(
+                self.__on_category_button_enter_event)
             self.__category_buttons_layout.add_widget(category_button)
 
             self.__app_grid_stacked_layout.add_widget(QtWidgets.QWidget())
@@ -254,9 +345,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.__mount_recent_apps_signal.emit(0)
 
     def __mount_recent_apps(self) -> None:
-        # Mount recent app launchers
+        # Mount recent app launchers (best frecency scores)
+        recent_apps = attachments.DesktopFileRegistry()
+        for desktop_file_id in self.__usage_store.ranked_ids():
+            if len(recent_apps) >= self.__app_grid_columns:
+                break
+            desktop_file = self.__desktop_file_index.get(desktop_file_id)
+            if desktop_file:
+                recent_apps.append(desktop_file)
+
         self.__mount_home_page_apps(
-            desktop_file_list=self.__recent_apps.apps,
+            desktop_file_list=recent_apps,
             home_page_type='recent',
             title='Recents')
 
@@ -282,6 +381,12 @@ class MainWindow(QtWidgets.QMainWindow):
             self.__energy_buttons_thread.start()
             self.__energy_buttons_pages_have_been_created = True
 
+            # Most used categories
+            self.__start_prewarm(categories=sorted(
+                (x.category for x in self.__category_buttons()),
+                key=self.__category_usage_store.score,
+                reverse=True)[:self.__prewarm_pages])
+
         self.__app_page_created.append('Home')
 
     def __mount_home_page_apps(
@@ -320,8 +425,115 @@ class MainWindow(QtWidgets.QMainWindow):
 
         app_grid.set_alignment(QtCore.Qt.AlignTop)
         page_layout.add_widget(app_grid, page_layout_stretch)
+
+        # Hidden under the snapshot until the Home page is complete
+        if self.__home_snapshot_view:
+            title_label.set_visible(False)
+            app_grid.set_visible(False)
+
+        self.__home_grids[home_page_type] = app_grid
+        app_grid.mounted_signal().connect(self.__on_home_grid_mounted)
         return app_grid
 
+    def __home_grids_are_mounted(self) -> bool:
+        # Recents and Pin's grids are complete
+        return len(self.__home_grids) == 2 and all(
+            x.is_mounted() for x in self.__home_grids.values())
+
+    def __on_home_grid_mounted(self, _app_grid: widgets.AppGrid) -> None:
+        # Replace the snapshot with the real Home page
+        if self.__home_snapshot_view and self.__home_grids_are_mounted():
+            self.__home_snapshot_view.set_visible(False)
+            self.__home_snapshot_view.delete_later()
+            self.__home_snapshot_view = None
+
+            for index in range(self.__home_page_layout.count()):
+                widget = self.__home_page_layout.item_at(index).widget()
+                if widget:
+                    widget.set_visible(True)
+
+        if not self.__home_is_populated and self.__home_grids_are_mounted():
+            self.__home_is_populated = True
+            self.__add_frame_milestone('home-populated')
+
+    def __add_frame_milestone(self, name: str) -> None:
+        # Marked by 'event_filter' after the next frame
+        self.__frame_milestones.append(name)
+        self.update()
+
+    def __on_frame_milestones(self, milestones: list) -> None:
+        # Frame with the milestones has been painted
+        for milestone in milestones:
+            attachments.mark_milestone(milestone)
+
+        if not self.__benchmark_keystroke:
+            return
+
+        if 'home-populated' in milestones:
+            attachments.mark_milestone('keystroke')
+            QtWidgets.QApplication.send_event(self, QtGui.QKeyEvent(
+                QtCore.QEvent.KeyPress, 0, QtCore.Qt.NoModifier,
+                self.__benchmark_keystroke))
+        elif 'search-results' in milestones:
+            self.close()
+
+    def __on_home_snapshot_clicked(self, desktop_file_id: str) -> None:
+        # App launcher of the snapshot, launched through the index
+        desktop_file = self.__desktop_file_index.get(desktop_file_id)
+        if not desktop_file:
+            return
+
+        desktop_file.launch()
+        self.__usage_store.record(desktop_file.desktop_file_id)
+        self.close()
+
+    @staticmethod
+    def __screen_geometry() -> tuple:
+        # Screen (width, height) and device pixel ratio
+        screen = QtGui.QGuiApplication.primary_screen()
+        return (
+            (screen.size().width(), screen.size().height()),
+            screen.device_pixel_ratio())
+
+    def __save_home_snapshot(self) -> None:
+        # Image and app launcher areas of the Home page for the next start
+        if self.__home_snapshot_view or not self.__home_grids_are_mounted():
+            return
+
+        self.__close_active_context_menus()
+        tiles = []
+        for app_grid in self.__home_grids.values():
+            visible_rect = QtCore.QRect(
+                app_grid.viewport().map_to(
+                    self.__home_page_container, QtCore.QPoint(0, 0)),
+                app_grid.viewport().size())
+            for app_launcher in app_grid.widgets_list():
+                app_launcher.set_hovered(False)
+                rect = QtCore.QRect(
+                    app_launcher.map_to(
+                        self.__home_page_container, QtCore.QPoint(0, 0)),
+                    app_launcher.size()).intersected(visible_rect)
+                if not rect.is_empty():
+                    tiles.append((
+                        app_launcher.desktop_file().desktop_file_id,
+                        (rect.x(), rect.y(), rect.width(), rect.height())))
+
+        pixmap = self.__home_page_container.grab()
+        image = QtCore.QByteArray()
+        image_buffer = QtCore.QBuffer(image)
+        image_buffer.open(QtCore.QIODevice.WriteOnly)
+        pixmap.save(image_buffer, 'PNG')
+
+        screen_size, _ = self.__screen_geometry()
+        position = self.__home_page_container.map_to(
+            self.__main_container, QtCore.QPoint(0, 0))
+        self.__home_snapshot.save(
+            image=image.data(),
+            screen_size=screen_size,
+            device_pixel_ratio=pixmap.device_pixel_ratio(),
+            position=(position.x(), position.y()),
+            tiles=tiles)
+
     def __mount_energy_buttons_bg(self) -> None:
         # Wait for category buttons to render and mount energy buttons
         time.sleep(0.03)
@@ -329,8 +541,17 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def __mount_energy_buttons(self) -> None:
         # Mount energy buttons
+        import session  # QtDBus is only loaded when the buttons are created
 
         self.__energy_buttons_schema = attachments.EnergyButtonsSchema()
+        self.__session_actions = session.SessionActions(
+            schema=self.__energy_buttons_schema.schema, parent=self)
+        self.__session_actions.availability_signal().connect(
+            self.__on_session_action_availability)
+        self.__session_actions.finished_signal().connect(
+            lambda _action_id, _error: self.close())
+        self.__session_actions.probe()
+
         for name_id, values in self.__energy_buttons_schema.schema.items():
             if name_id == 'switch-user':
                 continue
@@ -347,7 +568,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.__energy_buttons_layout.add_widget(energy_button)
 
     def __mount_app_category_pages(
-            self, desktop_file_list: list, index: int) -> widgets.AppGrid:
+            self, desktop_file_list: list, index: int,
+            priority: bool = True) -> widgets.AppGrid:
         page = QtWidgets.QWidget()
         page.set_contents_margins(0, 0, 0, 0)
         page.set_style_sheet('background: transparent;')
@@ -364,7 +586,8 @@ class MainWindow(QtWidgets.QMainWindow):
             desktop_file_list=desktop_file_list,
             pin_desktop_file_list=self.__pin_apps.apps,
             columns_num=self.__app_grid_columns,
-            empty_lines=0)
+            empty_lines=0,
+            priority=priority)
 
         app_grid.clicked_signal().connect(
             lambda widget: self.__on_app_launcher(widget))
@@ -381,25 +604,117 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def __on_search_input(self, text: str) -> None:
         # Triggered when text is entered into the search box
+        self.__search_start_time = time.perf_counter()
+        self.__search_apps_are_shown = False
+        if 'search' in self.__stack_grids:
+            # The grid of the previous text is replaced by the next results
+            widgets.MountScheduler.instance().cancel(
+                self.__stack_grids['search'])
+        self.__search_provider_results = {}
+        if self.__search_results_view:
+            self.__search_results_view.clear()
         if text:
             if self.__category_buttons_layout.item_at(0).widget().is_enabled():
                 self.__show_searched_apps_page(show=True)
 
-            desktop_file_list = self.__searched_apps(text=text)
-            if desktop_file_list:
-                grid = self.__mount_searched_apps_grid(
-                    desktop_file_list=desktop_file_list)
-                self.__stack_grids['search'] = grid
-
-                app_launcher_focus_thread = threading.Thread(
-                    target=self.__app_launcher_focus_bg, args=['search'])
-                app_launcher_focus_thread.start()
-            else:
-                self.__mount_empty_searched_apps_grid()
-
         else:  # Restore default menu layout
             self.__show_searched_apps_page(show=False)
 
+        # Apps and other sources are searched in background threads, see
+        # '__on_searched_apps'. An empty text only cancels the searches
+        self.__search_worker.search(text)
+        if text or self.__search_provider_runner:
+            self.__search_providers().search(text)
+
+    def __search_providers(self) -> 'providers.SearchProviderRunner':
+        # Search provider runner and its results view, created on the first
+        # search. They are not needed to show the window
+        if not self.__search_provider_runner:
+            import providers
+
+            search_providers = [
+                providers.CalculatorProvider(),
+                providers.SettingsProvider(
+                    desktop_file_index=self.__desktop_file_index),
+                providers.RecentFilesProvider(),
+                providers.CommandProvider()]
+            self.__search_provider_runner = providers.SearchProviderRunner(
+                providers=search_providers,
+                callback=self.__search_provider_results_signal.emit)
+
+            self.__search_results_view = widgets.SearchResultsView(
+                provider_names=[x.name for x in search_providers])
+            self.__search_results_view.clicked_signal().connect(
+                self.__on_search_result)
+            self.__search_results_view.enter_event_signal().connect(
+                self.__on_search_result_enter_event)
+            self.__layout_container.insert_widget(
+                self.__layout_container.index_of(self.__status_bar),
+                self.__search_results_view)
+
+        return self.__search_provider_runner
+
+    def __on_searched_apps(
+            self, generation: int, text: str,
+            desktop_file_list: list) -> None:
+        # Results of the app search, sent from its thread
+        if generation != self.__search_worker.generation:
+            return  # The text has changed
+
+        if desktop_file_list:
+            grid = self.__mount_searched_apps_grid(
+                desktop_file_list=desktop_file_list)
+            self.__stack_grids['search'] = grid
+
+            app_launcher_focus_thread = threading.Thread(
+                target=self.__app_launcher_focus_bg, args=['search'])
+            app_launcher_focus_thread.start()
+        else:
+            self.__mount_empty_searched_apps_grid()
+            self.__on_search_results_shown()
+
+    def __on_search_provider_results(
+            self, generation: int, provider_name: str,
+            search_results: list) -> None:
+        # Results of a search provider, sent from its thread
+        if generation != self.__search_provider_runner.generation:
+            return  # The text has changed
+
+        self.__search_provider_results[provider_name] = search_results
+        if self.__search_apps_are_shown:
+            self.__search_results_view.set_results(
+                provider_name, search_results)
+
+    def __show_search_provider_results(self) -> None:
+        # The apps of the search are shown, the other results can follow
+        self.__search_apps_are_shown = True
+        for provider_name, search_results in (
+                self.__search_provider_results.items()):
+            self.__search_results_view.set_results(
+                provider_name, search_results)
+
+    def __on_search_result(self, widget: widgets.SearchResultButton) -> None:
+        # Search provider result clicked
+        search_result = widget.search_result()
+        if search_result.copy_text:
+            # Keep the menu open, the clipboard belongs to the window
+            QtGui.QGuiApplication.clipboard().set_text(
+                search_result.copy_text)
+            self.__status_bar.set_text(
+                f'Copied to the clipboard: {search_result.copy_text}')
+            return
+
+        search_result.launch()
+        self.close()
+
+    def __on_search_result_enter_event(
+            self, widget: widgets.SearchResultButton) -> None:
+        # Add status bar information about the result
+        search_result = widget.search_result()
+        self.__status_bar.set_text(
+            search_result.description if search_result.description else
+            search_result.title)
+
     def __app_launcher_focus_bg(self, sender_id: str) -> None:
         time.sleep(0.7)
         self.__app_launcher_focus_signal.emit(sender_id)
@@ -408,50 +723,19 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.__stack_grids[sender_id].widgets_list():
             self.__stack_grids[sender_id].widgets_list()[0].set_focus()
 
-    def __searched_apps(self, text: str) -> list:
-        # Searched app list [DesktopFile, DesktopFile]
-        desktop_files = []
-        local = locale.getdefaultlocale()[0]
-        escope = '[Desktop Entry]'
-        for desk_app in self.__menu_schema.schema['All']:
-
-            # Name[<local>]
-            if (f'Name[{local}]' in desk_app.content[escope]
-                    and text in desk_app.content[escope][
-                        f'Name[{local}]'].lower()):
-                desktop_files.append(desk_app)
-
-            # Name: Always exists
-            elif text in desk_app.content[escope]['Name'].lower():
-                desktop_files.append(desk_app)
-
-            # GenericName[<local>]
-            elif (f'GenericName[{local}]' in desk_app.content[escope]
-                  and text in desk_app.content[escope][
-                      f'GenericName[{local}]'].lower()):
-                desktop_files.append(desk_app)
-
-            # GenericName
-            elif ('GenericName' in desk_app.content[escope]
-                  and text in desk_app.content[escope][
-                      'GenericName'].lower()):
-                desktop_files.append(desk_app)
-
-            # Coment[<local>]
-            elif (f'Comment[{local}]' in desk_app.content[escope]
-                  and text in desk_app.content[escope][
-                      f'Comment[{local}]'].lower()):
-                desktop_files.append(desk_app)
-
-            # Coment
-            elif ('Comment' in desk_app.content[escope]
-                  and text in desk_app.content[escope]['Comment'].lower()):
-                desktop_files.append(desk_app)
-
-            # Exec: Always exists
-            elif text in desk_app.content[escope]['Exec'].lower():
-                desktop_files.append(desk_app)
-
+    def __searched_apps(self, text: str, is_cancelled) -> list | None:
+        # Searched app list [DesktopFile, DesktopFile], in the search thread
+        if not self.__menu_schema:
+            return None
+        desktop_files = self.__menu_schema.search(
+            text=text, is_cancelled=is_cancelled)
+        if desktop_files is None:
+            return None
+
+        # Most used apps first
+        desktop_files.sort(
+            key=lambda x: self.__usage_store.score(x.desktop_file_id),
+            reverse=True)
         return desktop_files
 
     def __mount_searched_apps_grid(
@@ -466,14 +750,20 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Clear old apps page
         self.__app_grid_stacked_layout.set_current_index(0)
-        self.__app_grid_stacked_layout.remove_widget(
-            self.__app_grid_stacked_layout.current_widget())
+        old_page = self.__app_grid_stacked_layout.current_widget()
+        self.__app_grid_stacked_layout.remove_widget(old_page)
+        old_page.delete_later()
 
         # Create new apps page
+        build_start_time = time.perf_counter()
+        generation = self.__search_worker.generation
         app_grid = widgets.AppGrid(
             desktop_file_list=desktop_file_list,
             pin_desktop_file_list=self.__pin_apps.apps,
             columns_num=self.__app_grid_columns)
+        app_grid.mounted_signal().connect(
+            lambda _: self.__on_search_grid_mounted(
+                generation, build_start_time))
         app_grid.clicked_signal().connect(
             lambda widget: self.__on_app_launcher(widget))
         app_grid.right_clicked_signal().connect(
@@ -493,8 +783,9 @@ class MainWindow(QtWidgets.QMainWindow):
     def __mount_empty_searched_apps_grid(self) -> None:
         # Clear old apps page
         self.__app_grid_stacked_layout.set_current_index(0)
-        self.__app_grid_stacked_layout.remove_widget(
-            self.__app_grid_stacked_layout.current_widget())
+        old_page = self.__app_grid_stacked_layout.current_widget()
+        self.__app_grid_stacked_layout.remove_widget(old_page)
+        old_page.delete_later()
 
         # Message
         no_apps_message = QtWidgets.QLabel('No apps found!')
@@ -555,9 +846,162 @@ class MainWindow(QtWidgets.QMainWindow):
             (self.__active_context_menu_app_launcher
                 .set_context_menu_to_visible(visible=False))
 
+    def __category_buttons(self) -> list:
+        # CategoryButton list
+        return [
+            self.__category_buttons_layout.item_at(x).widget()
+            for x in range(self.__category_buttons_layout.count())]
+
+    def __create_category_page(
+            self, category_button: widgets.CategoryButton,
+            priority: bool = True) -> None:
+        # Replace the empty page of the category with its app grid. Pages
+        # built in advance are mounted after the page the user asked for
+        category = category_button.category
+        index = category_button.page_index
+        current_widget = self.__app_grid_stacked_layout.current_widget()
+
+        # Clear old apps page
+        old_page = self.__app_grid_stacked_layout.widget(index)
+        self.__app_grid_stacked_layout.remove_widget(old_page)
+        old_page.delete_later()
+
+        # Creat new apps page
+        grid = self.__mount_app_category_pages(
+            desktop_file_list=self.__menu_schema.schema[category],
+            index=index,
+            priority=priority)
+
+        # Keep the visible page
+        if current_widget and self.__app_grid_stacked_layout.index_of(
+                current_widget) >= 0:
+            self.__app_grid_stacked_layout.set_current_widget(current_widget)
+
+        # Update grid list
+        self.__stack_grids[category] = grid
+        # Update page list
+        self.__app_page_created.append(category)
+
+        # Cache
+        build_start_time = time.perf_counter()
+        grid.mounted_signal().connect(
+            lambda _: self.__on_app_grid_mounted(category, build_start_time))
+        self.__page_cache.add(
+            category,
+            size=len(self.__menu_schema.schema[category]) *
+            self.__page_tile_bytes)
+        self.__evict_category_pages()
+
+    def __on_app_grid_mounted(
+            self, category: str | None, build_start_time: float) -> None:
+        # Time from the creation of a grid to its last tile
+        self.__grid_mount_seconds = time.perf_counter() - build_start_time
+        if category:
+            self.__page_cache.add_build_time(
+                category, self.__grid_mount_seconds)
+        else:
+            self.__on_search_results_shown()
+
+    def __on_search_grid_mounted(
+            self, generation: int, build_start_time: float) -> None:
+        # Grid of the searched apps is complete, if the text has not changed
+        if generation == self.__search_worker.generation:
+            self.__on_app_grid_mounted(None, build_start_time)
+
+    def __on_search_results_shown(self) -> None:
+        # The grid of the searched apps is complete, or the message that
+        # there are none is shown. Time from the keystroke to this point
+        self.__search_seconds = time.perf_counter() - self.__search_start_time
+        self.__show_search_provider_results()
+        if self.__benchmark_keystroke:
+            self.__add_frame_milestone('search-results')
+
+    def __evict_category_pages(self) -> None:
+        # Replace the least recently viewed pages with empty pages
+        visible_category = (
+            self.__active_category_button.category
+            if self.__active_category_button else None)
+        evicted_categories = self.__page_cache.evict(keep=[visible_category])
+        for category_button in self.__category_buttons():
+            if category_button.category not in evicted_categories:
+                continue
+
+            grid = self.__stack_grids.pop(category_button.category)
+            self.__prewarm_grids.pop(category_button.category, None)
+            widgets.MountScheduler.instance().cancel(grid)
+            if self.__active_context_menu_app_launcher in grid.widgets_list():
+                self.__active_context_menu_app_launcher = None
+
+            page = self.__app_grid_stacked_layout.widget(
+                category_button.page_index)
+            self.__app_grid_stacked_layout.remove_widget(page)
+            page.delete_later()
+            self.__app_grid_stacked_layout.insert_widget(
+                category_button.page_index, QtWidgets.QWidget())
+            self.__app_page_created.remove(category_button.category)
+
+        if evicted_categories:
+            logging.debug(
+                f'Evicted pages {evicted_categories}: '
+                f'{self.__page_cache.counters}')
+
+    def __start_prewarm(self, categories: list) -> None:
+        # Build the pages of the categories after the pages the user asked
+        # for. Grids paused by an input continue where they stopped
+        for category in reversed(categories):
+            if category in self.__prewarm_queue:
+                self.__prewarm_queue.remove(category)
+            if category in self.__prewarm_grids:
+                self.__prewarm_grids[category].schedule_mount(priority=False)
+            elif (category != 'Home' and
+                    category not in self.__app_page_created):
+                self.__prewarm_queue.insert(0, category)
+
+        if self.__prewarm_queue:
+            # The page construction counts against the frame time budget
+            mount_scheduler = widgets.MountScheduler.instance()
+            mount_scheduler.cancel(self.__app_grid_stacked_layout)
+            mount_scheduler.schedule(
+                self.__app_grid_stacked_layout,
+                self.__prewarm_category_pages(), priority=False)
+
+    def __stop_prewarm(self) -> None:
+        # User input has priority. The grids being mounted are paused
+        mount_scheduler = widgets.MountScheduler.instance()
+        mount_scheduler.cancel(self.__app_grid_stacked_layout)
+        self.__prewarm_queue.clear()
+        for grid in self.__prewarm_grids.values():
+            mount_scheduler.cancel(grid)
+
+    def __prewarm_category_pages(self) -> Iterator[None]:
+        # Build one page per step, its grid is mounted after this job
+        while self.__prewarm_queue:
+            category = self.__prewarm_queue.pop(0)
+            if category in self.__app_page_created:
+                continue
+
+            for category_button in self.__category_buttons():
+                if category_button.category == category:
+                    self.__create_category_page(
+                        category_button, priority=False)
+                    grid = self.__stack_grids[category]
+                    self.__prewarm_grids[category] = grid
+                    grid.mounted_signal().connect(
+                        lambda _, x=category:
+                        self.__prewarm_grids.pop(x, None))
+                    break
+            yield
+
+    def __on_category_button_enter_event(
+            self, widget: widgets.CategoryButton) -> None:
+        # Hovered category is the likely next page
+        if widget.is_enabled():
+            self.__start_prewarm(categories=[widget.category])
+
     def __on_category_button(self) -> None:
         # When mouse cursor hovers over category button
         self.__close_active_context_menus()
+        self.__stop_prewarm()
 
         # Active category button state (highlight fixed)
         if self.__active_category_button:
@@ -567,24 +1011,15 @@ class MainWindow(QtWidgets.QMainWindow):
 
         category = self.__active_category_button.category
         index = self.__active_category_button.page_index
+        if category != 'Home':
+            self.__page_cache.view(category)
         if category not in self.__app_page_created:
-            # Clear old apps page
-            self.__app_grid_stacked_layout.set_current_index(index)
-            self.__app_grid_stacked_layout.remove_widget(
-                self.__app_grid_stacked_layout.current_widget())
-
-            # Creat new apps page
-            grid = self.__mount_app_category_pages(
-                desktop_file_list=self.__menu_schema.schema[category],
-                index=index)
-
-            # Update grid list
-            self.__stack_grids[category] = grid
-            # Update page list
-            self.__app_page_created.append(category)
+            self.__create_category_page(self.__active_category_button)
+        elif category in self.__prewarm_grids:
+            self.__prewarm_grids.pop(category).schedule_mount(priority=True)
 
-            # Click
-            self.__active_category_button.clicked_signal().emit(0)
+        if category != 'Home':
+            self.__category_usage_store.record(category)
 
         # Show page
         self.__app_grid_stacked_layout.set_current_index(index)
@@ -612,27 +1047,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # AppLauncher
         if isinstance(widget, widgets.AppLauncher):
-            # Save app in "Recents"
-            if widget.desktop_file() in self.__recent_apps.apps:
-                self.__recent_apps.apps.remove(widget.desktop_file())
-            else:
-                if self.__recent_apps.apps and (
-                        len(self.__recent_apps.apps) >=
-                        self.__app_grid_columns):
-                    self.__recent_apps.apps.pop()
-            self.__recent_apps.apps.insert(0, widget.desktop_file())
-            self.__recent_apps.save_apps(
-                url_list_apps=[x.url for x in self.__recent_apps.apps])
-
             # Exec
-            exe = widget.desktop_file().content['[Desktop Entry]']['Exec']
-            if '/snap/bin/' in exe:
-                exec_command = exe.strip()
-            elif '/usr/bin/flatpak' in exe:
-                exec_command = exe.replace('/usr/bin/', '').strip()
-            else:
-                exec_command = exe.strip().split()[0]
-            subprocess.Popen(exec_command.strip().strip('"').strip().split())
+            widget.desktop_file().launch()
+
+            # Save app usage for "Recents" (written in the background)
+            self.__usage_store.record(widget.desktop_file().desktop_file_id)
 
         # Ghost AppLauncher
         elif isinstance(widget, widgets.GhostAppLauncher):
@@ -681,20 +1100,10 @@ class MainWindow(QtWidgets.QMainWindow):
                 0, self.__active_context_menu_app_launcher.desktop_file())
 
             # Save configs
-            self.__pin_apps.save_apps(url_list_apps=[
-                x.url for x in self.__pin_apps.apps])
-
-        # Hide old pin apps
-        self.__pin_update_index += 2
-        self.__home_page_layout.item_at(
-            self.__pin_update_index).widget().set_visible(False)
-        self.__home_page_layout.item_at(
-            self.__pin_update_index + 1).widget().set_visible(False)
-
-        # Render new app list
-        self.__mount_pin_apps()
+            self.__pin_apps.save_apps()
 
         self.__close_active_context_menus()
+        self.__update_pin_apps_grid()
 
     def __on_app_launcher_unpin_context_menu_button(self) -> None:
         # Unpin
@@ -709,20 +1118,16 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.__active_context_menu_app_launcher.desktop_file())
 
             # Save configs
-            self.__pin_apps.save_apps(url_list_apps=[
-                x.url for x in self.__pin_apps.apps])
-
-        # Hide old pin apps
-        self.__pin_update_index += 2
-        self.__home_page_layout.item_at(
-            self.__pin_update_index).widget().set_visible(False)
-        self.__home_page_layout.item_at(
-            self.__pin_update_index + 1).widget().set_visible(False)
-
-        # Render new app list
-        self.__mount_pin_apps()
+            self.__pin_apps.save_apps()
 
         self.__close_active_context_menus()
+        self.__update_pin_apps_grid()
+
+    def __update_pin_apps_grid(self) -> None:
+        # Apply the pinned and unpinned apps to the Pin's grid
+        if 'pin' in self.__home_grids:
+            self.__home_grids['pin'].set_desktop_file_list(
+                self.__pin_apps.apps)
 
     def __on_app_launcher_shortcut_context_menu_button(self) -> None:
         # Desktop: default
@@ -747,13 +1152,12 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Copy shortcut to desktop
         if not os.path.isfile(destination):
+            import shutil
+
             shutil.copyfile(source, destination)
 
             # Make shortcut executable
-            executable_command = subprocess.Popen(
-                ['chmod', '+x', destination],
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            _stdout, _stderr = executable_command.communicate()
+            os.chmod(destination, os.stat(destination).st_mode | 0o111)
 
         self.__close_active_context_menus()
 
@@ -764,27 +1168,15 @@ class MainWindow(QtWidgets.QMainWindow):
         # Save status bar text
         self.__status_bar_temp_text = self.__status_bar.text()
 
-        # Show context menu
+        # Show context menu (the pin buttons follow the pin registry)
         if not widget.context_menu_is_visible():
             self.__close_active_context_menus()
 
             widget.set_context_menu_to_visible(True)
-            self.__active_context_app_launcher = widget
-
-            widget.app_launcher_context_menu().enter_event_signal().connect(
-                self.__on_app_launcher_context_menu_enter_event)
 
             # Save widget
             self.__active_context_menu_app_launcher = widget
 
-            # Toggle pin button
-            if widget.desktop_file() not in self.__pin_apps.apps:
-                # If widget is not a pin app and 'unpin' is showed...
-                if not widget.app_launcher_context_menu(
-                        ).pin_button_is_visible():
-                    # ... else show the 'pin' button
-                    self.__active_context_menu_app_launcher.toggle_pin_button()
-
     def __on_app_launcher_context_menu_enter_event(
             self, widget: widgets.AppLauncherContextMenuButton) -> None:
         # Add status bar context menu info
@@ -807,9 +1199,17 @@ class MainWindow(QtWidgets.QMainWindow):
             self.__status_bar.set_text('Hide app from menu')
 
     def __on_app_launcher_enter_event(
-            self, widget: widgets.AppLauncher) -> None:
+            self,
+            widget:
+            widgets.AppLauncher |
+            widgets.AppLauncherContextMenuButton) -> None:
         # Add status bar information about the app
 
+        # Context menu button
+        if isinstance(widget, widgets.AppLauncherContextMenuButton):
+            self.__on_app_launcher_context_menu_enter_event(widget=widget)
+            return
+
         # Language code
         local, escope = (locale.getlocale()[0], '[Desktop Entry]')
 
@@ -852,17 +1252,21 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def __on_energy_buttons(self, widget: widgets.EnergyButton) -> None:
         # When one energy button is clicked
-        for name_id, values in self.__energy_buttons_schema.schema.items():
-            if widget.name_id() == name_id:
-                if values['command']:
-                    command = subprocess.Popen(
-                        values['command'],
-                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                    _stdout, _stderr = command.communicate()
-
-                break
+        # Hide now and close when the action finishes (finished_signal)
+        self.hide()
+        self.__session_actions.run(widget.name_id())
+
+    def __on_session_action_availability(
+            self, action_id: str, available: bool) -> None:
+        # Hide energy buttons that can not be used
+        if available:
+            return
 
-        self.close()
+        for index in range(self.__energy_buttons_layout.count()):
+            energy_button = self.__energy_buttons_layout.item_at(
+                index).widget()
+            if energy_button.name_id() == action_id:
+                energy_button.set_visible(False)
 
     def __on_energy_buttons_enter_event(
             self, widget: widgets.EnergyButton) -> None:
@@ -873,6 +1277,79 @@ class MainWindow(QtWidgets.QMainWindow):
         # Clear status bar
         self.__status_bar.set_text(self.__status_bar_default_text)
 
+    def __toggle_performance_hud(self) -> None:
+        # Show or hide the performance overlay
+        if not self.__performance_hud:
+            self.__performance_hud = widgets.PerformanceHud(
+                window=self, sample_callback=self.__performance_values,
+                parent=self)
+            self.__performance_hud.move(10, 10)
+        self.__performance_hud.set_visible(
+            not self.__performance_hud.is_visible())
+
+    def toggle_profiler(self) -> None:
+        """Start or stop a profiling session
+
+        Profiles the GUI thread. The collapsed stacks and pstats files are
+        written in $XDG_CACHE_HOME/tuxmenu/profiles when it stops.
+        """
+        if not self.__profiler.is_running:
+            try:
+                seconds = float(
+                    os.environ.get('TUXMENU_PROFILE_SECONDS') or 10)
+            except ValueError:
+                seconds = 10.0
+            self.__profiler.start()
+            self.__profiler_timer.start(int(seconds * 1000))
+            self.__status_bar.set_text('Profiling...')
+            logging.info(f'Profiling for {seconds} seconds')
+            return
+
+        self.__profiler_timer.stop()
+        paths = self.__profiler.stop()
+        if paths:
+            self.__status_bar.set_text(f'Profile saved in {paths[0]}')
+            logging.info(f'Profile saved in {paths[0]} and {paths[1]}')
+        else:
+            self.__status_bar.set_text(self.__status_bar_default_text)
+
+    def __performance_values(self) -> dict:
+        # Values of the performance overlay
+        pixmap_counters = widgets.IconView.pixmap_cache_counters()
+        pixmap_lookups = pixmap_counters['hits'] + pixmap_counters['misses']
+        page_counters = self.__page_cache.counters
+
+        # Last query of each search provider, and queries over the budget
+        provider_latencies = []
+        if self.__search_provider_runner:
+            provider_timeouts = self.__search_provider_runner.timeouts
+            for name, seconds in (
+                    self.__search_provider_runner.latencies.items()):
+                if seconds is not None:
+                    provider_latencies.append(
+                        f'{name} {seconds * 1000:.1f} ms' + (
+                            f' ({provider_timeouts[name]} late)'
+                            if provider_timeouts[name] else ''))
+
+        return {
+            'Last search': (
+                f'{self.__search_seconds * 1000:.1f} ms'
+                if self.__search_seconds is not None else '-'),
+            'Last grid mount': (
+                f'{self.__grid_mount_seconds * 1000:.1f} ms'
+                if self.__grid_mount_seconds is not None else '-'),
+            'App launchers': str(len(
+                self.find_children(widgets.AppLauncher))),
+            'Pixmap cache': (
+                f'{pixmap_counters["pixmaps"]} pixmaps, '
+                f'{pixmap_counters["hits"] / pixmap_lookups:.1%} hits'
+                if pixmap_lookups else '-'),
+            'Page cache': (
+                f'{page_counters["pages"]} pages, '
+                f'{page_counters["hits"]} hits, '
+                f'{page_counters["evictions"]} evictions'),
+            'Search providers': ', '.join(provider_latencies) or '-'}
+
     def event_filter(
             self, widget: QtWidgets.QMainWindow, event: QtCore.QEvent) -> None:
         """Traces the keys
@@ -882,10 +1359,29 @@ class MainWindow(QtWidgets.QMainWindow):
         :param widget: QMainWindow that receives the event
         :param event: QEvent that captures keyboard keys
         """
+        if (self.__frame_milestones and widget is self and
+                event.type() == QtCore.QEvent.UpdateRequest):
+            # The frame is painted when the event loop is back
+            milestones = self.__frame_milestones
+            self.__frame_milestones = []
+            QtCore.QTimer.single_shot(
+                0, lambda: self.__on_frame_milestones(milestones))
+
         if event.type() == QtCore.QEvent.KeyPress and widget is self:
+            self.__stop_prewarm()
             key = event.key()
             text = event.text()
 
+            if (key == QtCore.Qt.Key_H and event.modifiers() == (
+                    QtCore.Qt.ControlModifier | QtCore.Qt.ShiftModifier)):
+                self.__toggle_performance_hud()
+                return True
+
+            if (key == QtCore.Qt.Key_P and event.modifiers() == (
+                    QtCore.Qt.ControlModifier | QtCore.Qt.ShiftModifier)):
+                self.toggle_profiler()
+                return True
+
             if key == QtCore.Qt.Key_Escape:
                 self.__search_input.clear()
                 # text = ''  # Fix espace
@@ -914,6 +1410,21 @@ class MainWindow(QtWidgets.QMainWindow):
         if event.button() == QtCore.Qt.LeftButton:
             self.close()
 
+    def close_event(self, event: QtGui.QCloseEvent) -> None:
+        """Window close event
+
+        Saves the Home page snapshot that is shown on the next start, and
+        the files used, that are loaded by 'tuxmenu --prewarm' at login.
+
+        :param event: QCloseEvent received by sent signal
+        """
+        import prewarm  # Only to save the files used, on close
+
+        self.__save_home_snapshot()
+        prewarm.PrewarmFiles().save(
+            prewarm.loaded_files() + widgets.IconView.image_paths())
+        event.accept()
+
 
 class Application(object):
     """Desktop menu for Linux written in Python and Qt"""
@@ -931,6 +1442,26 @@ class Application(object):
             'static', 'grid.svg')
         self.__application_window = MainWindow()
 
+        # SIGUSR1 toggles the profiler. The signal only writes its number
+        # to a pipe, which wakes up the Qt event loop
+        self.__signal_read_fd, signal_write_fd = os.pipe()
+        os.set_blocking(self.__signal_read_fd, False)
+        os.set_blocking(signal_write_fd, False)
+        signal.set_wakeup_fd(signal_write_fd)
+        signal.signal(signal.SIGUSR1, lambda *_: None)
+        self.__signal_notifier = QtCore.QSocketNotifier(
+            self.__signal_read_fd, QtCore.QSocketNotifier.Read)
+        self.__signal_notifier.activated.connect(self.__on_signal)
+
+    def __on_signal(self) -> None:
+        # Signal numbers written by the wakeup fd
+        try:
+            signal_numbers = os.read(self.__signal_read_fd, 64)
+        except BlockingIOError:
+            return
+        if signal.SIGUSR1 in signal_numbers:
+            self.__application_window.toggle_profiler()
+
     def main(self) -> None:
         """Start the app
 
@@ -950,6 +1481,7 @@ class Application(object):
         # Blur
         self.__application_window.set_attribute(
             QtCore.Qt.WA_TranslucentBackground)
+        # from BlurWindow.blurWindow import GlobalBlur  # Load on use
         # GlobalBlur(self.__application_window.win_id(), Dark=True, QWidget=self)
 
         # Show | show_maximized show_full_screen show
@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+# Reference:
+#   specifications.freedesktop.org/menu-spec/latest/
+#   www.freedesktop.org/wiki/Specifications/basedir-spec/
+import json
+import logging
+import os
+import xml.etree.ElementTree as ElementTree
+
+import attachments
+
+
+def config_dirs() -> list:
+    """XDG config dirs
+
+    $XDG_CONFIG_HOME followed by $XDG_CONFIG_DIRS, in order of priority.
+    """
+    config_home = (
+        os.environ.get('XDG_CONFIG_HOME') or
+        os.path.join(os.environ['HOME'], '.config'))
+    return [config_home] + [
+        x for x in (os.environ.get('XDG_CONFIG_DIRS') or '/etc/xdg').split(':')
+        if x]
+
+
+def data_dirs() -> list:
+    """XDG data dirs
+
+    $XDG_DATA_HOME followed by $XDG_DATA_DIRS, in order of priority.
+    """
+    data_home = (
+        os.environ.get('XDG_DATA_HOME') or
+        os.path.join(os.environ['HOME'], '.local/share'))
+    return [data_home] + [
+        x for x in (
+            os.environ.get('XDG_DATA_DIRS') or
+            '/usr/local/share:/usr/share').split(':')
+        if x]
+
+
+def path_signature(path: str) -> list:
+    """Stat signature of a file or dir
+
+    Changes when the file is edited, replaced or removed, like:
+    ['/etc/xdg/menus/applications.menu', 1700000000000000000, 1234].
+
+    :param path: File or dir path
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path, None, None]
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+class Menu(object):
+    """Compiled menu node
+
+    A <Menu> element with its merged files resolved and its Include and
+    Exclude elements compiled into a single rule. Used by 'MenuFile'.
+    """
+    def __init__(self, name: str) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param name: Menu <Name>
+        """
+        self.name = name
+        self.directories = []
+        self.directory_dirs = []
+        self.rules = []
+        self.only_unallocated = None  # None if the element is not present
+        self.deleted = None
+        self.moves = []
+        self.menus = []
+
+    def merge(self, menu) -> None:
+        """Merge a menu with the same name
+
+        Lists are joined and the flags take the last value present, a menu
+        without <OnlyUnallocated> or <Deleted> keeps the current one.
+
+        :param menu: Menu object
+        """
+        self.directories += menu.directories
+        self.directory_dirs += menu.directory_dirs
+        self.rules += menu.rules
+        if menu.only_unallocated is not None:
+            self.only_unallocated = menu.only_unallocated
+        if menu.deleted is not None:
+            self.deleted = menu.deleted
+        self.moves += menu.moves
+        self.menus += menu.menus
+
+    def __str__(self) -> str:
+        return f'<Menu: {self.name}>'
+
+
+class MenuFile(object):
+    """XDG applications menu file
+
+    Reads the '.menu' XML of the distro or admin, with its <MergeFile> and
+    <MergeDir> files, and compiles it into a tree of 'Menu' objects whose
+    rules can be evaluated against desktop entries. Every file and dir read
+    is recorded in 'signature', so that the result can be cached.
+
+    <Layout>, <LegacyDir>, <KDELegacyDirs> and <AppDir> other than the
+    default ones are not supported.
+    """
+    def __init__(self, path: str = None) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param path: Menu file path, see 'find_path'
+        """
+        self.__path = path if path else self.find_path()
+        self.__signature = []
+        self.__root = None
+        if self.__path:
+            self.__root = self.__load()
+
+    @staticmethod
+    def find_path() -> str | None:
+        """Applications menu file path
+
+        The first "menus/${XDG_MENU_PREFIX}applications.menu" found in the
+        XDG config dirs, or None if there is no menu file.
+        """
+        file_name = os.environ.get('XDG_MENU_PREFIX', '') + 'applications.menu'
+        for config_dir in config_dirs():
+            path = os.path.join(config_dir, 'menus', file_name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    @property
+    def path(self) -> str | None:
+        """Menu file path"""
+        return self.__path
+
+    @property
+    def signature(self) -> list:
+        """Signatures of the files and dirs read
+
+        List of 'path_signature' lists.
+        """
+        return self.__signature
+
+    @property
+    def root(self) -> Menu | None:
+        """Root menu
+
+        None if there is no menu file or it could not be read.
+        """
+        return self.__root
+
+    def __load(self) -> Menu | None:
+        # Parse, merge and compile
+        element = self.__read_menu_element(self.__path, set())
+        if element is None:
+            return None
+
+        root = self.__compile_menu(element)
+        self.__merge_submenus(root)
+        self.__apply_moves(root)
+        return root
+
+    def __read_menu_element(
+            self, path: str, loaded_paths: set) -> ElementTree.Element | None:
+        # Root <Menu> element of a file with its merges resolved
+        path = os.path.realpath(path)
+        self.__signature.append(path_signature(path))
+        if path in loaded_paths:
+            return None
+        loaded_paths.add(path)
+
+        try:
+            element = ElementTree.parse(path).getroot()
+        except (OSError, ElementTree.ParseError) as err:
+            logging.error(f'{path}: {err}')
+            return None
+
+        if element.tag != 'Menu':
+            logging.error(f'{path}: root element is not <Menu>')
+            return None
+
+        self.__resolve_merges(element, path, loaded_paths)
+        return element
+
+    def __resolve_merges(
+            self, element: ElementTree.Element, path: str,
+            loaded_paths: set) -> None:
+        # Replace merge and default elements with their content
+        base_dir = os.path.dirname(path)
+        children = []
+        for child in element:
+            text = (child.text or '').strip()
+            if child.tag == 'Menu':
+                self.__resolve_merges(child, path, loaded_paths)
+                children.append(child)
+
+            elif child.tag == 'MergeFile':
+                children += self.__merged_file_children(
+                    text, child.get('type'), path, loaded_paths)
+
+            elif child.tag == 'MergeDir':
+                children += self.__merged_dir_children(
+                    os.path.join(base_dir, text), loaded_paths)
+
+            elif child.tag == 'DefaultMergeDirs':
+                merge_dir_name = (
+                    os.environ.get('XDG_MENU_PREFIX', '') +
+                    'applications-merged')
+                for config_dir in reversed(config_dirs()):
+                    children += self.__merged_dir_children(
+                        os.path.join(config_dir, 'menus', merge_dir_name),
+                        loaded_paths)
+
+            elif child.tag == 'DirectoryDir':
+                child.text = os.path.join(base_dir, text)
+                children.append(child)
+
+            elif child.tag == 'DefaultDirectoryDirs':
+                # Lowest priority first, the last dir wins
+                for data_dir in reversed(data_dirs()):
+                    directory_dir = ElementTree.Element('DirectoryDir')
+                    directory_dir.text = os.path.join(
+                        data_dir, 'desktop-directories')
+                    children.append(directory_dir)
+
+            else:
+                children.append(child)
+
+        element[:] = children
+
+    def __merged_file_children(
+            self, text: str, merge_type: str, path: str,
+            loaded_paths: set) -> list:
+        # Children of the root <Menu> of a <MergeFile>
+        if merge_type == 'parent':
+            # Same relative path in the config dirs after the current one
+            relative_path = None
+            for config_dir in config_dirs():
+                menus_dir = os.path.join(config_dir, 'menus') + os.sep
+                if relative_path:
+                    merge_path = os.path.join(menus_dir, relative_path)
+                    if os.path.isfile(merge_path):
+                        break
+                elif path.startswith(menus_dir):
+                    relative_path = path[len(menus_dir):]
+            else:
+                return []
+        else:
+            merge_path = os.path.join(os.path.dirname(path), text)
+
+        return self.__merged_children(merge_path, loaded_paths)
+
+    def __merged_dir_children(
+            self, dir_path: str, loaded_paths: set) -> list:
+        # Children of the root <Menu> of each file of a <MergeDir>
+        self.__signature.append(path_signature(dir_path))
+        if not os.path.isdir(dir_path):
+            return []
+
+        children = []
+        for file_name in sorted(os.listdir(dir_path)):
+            if file_name.endswith('.menu'):
+                children += self.__merged_children(
+                    os.path.join(dir_path, file_name), loaded_paths)
+        return children
+
+    def __merged_children(self, path: str, loaded_paths: set) -> list:
+        # Root <Menu> children of a merged file, without its <Name>
+        element = self.__read_menu_element(path, loaded_paths)
+        if element is None:
+            return []
+        return [x for x in element if x.tag != 'Name']
+
+    def __compile_menu(self, element: ElementTree.Element) -> Menu:
+        # Menu object of a merged <Menu> element
+        menu = Menu(name='')
+        for child in element:
+            text = (child.text or '').strip()
+            if child.tag == 'Name':
+                menu.name = text
+            elif child.tag == 'Directory':
+                menu.directories.append(text)
+            elif child.tag == 'DirectoryDir':
+                menu.directory_dirs.append(text)
+            elif child.tag == 'OnlyUnallocated':
+                menu.only_unallocated = True
+            elif child.tag == 'NotOnlyUnallocated':
+                menu.only_unallocated = False
+            elif child.tag == 'Deleted':
+                menu.deleted = True
+            elif child.tag == 'NotDeleted':
+                menu.deleted = False
+            elif child.tag in ('Include', 'Exclude'):
+                menu.rules.append(
+                    (child.tag == 'Include', self.__compile_rule(child)))
+            elif child.tag == 'Move':
+                old = child.findtext('Old')
+                new = child.findtext('New')
+                if old and new:
+                    menu.moves.append((old.strip(), new.strip()))
+            elif child.tag == 'Menu':
+                menu.menus.append(self.__compile_menu(child))
+        return menu
+
+    def __compile_rule(self, element: ElementTree.Element):
+        # Function of (desktop_file_id, categories: frozenset) -> bool
+        tag = element.tag
+        if tag == 'Filename':
+            desktop_file_id = (element.text or '').strip()
+            return lambda x, _: x == desktop_file_id
+
+        if tag == 'Category':
+            category = (element.text or '').strip()
+            return lambda _, y: category in y
+
+        if tag == 'All':
+            return lambda _, __: True
+
+        # Set lookups for the plain children, the others are called
+        desktop_file_ids = frozenset(
+            (x.text or '').strip() for x in element if x.tag == 'Filename')
+        categories = frozenset(
+            (x.text or '').strip() for x in element if x.tag == 'Category')
+        rules = [
+            self.__compile_rule(x) for x in element
+            if x.tag not in ('Filename', 'Category')]
+
+        if tag == 'And':
+            rules += [self.__compile_rule(x) for x in element
+                      if x.tag in ('Filename', 'Category')]
+            return lambda x, y: all(rule(x, y) for rule in rules)
+
+        def any_rule(x, y) -> bool:
+            return (
+                x in desktop_file_ids or not categories.isdisjoint(y) or
+                any(rule(x, y) for rule in rules))
+
+        if tag == 'Not':
+            return lambda x, y: not any_rule(x, y)
+
+        # <Include>, <Exclude> and <Or>
+        return any_rule
+
+    def __merge_submenus(self, menu: Menu) -> None:
+        # Submenus with the same name are merged, in order
+        menus = {}
+        for submenu in menu.menus:
+            if submenu.name in menus:
+                menus[submenu.name].merge(submenu)
+            else:
+                menus[submenu.name] = submenu
+        menu.menus = list(menus.values())
+
+        for submenu in menu.menus:
+            self.__merge_submenus(submenu)
+
+    def __apply_moves(self, menu: Menu) -> None:
+        # Move submenus by path, like: 'Old/Path' -> 'New/Path'
+        for old, new in menu.moves:
+            parent = self.__find_menu(menu, old.split('/')[:-1])
+            moved = next(
+                (x for x in parent.menus if x.name == old.split('/')[-1]),
+                None) if parent else None
+            if not moved:
+                continue
+            parent.menus.remove(moved)
+
+            new_parent = menu
+            for name in new.split('/')[:-1]:
+                new_parent = self.__find_menu(new_parent, [name], create=True)
+            moved.name = new.split('/')[-1]
+            new_parent.menus.append(moved)
+            self.__merge_submenus(new_parent)
+
+        for submenu in menu.menus:
+            self.__apply_moves(submenu)
+
+    @staticmethod
+    def __find_menu(
+            menu: Menu, names: list, create: bool = False) -> Menu | None:
+        # Submenu by path
+        for name in names:
+            submenu = next((x for x in menu.menus if x.name == name), None)
+            if not submenu:
+                if not create:
+                    return None
+                submenu = Menu(name=name)
+                menu.menus.append(submenu)
+            menu = submenu
+        return menu
+
+    def __str__(self) -> str:
+        return f'<MenuFile: {self.__path}>'
+
+
+class MenuTree(object):
+    """Cached XDG applications menu tree
+
+    The menu file is compiled and evaluated against the desktop entries
+    only when the menu, merge, '.directory' or desktop files change. The
+    result is cached in $XDG_CACHE_HOME/tuxmenu as a tree of dicts, like:
+    {'name': 'Office', 'text': 'Office', 'icon': 'applications-office',
+    'no-display': False, 'entries': ['libreoffice-writer.desktop'],
+    'menus': [...]}.
+    """
+    def __init__(
+            self, desktop_file_index: attachments.DesktopFileIndex = None,
+            menu_path: str = None, name: str = 'menu-tree') -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param desktop_file_index: Shared DesktopFileIndex object
+        :param menu_path: Menu file path, see 'MenuFile.find_path'
+        :param name: Name of the cache file
+        """
+        self.__desktop_file_index = (
+            desktop_file_index if desktop_file_index else
+            attachments.DesktopFileIndex())
+        self.__menu_path = menu_path if menu_path else MenuFile.find_path()
+        self.__name = name
+        self.__cache_path = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.environ['HOME'], '.cache'),
+            'tuxmenu', name + '.json')
+        self.__is_cached = False
+        self.__root = self.__load() if self.__menu_path else None
+
+    @property
+    def root(self) -> dict | None:
+        """Root menu
+
+        None if there is no menu file.
+        """
+        return self.__root
+
+    @property
+    def is_cached(self) -> bool:
+        """Whether the tree was read from the cache"""
+        return self.__is_cached
+
+    def __load(self) -> dict | None:
+        # Cached tree or a new one
+        cached = self.__read_cache()
+        if cached and all(
+                path_signature(x[0]) == x for x in cached['signature']):
+            self.__is_cached = True
+            return cached['tree']
+
+        menu_file = MenuFile(path=self.__menu_path)
+        if not menu_file.root:
+            return None
+
+        signature = []
+        tree = self.__evaluate(menu_file.root, signature)
+        signature = menu_file.signature + signature + [
+            path_signature(x) for x in
+            attachments.DesktopFileLocations().file_dirs]
+        self.__write_cache(signature, tree)
+        return tree
+
+    def __evaluate(self, root: Menu, signature: list) -> dict:
+        # Apply the rules of each menu to the desktop entries
+        entries = []
+        for desktop_file in self.__desktop_file_index.desktop_files:
+            desktop_entry = desktop_file.content.get('[Desktop Entry]', {})
+            entries.append((
+                desktop_file.desktop_file_id,
+                frozenset(desktop_entry.get('Categories', '').split(';'))))
+
+        # <OnlyUnallocated> menus get the entries left by the others
+        allocated = set()
+        pending = []
+        tree = self.__evaluate_menu(
+            root, [], entries, allocated, pending, signature)
+        for node, rules in pending:
+            node['entries'] = self.__matching_entries(
+                rules, [x for x in entries if x[0] not in allocated])
+        return tree
+
+    def __evaluate_menu(
+            self, menu: Menu, directory_dirs: list, entries: list,
+            allocated: set, pending: list, signature: list) -> dict:
+        # Node of a menu and its submenus
+        directory_dirs = directory_dirs + menu.directory_dirs
+        directory_entry = self.__directory_entry(
+            menu.directories, directory_dirs, signature)
+
+        node = {
+            'name': menu.name,
+            'text': directory_entry.get('Name') or menu.name,
+            'icon': directory_entry.get('Icon'),
+            'no-display': directory_entry.get('NoDisplay') == 'true',
+            'entries': [],
+            'menus': []}
+
+        if menu.only_unallocated:
+            pending.append((node, menu.rules))
+        else:
+            node['entries'] = self.__matching_entries(menu.rules, entries)
+            allocated.update(node['entries'])
+
+        for submenu in menu.menus:
+            if not submenu.deleted:
+                node['menus'].append(self.__evaluate_menu(
+                    submenu, directory_dirs, entries, allocated, pending,
+                    signature))
+        return node
+
+    @staticmethod
+    def __matching_entries(rules: list, entries: list) -> list:
+        # IDs of the entries included and not excluded afterwards
+        desktop_file_ids = []
+        for desktop_file_id, categories in entries:
+            included = False
+            for include, rule in rules:
+                if included != include and rule(desktop_file_id, categories):
+                    included = include
+            if included:
+                desktop_file_ids.append(desktop_file_id)
+        return desktop_file_ids
+
+    @staticmethod
+    def __directory_entry(
+            directories: list, directory_dirs: list, signature: list) -> dict:
+        # [Desktop Entry] of the last '.directory' file found
+        for directory in reversed(directories):
+            for directory_dir in reversed(directory_dirs):
+                path = os.path.join(directory_dir, directory)
+                signature.append(path_signature(path))
+                if os.path.isfile(path):
+                    content = attachments.DesktopFile(url=path).content
+                    return content.get('[Desktop Entry]', {})
+        return {}
+
+    def __read_cache(self) -> dict | None:
+        # Cached tree of the same menu file
+        if not os.path.isfile(self.__cache_path):
+            return None
+
+        try:
+            with open(self.__cache_path, 'r') as f:
+                json_data = json.load(f)
+            if json_data['menu-path'] != self.__menu_path:
+                return None
+            json_data['signature'] = [list(x) for x in json_data['signature']]
+            json_data['tree']['menus']
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logging.error(err)
+            return None
+
+        return json_data
+
+    def __write_cache(self, signature: list, tree: dict) -> None:
+        # Save the tree with the signatures of its sources
+        try:
+            cache_dir_path = os.path.dirname(self.__cache_path)
+            if not os.path.isdir(cache_dir_path):
+                os.makedirs(cache_dir_path)
+            attachments.write_json_atomically(
+                path=self.__cache_path,
+                data={
+                    'menu-path': self.__menu_path,
+                    'signature': signature,
+                    'tree': tree})
+        except OSError as err:
+            logging.error(err)
+
+    def __str__(self) -> str:
+        return f'<MenuTree: {self.__name}>'
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# Reference:
+#   man7.org/linux/man-pages/man2/posix_fadvise.2.html
+#   man7.org/linux/man-pages/man1/ionice.1.html
+import importlib.util
+import json
+import logging
+import os
+import stat
+import sys
+import time
+
+import appindex
+import attachments
+import menuspec
+
+
+class PrewarmFiles(object):
+    """Files used by the last run of the menu
+
+    Python modules, their bytecode, shared libraries, Qt plugins and icons
+    that the menu loaded. Saved when the menu is closed, in
+    $XDG_CACHE_HOME/tuxmenu, and loaded into the page cache by
+    'tuxmenu --prewarm' after the next login.
+    """
+    def __init__(self, name: str = 'prewarm-files') -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param name: Name of the JSON file
+        """
+        self.__name = name
+        self.__path = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.environ['HOME'], '.cache'),
+            'tuxmenu', name + '.json')
+
+    @property
+    def paths(self) -> list:
+        """Saved file paths
+
+        Empty if the menu has not been closed yet.
+        """
+        if not os.path.isfile(self.__path):
+            return []
+
+        try:
+            with open(self.__path, 'r') as f:
+                return [x for x in json.load(f) if isinstance(x, str)]
+        except (OSError, ValueError, TypeError) as err:
+            logging.error(err)
+            return []
+
+    def save(self, paths: list) -> None:
+        """Save the file paths
+
+        :param paths: File paths
+        """
+        try:
+            cache_dir_path = os.path.dirname(self.__path)
+            if not os.path.isdir(cache_dir_path):
+                os.makedirs(cache_dir_path)
+            attachments.write_json_atomically(
+                path=self.__path, data=sorted(set(paths)))
+        except OSError as err:
+            logging.error(err)
+
+    def __str__(self) -> str:
+        return f'<PrewarmFiles: {self.__name}>'
+
+
+def loaded_files() -> list:
+    """Files loaded by this process
+
+    Source and bytecode of the imported modules, and the files mapped in
+    memory, like the Qt libraries and plugins.
+    """
+    paths = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if not path:
+            continue
+        paths.add(path)
+        if path.endswith('.py'):
+            try:
+                paths.add(importlib.util.cache_from_source(path))
+            except (NotImplementedError, ValueError):
+                pass
+
+    try:
+        with open('/proc/self/maps', 'r') as f:
+            for line in f:
+                fields = line.split(maxsplit=5)
+                if (len(fields) == 6 and fields[5].startswith('/') and
+                        not fields[5].rstrip().endswith('(deleted)')):
+                    paths.add(fields[5].rstrip())
+    except OSError as err:
+        logging.info(err)
+
+    return sorted(paths)
+
+
+def menu_files() -> list:
+    """Files read by every start of the menu
+
+    Desktop files, the prebuilt index, the menu file, static assets and
+    the config and cache files of the menu.
+    """
+    paths = list(attachments.DesktopFileLocations().ulrs_by_priority)
+    paths.append(appindex.default_index_path())
+
+    menu_path = menuspec.MenuFile.find_path()
+    if menu_path:
+        paths.append(menu_path)
+
+    static_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'static')
+    for menu_dir in (
+            static_dir,
+            os.path.join(os.environ['HOME'], '.config', 'tuxmenu'),
+            os.path.join(
+                os.environ.get('XDG_CACHE_HOME') or
+                os.path.join(os.environ['HOME'], '.cache'), 'tuxmenu')):
+        if os.path.isdir(menu_dir):
+            paths += [os.path.join(menu_dir, x) for x in os.listdir(menu_dir)]
+
+    return paths
+
+
+def set_idle_priority() -> None:
+    """Lowest CPU and idle I/O priority
+
+    The I/O class is set with 'ionice', if it is installed.
+    """
+    import shutil  # Only for prewarm
+    import subprocess
+
+    os.setpriority(os.PRIO_PROCESS, 0, 19)
+    ionice = shutil.which('ionice')
+    if ionice:
+        subprocess.run(
+            [ionice, '-c', '3', '-p', str(os.getpid())],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def prewarm(paths: list) -> dict:
+    """Load files into the page cache
+
+    Asks the kernel to read the files ahead (POSIX_FADV_WILLNEED) without
+    waiting for them. Where it is not available, the files are read.
+
+    :param paths: File paths. Missing files and dirs are ignored
+    :return: Number of files, bytes and seconds, like:
+        {'files': 10, 'bytes': 1024, 'seconds': 0.01}
+    """
+    start_time = time.perf_counter()
+    files = 0
+    total_bytes = 0
+    for path in dict.fromkeys(paths):
+        try:
+            file_descriptor = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+
+        try:
+            file_stat = os.fstat(file_descriptor)
+            if not stat.S_ISREG(file_stat.st_mode):
+                continue
+
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(
+                    file_descriptor, 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                while os.read(file_descriptor, 1024 * 1024):
+                    pass
+            files += 1
+            total_bytes += file_stat.st_size
+        except OSError as err:
+            logging.info(f'{path}: {err}')
+        finally:
+            os.close(file_descriptor)
+
+    return {
+        'files': files, 'bytes': total_bytes,
+        'seconds': round(time.perf_counter() - start_time, 4)}
+
+
+def main() -> None:
+    """tuxmenu --prewarm
+
+    Loads the files of the last run and of the current desktop files, and
+    prints the report as JSON.
+    """
+    set_idle_priority()
+    report = prewarm(PrewarmFiles().paths + menu_files())
+    print(json.dumps(report))
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# Extra search result sources, shown after the apps of the search box.
+#
+# Each provider runs in its own thread with a time budget per query, so a
+# slow or hung provider never delays the keystrokes or the app results.
+# Providers do not use Qt; 'SearchProviderRunner' calls back from the
+# provider threads and the window forwards the results with a signal.
+# Reference:
+#   www.freedesktop.org/wiki/Specifications/desktop-bookmark-spec/
+import abc
+import logging
+import math
+import operator
+import os
+import threading
+import time
+
+import attachments
+
+
+class SearchResult(object):
+    """Result of a search provider"""
+    def __init__(
+            self, title: str, description: str = None, icon_name: str = None,
+            argv: tuple = None,
+            desktop_file: attachments.DesktopFile = None,
+            copy_text: str = None) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param title: Main text
+        :param description: Secondary text
+        :param icon_name: Icon name of the theme
+        :param argv: Command run on activation
+        :param desktop_file: DesktopFile launched on activation
+        :param copy_text: Text copied to the clipboard on activation
+        """
+        self.__title = title
+        self.__description = description
+        self.__icon_name = icon_name
+        self.__argv = argv
+        self.__desktop_file = desktop_file
+        self.__copy_text = copy_text
+
+    @property
+    def title(self) -> str:
+        """Main text"""
+        return self.__title
+
+    @property
+    def description(self) -> str | None:
+        """Secondary text"""
+        return self.__description
+
+    @property
+    def icon_name(self) -> str | None:
+        """Icon name of the theme"""
+        return self.__icon_name
+
+    @property
+    def copy_text(self) -> str | None:
+        """Text to copy to the clipboard
+
+        Copying needs the window, so it is done by whoever shows the
+        result, not by 'launch'.
+        """
+        return self.__copy_text
+
+    def launch(self) -> None:
+        """Run the command or launch the desktop file of the result"""
+        if self.__desktop_file:
+            self.__desktop_file.launch()
+            return
+
+        if not self.__argv:
+            return
+
+        import subprocess  # Not needed to show the menu
+
+        try:
+            subprocess.Popen(self.__argv, start_new_session=True)
+        except (OSError, ValueError) as err:
+            logging.error(err)
+
+    def __str__(self) -> str:
+        return f'<SearchResult: {self.__title}>'
+
+
+class SearchQuery(object):
+    """Query passed to the providers
+
+    Providers must stop when 'is_cancelled' is True: the text has changed
+    or the time budget of the provider is over.
+    """
+    def __init__(
+            self, text: str, generation: int, deadline: float,
+            current_generation) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param text: Text of the search box, as typed
+        :param generation: Number of the query, increased on each keystroke
+        :param deadline: 'time.monotonic' time when the budget is over
+        :param current_generation: Callable that returns the generation of
+            the latest query
+        """
+        self.__text = text
+        self.__generation = generation
+        self.__deadline = deadline
+        self.__current_generation = current_generation
+
+    @property
+    def text(self) -> str:
+        """Text of the search box, as typed
+
+        Providers that match names lowercase it, commands keep the case.
+        """
+        return self.__text
+
+    @property
+    def generation(self) -> int:
+        """Number of the query"""
+        return self.__generation
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Whether the results are no longer wanted"""
+        return (
+            self.__generation != self.__current_generation() or
+            time.monotonic() > self.__deadline)
+
+    def __str__(self) -> str:
+        return f'<SearchQuery: {self.__generation} {self.__text}>'
+
+
+class SearchProvider(abc.ABC):
+    """Search provider interface
+
+    Subclasses set 'name' and implement 'search'.
+    """
+    name = 'provider'
+    budget = 0.2  # Seconds per query
+    max_results = 3
+
+    @abc.abstractmethod
+    def search(self, query: SearchQuery):
+        """Search results
+
+        Generator that yields 'SearchResult' objects as they are found.
+        Runs in the thread of the provider, never in the GUI thread. Long
+        searches should check 'query.is_cancelled'.
+
+        :param query: SearchQuery object
+        """
+
+    def __str__(self) -> str:
+        return f'<SearchProvider: {self.name}>'
+
+
+class CalculatorProvider(SearchProvider):
+    """Arithmetic expressions, like: 2 * (3 + 4)"""
+    name = 'calculator'
+    # Names of the 'ast' operator nodes ('ast' is imported on first use)
+    __operators = {
+        'Add': operator.add, 'Sub': operator.sub, 'Mult': operator.mul,
+        'Div': operator.truediv, 'FloorDiv': operator.floordiv,
+        'Mod': operator.mod, 'Pow': operator.pow, 'USub': operator.neg,
+        'UAdd': operator.pos}
+    __characters = set('0123456789.+-*/%()^ ')
+
+    def search(self, query: SearchQuery):
+        """Result of the expression
+
+        :param query: SearchQuery object
+        """
+        text = query.text.strip()
+        if (not text or not set(text) <= self.__characters or
+                not any(x in text for x in '+-*/%^') or
+                not any(x.isdigit() for x in text)):
+            return
+
+        import ast
+
+        try:
+            value = self.__evaluate(
+                ast.parse(text.replace('^', '**'), mode='eval').body)
+        except (SyntaxError, ValueError, TypeError, ArithmeticError):
+            return
+
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        yield SearchResult(
+            title=f'= {value}', description='Copy the result',
+            icon_name='accessories-calculator', copy_text=str(value))
+
+    def __evaluate(self, node) -> int | float:
+        # Value of an 'ast' node with numbers and operators only
+        node_type = type(node).__name__
+        if node_type == 'Constant' and type(node.value) in (int, float):
+            return node.value
+
+        operator_name = type(getattr(node, 'op', None)).__name__
+        if node_type == 'UnaryOp' and operator_name in self.__operators:
+            return self.__operators[operator_name](
+                self.__evaluate(node.operand))
+
+        if node_type == 'BinOp' and operator_name in self.__operators:
+            left = self.__evaluate(node.left)
+            right = self.__evaluate(node.right)
+            # Big powers hold the interpreter lock, which would also stop
+            # the GUI thread
+            if (operator_name == 'Pow' and abs(left) > 1 and
+                    abs(right) * math.log2(abs(left)) > 4096):
+                raise ValueError('result too large')
+            return self.__operators[operator_name](left, right)
+
+        raise ValueError('not an arithmetic expression')
+
+
+class SettingsProvider(SearchProvider):
+    """Settings panels of the desktop
+
+    GNOME and KDE panels have hidden desktop files, so they are not in the
+    menu and are not found by the app search.
+    """
+    name = 'settings'
+
+    def __init__(
+            self,
+            desktop_file_index: attachments.DesktopFileIndex = None) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param desktop_file_index: Shared DesktopFileIndex object
+        """
+        self.__desktop_file_index = (
+            desktop_file_index if desktop_file_index else
+            attachments.DesktopFileIndex())
+        self.__panels = None  # Found on the first query
+
+    def search(self, query: SearchQuery):
+        """Panels with the text in the name or keywords
+
+        :param query: SearchQuery object
+        """
+        if self.__panels is None:
+            self.__panels = self.__find_panels()
+
+        query_text = query.text.lower()
+        for desktop_file, name, text in self.__panels:
+            if query.is_cancelled:
+                return
+            if query_text in text:
+                desktop_entry = desktop_file.content['[Desktop Entry]']
+                yield SearchResult(
+                    title=name, description=desktop_entry.get('Comment'),
+                    icon_name=desktop_entry.get('Icon'),
+                    desktop_file=desktop_file)
+
+    def __find_panels(self) -> list:
+        # DesktopFile, name and searched text of each panel
+        panels = []
+        for desktop_file in self.__desktop_file_index.desktop_files:
+            desktop_entry = desktop_file.content.get('[Desktop Entry]')
+            if not desktop_entry or not (
+                    'X-GNOME-Settings-Panel' in desktop_entry or
+                    any(x.startswith('X-KDE-System-Settings')
+                        for x in desktop_entry)):
+                continue
+            name = desktop_entry.get('Name', desktop_file.desktop_file_id)
+            text = ' '.join((
+                name, desktop_entry.get('Keywords', ''),
+                desktop_entry.get('Comment', ''))).lower()
+            panels.append((desktop_file, name, text))
+        return panels
+
+
+class RecentFilesProvider(SearchProvider):
+    """Recently used files of the desktop (recently-used.xbel)"""
+    name = 'recent-files'
+
+    def __init__(self) -> None:
+        """Class constructor
+
+        Initialize class properties.
+        """
+        self.__path = os.path.join(
+            os.environ.get('XDG_DATA_HOME') or
+            os.path.join(os.environ['HOME'], '.local', 'share'),
+            'recently-used.xbel')
+        self.__mtime = None
+        self.__files = []  # Paths, most recent first
+
+    def search(self, query: SearchQuery):
+        """Files with the text in the name
+
+        :param query: SearchQuery object
+        """
+        query_text = query.text.lower()
+        if len(query_text) < 2:
+            return
+
+        self.__load()
+        for path in self.__files:
+            if query.is_cancelled:
+                return
+            name = os.path.basename(path)
+            if query_text in name.lower() and os.path.exists(path):
+                yield SearchResult(
+                    title=name, description=os.path.dirname(path),
+                    icon_name='document-open-recent',
+                    argv=('xdg-open', path))
+
+    def __load(self) -> None:
+        # Parse the file again only if it has changed
+        try:
+            mtime = os.stat(self.__path).st_mtime_ns
+        except OSError:
+            self.__files = []
+            return
+
+        if mtime == self.__mtime:
+            return
+
+        import urllib.parse  # Only for this provider
+        import xml.etree.ElementTree as ElementTree
+
+        bookmarks = []
+        try:
+            for _, element in ElementTree.iterparse(self.__path):
+                if element.tag == 'bookmark':
+                    href = element.get('href', '')
+                    if href.startswith('file://'):
+                        bookmarks.append((
+                            element.get('modified', ''),
+                            urllib.parse.unquote(href[len('file://'):])))
+                    element.clear()
+        except (OSError, ElementTree.ParseError) as err:
+            logging.info(f'{self.__path}: {err}')
+
+        self.__files = [x for _, x in sorted(bookmarks, reverse=True)]
+        self.__mtime = mtime
+
+
+class CommandProvider(SearchProvider):
+    """Commands of $PATH, like: gedit Notes.txt"""
+    name = 'command'
+    max_results = 1
+
+    def search(self, query: SearchQuery):
+        """The text as a command, if the program exists
+
+        :param query: SearchQuery object
+        """
+        import shlex  # Only for this provider
+        import shutil
+
+        try:
+            argv = shlex.split(query.text)
+        except ValueError:
+            return
+
+        if argv and shutil.which(argv[0]):
+            yield SearchResult(
+                title=f'Run: {query.text}', description=shutil.which(argv[0]),
+                icon_name='utilities-terminal', argv=tuple(argv))
+
+
+class SearchProviderRunner(object):
+    """Runs the search providers
+
+    Each provider has its own thread and only the latest query is run: if
+    a provider is still busy with an old query, the queries typed meanwhile
+    are skipped. Results are passed to the callback as they are found,
+    from the provider thread, with the generation of their query. Results
+    of a query that has been replaced or whose budget is over are dropped.
+    """
+    def __init__(self, providers: list, callback) -> None:
+        """Class constructor
+
+        Initialize class properties.
+
+        :param providers: SearchProvider objects
+        :param callback: Called with the generation, the provider name and
+            the list of results found so far, from the provider threads
+        """
+        self.__providers = providers
+        self.__callback = callback
+        self.__generation = 0
+        self.__condition = threading.Condition()
+        self.__query_texts = {}  # Provider name -> (generation, text)
+        self.__latencies = {x.name: None for x in providers}
+        self.__timeouts = {x.name: 0 for x in providers}
+        self.__threads = []
+
+    @property
+    def generation(self) -> int:
+        """Generation of the latest query"""
+        return self.__generation
+
+    @property
+    def latencies(self) -> dict:
+        """Seconds of the last query of each provider
+
+        None if the provider has not finished a query yet.
+        """
+        return dict(self.__latencies)
+
+    @property
+    def timeouts(self) -> dict:
+        """Number of queries that each provider did not finish in time"""
+        return dict(self.__timeouts)
+
+    def search(self, text: str) -> int:
+        """Start a query
+
+        Returns immediately. The previous query is cancelled.
+
+        :param text: Text of the search box. Empty to only cancel
+        :return: Generation of the query
+        """
+        with self.__condition:
+            self.__generation += 1
+            if text:
+                for provider in self.__providers:
+                    self.__query_texts[provider.name] = (
+                        self.__generation, text)
+                self.__condition.notify_all()
+
+        if text and not self.__threads:
+            for provider in self.__providers:
+                thread = threading.Thread(
+                    target=self.__run_provider, args=[provider], daemon=True)
+                self.__threads.append(thread)
+                thread.start()
+
+        return self.__generation
+
+    def __run_provider(self, provider: SearchProvider) -> None:
+        # Provider thread: runs the latest query, when there is one
+        while True:
+            with self.__condition:
+                while provider.name not in self.__query_texts:
+                    self.__condition.wait()
+                generation, text = self.__query_texts.pop(provider.name)
+                if generation != self.__generation:
+                    continue
+
+            start_time = time.monotonic()
+            query = SearchQuery(
+                text=text, generation=generation,
+                deadline=start_time + provider.budget,
+                current_generation=lambda: self.__generation)
+            results = []
+            try:
+                for result in provider.search(query):
+                    if query.is_cancelled:
+                        break
+                    results.append(result)
+                    self.__callback(generation, provider.name, list(results))
+                    if len(results) >= provider.max_results:
+                        break
+            except Exception as err:
+                logging.error(f'Search provider {provider.name}: {err}')
+
+            seconds = time.monotonic() - start_time
+            self.__latencies[provider.name] = seconds
+            if seconds > provider.budget:
+                self.__timeouts[provider.name] += 1
+                logging.info(
+                    f'Search provider {provider.name}: '
+                    f'{seconds * 1000:.1f} ms, over the budget')
+
+    def __str__(self) -> str:
+        return f'<SearchProviderRunner: {len(self.__providers)}>'
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Command line access to the apps of the menu, for scripts and dmenu-style
+# launchers. Only 'attachments' and 'menuspec' are used, so Qt is never
+# imported. The system desktop files are read from the prebuilt index
+# (see 'appindex') when it is current.
+import json
+import locale
+import logging
+import sys
+
+import attachments
+import menuspec
+
+
+def desktop_file_record(
+        desktop_file: attachments.DesktopFile, local: str = None) -> dict:
+    """Desktop file as a JSON object
+
+    Name, generic name and comment in the language of the locale, if they
+    are translated.
+
+    :param desktop_file: DesktopFile object
+    :param local: Language code like: "pt_BR", default is the locale
+    """
+    local = local if local else locale.getdefaultlocale()[0]
+    desktop_entry = desktop_file.content['[Desktop Entry]']
+
+    def localized(key: str) -> str | None:
+        # Translated value or the default one
+        return desktop_entry.get(f'{key}[{local}]') or desktop_entry.get(key)
+
+    return {
+        'id': desktop_file.desktop_file_id,
+        'name': localized('Name'),
+        'generic_name': localized('GenericName'),
+        'comment': localized('Comment'),
+        'exec': desktop_entry.get('Exec'),
+        'icon': desktop_entry.get('Icon'),
+        'categories': [
+            x for x in desktop_entry.get('Categories', '').split(';') if x],
+        'origin': desktop_file.origin,
+        'path': desktop_file.url}
+
+
+def menu_schema(
+        desktop_file_index: attachments.DesktopFileIndex
+        ) -> attachments.MenuSchema:
+    """Menu schema of the GUI
+
+    The categories of the XDG menu file, if there is one.
+
+    :param desktop_file_index: DesktopFileIndex object
+    """
+    return attachments.MenuSchema(
+        desktop_file_index=desktop_file_index,
+        menu_tree=menuspec.MenuTree(desktop_file_index=desktop_file_index))
+
+
+def query(text: str) -> list:
+    """Search the apps
+
+    Same search as the search box of the menu, most used apps first.
+
+    :param text: Text to search
+    :return: DesktopFile objects list
+    """
+    desktop_files = menu_schema(attachments.DesktopFileIndex()).search(
+        text=text.lower())
+    usage_store = attachments.UsageStore()
+    desktop_files.sort(
+        key=lambda x: usage_store.score(x.desktop_file_id), reverse=True)
+    return desktop_files
+
+
+def list_category(category: str) -> list | None:
+    """Apps of a category
+
+    :param category: Category name like: "Development", or the name of a
+        menu of the XDG menu file
+    :return: DesktopFile objects list, or None if there is no such category
+    """
+    schema = menu_schema(attachments.DesktopFileIndex())
+    for key, text in schema.texts_schema.items():
+        if category in (key, text):
+            return list(schema.schema[key])
+    return None
+
+
+def list_categories() -> list:
+    """Category names of the menu
+
+    The categories with apps, like the buttons of the menu, without 'Home'
+    and 'All'.
+    """
+    schema = menu_schema(attachments.DesktopFileIndex())
+    return [
+        text for key, text in schema.texts_schema.items()
+        if key not in ('Home', 'All') and schema.schema[key]]
+
+
+def launch(desktop_file_id: str) -> bool:
+    """Launch an app
+
+    The launch is recorded in the usage history, like the menu does.
+
+    :param desktop_file_id: Desktop file ID like: "firefox.desktop"
+    :return: False if the desktop file was not found
+    """
+    desktop_file = attachments.DesktopFileIndex().get(desktop_file_id)
+    if not desktop_file or '[Desktop Entry]' not in desktop_file.content:
+        return False
+
+    desktop_file.launch()
+    usage_store = attachments.UsageStore()
+    usage_store.record(desktop_file_id)
+    usage_store.flush()
+    return True
+
+
+def print_desktop_files(desktop_files: list, as_json: bool) -> None:
+    """Print one app per line
+
+    :param desktop_files: DesktopFile objects list
+    :param as_json: JSON lines (see 'desktop_file_record') instead of the
+        desktop file ID and the name separated by a tab
+    """
+    local = locale.getdefaultlocale()[0]
+    lines = []
+    for desktop_file in desktop_files:
+        record = desktop_file_record(desktop_file, local)
+        if as_json:
+            lines.append(json.dumps(record, ensure_ascii=False))
+        else:
+            lines.append(f'{record["id"]}\t{record["name"]}')
+
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+
+def main(
+        text: str = None, category: str = None, desktop_file_id: str = None,
+        as_json: bool = False) -> int:
+    """tuxmenu --query, --list-category and --launch
+
+    :param text: Text to search
+    :param category: Category to list. Empty to list the categories
+    :param desktop_file_id: Desktop file ID of the app to launch
+    :param as_json: Print JSON lines
+    :return: Exit status
+    """
+    logging.basicConfig(level=logging.WARNING)
+
+    if desktop_file_id is not None:
+        if not launch(desktop_file_id):
+            print(f'{desktop_file_id}: app not found', file=sys.stderr)
+            return 1
+        return 0
+
+    if text is not None:
+        print_desktop_files(query(text), as_json)
+        return 0
+
+    if not category:
+        for name in list_categories():
+            print(json.dumps({'category': name}) if as_json else name)
+        return 0
+
+    desktop_files = list_category(category)
+    if desktop_files is None:
+        print(f'{category}: category not found', file=sys.stderr)
+        return 1
+    print_desktop_files(desktop_files, as_json)
+    return 0
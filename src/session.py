@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# Reference:
+#   www.freedesktop.org/software/systemd/man/latest/org.freedesktop.login1.html
+import logging
+
+from PySide6 import QtCore, QtDBus
+from __feature__ import snake_case
+
+
+class SessionActions(QtCore.QObject):
+    """Session actions executor
+
+    Runs the actions of the energy buttons (lock, suspend, reboot...)
+    without blocking the GUI thread. The logind and session manager methods
+    are called directly over D-Bus, and the schema command is used as a
+    fallback. Every D-Bus call and command has a timeout.
+    """
+    __finished_signal = QtCore.Signal(object, object)
+    __availability_signal = QtCore.Signal(object, object)
+
+    def __init__(
+            self, schema: dict, timeout: int = 5000,
+            bus_addresses: dict = None, *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param schema: EnergyButtonsSchema 'schema' dict
+        :param timeout: Milliseconds to wait for each call or command
+        :param bus_addresses:
+            Addresses to use instead of the default buses, like:
+            {'system': 'unix:path=/tmp/bus'}. Used to run against a
+            local dbus-daemon
+        """
+        super().__init__(*args, **kwargs)
+        self.__schema = schema
+        self.__timeout = timeout
+        self.__bus_addresses = bus_addresses if bus_addresses else {}
+        self.__connections = {}
+        self.__availability = {}
+
+    def finished_signal(self) -> QtCore.Signal:
+        """Action finished signal
+
+        Emitted with the action ID and an error message, or None if the
+        action was successful.
+        """
+        return self.__finished_signal
+
+    def availability_signal(self) -> QtCore.Signal:
+        """Action availability signal
+
+        Emitted by 'probe' with the action ID and a boolean that informs
+        whether the action can be used.
+        """
+        return self.__availability_signal
+
+    def is_available(self, action_id: str) -> bool:
+        """Whether the action can be used
+
+        Actions not yet probed are considered available.
+
+        :param action_id: Key of the schema, like: 'suspend'
+        """
+        return self.__availability.get(action_id, True)
+
+    def probe(self) -> None:
+        """Check available actions
+
+        Calls the 'can' methods of the schema (CanSuspend, CanReboot...)
+        in the background. Results are emitted by 'availability_signal'.
+        """
+        for action_id, values in self.__schema.items():
+            if not values.get('can'):
+                continue
+
+            self.__call_dbus(
+                call=values['can'],
+                on_reply=lambda message, action_id=action_id: (
+                    self.__on_probe_reply(action_id, message)),
+                on_error=lambda error: logging.info(error))
+
+    def run(self, action_id: str) -> None:
+        """Run an action
+
+        Returns immediately. The result is emitted by 'finished_signal'.
+
+        :param action_id: Key of the schema, like: 'suspend'
+        """
+        values = self.__schema[action_id]
+        self.__run_dbus(action_id, list(values.get('dbus') or []))
+
+    def __on_probe_reply(
+            self, action_id: str, message: QtDBus.QDBusMessage) -> None:
+        # 'yes', 'no', 'challenge' or 'na'
+        arguments = message.arguments()
+        available = bool(arguments) and arguments[0] in ('yes', 'challenge')
+        self.__availability[action_id] = available
+        self.__availability_signal.emit(action_id, available)
+
+    def __run_dbus(self, action_id: str, calls: list) -> None:
+        # Try the D-Bus calls in order, then the command
+        if not calls:
+            self.__run_command(action_id)
+            return
+
+        self.__call_dbus(
+            call=calls[0],
+            on_reply=lambda _: self.__finished_signal.emit(action_id, None),
+            on_error=lambda error: self.__on_run_dbus_error(
+                action_id, calls[1:], error))
+
+    def __on_run_dbus_error(
+            self, action_id: str, calls: list, error: str) -> None:
+        # Service not available, try the next call
+        logging.info(error)
+        self.__run_dbus(action_id, calls)
+
+    def __run_command(self, action_id: str) -> None:
+        # Fallback command with timeout
+        command = self.__schema[action_id].get('command')
+        if not command:
+            self.__finished_signal.emit(action_id, 'No command to run')
+            return
+
+        process = QtCore.QProcess(self)
+        timer = QtCore.QTimer(process)
+        timer.set_single_shot(True)
+        timer.timeout.connect(process.kill)
+
+        process.finished.connect(
+            lambda exit_code, _exit_status: self.__on_command_finished(
+                action_id, process,
+                None if exit_code == 0 else f'Exit code {exit_code}'))
+        process.errorOccurred.connect(
+            lambda error: self.__on_command_finished(
+                action_id, process, process.error_string())
+            if error == QtCore.QProcess.FailedToStart else None)
+
+        process.start(command[0], command[1:])
+        timer.start(self.__timeout)
+
+    def __on_command_finished(
+            self, action_id: str, process: QtCore.QProcess,
+            error: str | None) -> None:
+        # Command has finished, been killed or failed to start
+        if error:
+            logging.error(f'{action_id}: {error}')
+        process.delete_later()
+        self.__finished_signal.emit(action_id, error)
+
+    def __connection(self, bus: str) -> QtDBus.QDBusConnection:
+        # System or session bus
+        if bus not in self.__connections:
+            if bus in self.__bus_addresses:
+                connection = QtDBus.QDBusConnection.connect_to_bus(
+                    self.__bus_addresses[bus], f'tuxmenu-{bus}')
+            elif bus == 'system':
+                connection = QtDBus.QDBusConnection.system_bus()
+            else:
+                connection = QtDBus.QDBusConnection.session_bus()
+            self.__connections[bus] = connection
+
+        return self.__connections[bus]
+
+    def __call_dbus(self, call: tuple, on_reply, on_error) -> None:
+        # Asynchronous method call with timeout
+        bus, service, path, interface, method, arguments = call
+        connection = self.__connection(bus)
+        if not connection.is_connected():
+            on_error(connection.last_error().message())
+            return
+
+        message = QtDBus.QDBusMessage.create_method_call(
+            service, path, interface, method)
+        if arguments:
+            message.set_arguments(list(arguments))
+
+        watcher = QtDBus.QDBusPendingCallWatcher(
+            connection.async_call(message, self.__timeout), self)
+        watcher.finished.connect(
+            lambda _: self.__on_dbus_finished(watcher, on_reply, on_error))
+
+    @staticmethod
+    def __on_dbus_finished(
+            watcher: QtDBus.QDBusPendingCallWatcher,
+            on_reply, on_error) -> None:
+        # Reply or error of an asynchronous call
+        if watcher.is_error():
+            on_error(watcher.error().message())
+        else:
+            on_reply(watcher.reply())
+        watcher.delete_later()
+
+    def __str__(self) -> str:
+        return f'<SessionActions: {id(self)}>'
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+
+
+def main() -> None:
+    """tuxmenu command
+
+    Without options, starts the menu. The other modes do not need the
+    window and run without importing Qt.
+    """
+    parser = argparse.ArgumentParser(
+        prog='tuxmenu', description='Desktop menu for Linux')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        '--prewarm', action='store_true',
+        help='load the files of the menu into the page cache and exit, '
+             'used at login (XDG autostart)')
+    modes.add_argument(
+        '--query', metavar='TEXT',
+        help='print the apps that match the text, like the search box')
+    modes.add_argument(
+        '--list-category', metavar='CATEGORY', nargs='?', const='',
+        help='print the apps of a category, or the categories without '
+             'a value')
+    modes.add_argument(
+        '--launch', metavar='DESKTOP_FILE_ID',
+        help='launch an app, like: firefox.desktop')
+    parser.add_argument(
+        '--json', action='store_true',
+        help='print JSON lines instead of the ID and the name of the apps')
+    args, qt_args = parser.parse_known_args()
+
+    if args.prewarm:
+        import prewarm
+
+        prewarm.main()
+        return
+
+    if (args.query is not None or args.list_category is not None or
+            args.launch is not None):
+        import query
+
+        sys.exit(query.main(
+            text=args.query, category=args.list_category,
+            desktop_file_id=args.launch, as_json=args.json))
+
+    from main import Application
+
+    Application([sys.argv[0]] + qt_args).main()
+
+
+if __name__ == '__main__':
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    main()
@@ -1,18 +1,184 @@
 #!/usr/bin env python3
 import locale
 import logging
+import math
 import os.path
 import random
-import threading
 import time
-
-from xdg import IconTheme
+from typing import TYPE_CHECKING, Iterator
 
 from PySide6 import QtCore, QtGui, QtWidgets
 from __feature__ import snake_case
 
 from attachments import DesktopFile, MenuSchema
 
+if TYPE_CHECKING:
+    from providers import SearchResult  # Imported on the first search
+
+
+def find_icon_path(icon_name: str, size: int) -> str | None:
+    """Find an icon in the theme
+
+    The icon theme module is only imported on the first call, after the
+    application has started.
+
+    :param icon_name: Icon name like: "firefox"
+    :param size: Icon size in pixels
+    :return: Icon file path or None if the icon was not found
+    """
+    from xdg import IconTheme
+
+    return IconTheme.getIconPath(
+        iconname=icon_name,
+        size=size,
+        theme='breeze-dark',
+        extensions=['png', 'svg', 'xpm'])
+
+
+class IconView(QtWidgets.QLabel):
+    """Icon widget
+
+    A label that shows a theme icon with the resolution of the screen. The
+    icon is looked up for the size multiplied by the device pixel ratio,
+    read directly at that resolution (SVGs are rendered, not scaled) and
+    tagged with the ratio. Pixmaps are shared by all icon widgets and
+    cached per name, size and ratio, so moving the window to another
+    screen only reads the icons that were not used on that screen yet.
+    """
+    __pixmaps = {}
+    __pixmap_hits = 0
+    __pixmap_misses = 0
+    __image_paths = set()
+    __default_icon_path = os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), 'static/defaultapp.svg')
+
+    def __init__(
+            self, icon_name: str = None, size: int = 48,
+            *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param icon_name: Theme icon name or absolute path of an image
+        :param size: Icon size in device independent pixels
+        """
+        super().__init__(*args, **kwargs)
+        self.__icon_name = icon_name
+        self.__size = size
+        self.__device_pixel_ratio = None
+        self.__update_pixmap()
+
+    def icon_name(self) -> str | None:
+        """Icon name
+
+        Gets the name of the icon.
+        """
+        return self.__icon_name
+
+    def set_icon_name(self, icon_name: str) -> None:
+        """Icon name
+
+        Set the icon to show.
+
+        :param icon_name: Theme icon name or absolute path of an image
+        """
+        self.__icon_name = icon_name
+        self.__update_pixmap()
+
+    @classmethod
+    def icon_pixmap(
+            cls, icon_name: str, size: int,
+            device_pixel_ratio: float) -> QtGui.QPixmap:
+        """Icon pixmap for a device pixel ratio
+
+        Unknown icons and unreadable files give the default app icon.
+
+        :param icon_name: Theme icon name or absolute path of an image
+        :param size: Icon size in device independent pixels
+        :param device_pixel_ratio: Device pixel ratio of the screen
+        """
+        key = (icon_name, size, device_pixel_ratio)
+        if key in cls.__pixmaps:
+            cls.__pixmap_hits += 1
+        else:
+            cls.__pixmap_misses += 1
+            pixel_size = math.ceil(size * device_pixel_ratio)
+            image_path = find_icon_path(icon_name=icon_name, size=pixel_size)
+            image = cls.__read_image(image_path, pixel_size)
+            if image_path:
+                cls.__image_paths.add(image_path)
+            if image.is_null():
+                image = cls.__read_image(cls.__default_icon_path, pixel_size)
+
+            pixmap = QtGui.QPixmap.from_image(image)
+            pixmap.set_device_pixel_ratio(device_pixel_ratio)
+            cls.__pixmaps[key] = pixmap
+
+        return cls.__pixmaps[key]
+
+    @classmethod
+    def pixmap_cache_counters(cls) -> dict:
+        """Pixmap cache counters
+
+        Number of cached pixmaps, and lookups that were found in the cache
+        (hits) or had to read the image (misses).
+        """
+        return {
+            'pixmaps': len(cls.__pixmaps), 'hits': cls.__pixmap_hits,
+            'misses': cls.__pixmap_misses}
+
+    @classmethod
+    def image_paths(cls) -> list:
+        """Paths of the icon files read
+
+        Used to load them into the page cache on the next login.
+        """
+        return sorted(cls.__image_paths)
+
+    @staticmethod
+    def __read_image(path: str | None, pixel_size: int) -> QtGui.QImage:
+        # Image read at its final size, keeping the aspect ratio
+        if not path:
+            return QtGui.QImage()
+
+        reader = QtGui.QImageReader(path)
+        size = reader.size()
+        if size.is_valid():
+            reader.set_scaled_size(size.scaled(
+                pixel_size, pixel_size, QtCore.Qt.KeepAspectRatio))
+        else:
+            reader.set_scaled_size(QtCore.QSize(pixel_size, pixel_size))
+
+        image = reader.read()
+        if image.is_null():
+            logging.info(f'{path}: {reader.error_string()}')
+        return image
+
+    def __update_pixmap(self) -> None:
+        # Pixmap for the ratio of the current screen
+        self.__device_pixel_ratio = self.device_pixel_ratio_f()
+        if self.__icon_name:
+            self.set_pixmap(self.icon_pixmap(
+                self.__icon_name, self.__size, self.__device_pixel_ratio))
+        else:
+            self.clear()
+
+    def paint_event(self, event: QtGui.QPaintEvent) -> None:
+        """Drawing event
+
+        Updates the pixmap when the window has been moved to a screen with
+        another device pixel ratio. Checked here and not on change events
+        because these are much more frequent while the widget is created.
+
+        :param event: QEvent received by sent signal
+        """
+        if self.device_pixel_ratio_f() != self.__device_pixel_ratio:
+            self.__update_pixmap()
+        super().paint_event(event)
+
+    def __str__(self) -> str:
+        return f'<IconView: {self.__icon_name}>'
+
 
 class AppLauncherContextMenuButton(QtWidgets.QWidget):
     """Button widget
@@ -55,27 +221,11 @@ class AppLauncherContextMenuButton(QtWidgets.QWidget):
         self.__main_layout.add_layout(self.__text_layout)
 
         # Icon
-        self.__icon_view = QtWidgets.QLabel()
+        self.__icon_view = IconView(icon_name=self.__icon_name, size=22)
         self.__icon_view.set_contents_margins(5, 0, 0, 0)
         self.__icon_view.set_alignment(
             QtCore.Qt.AlignLeft | QtCore.Qt.AlignCenter)
         if self.__icon_name:
-            icon_path = IconTheme.getIconPath(
-                iconname=self.__icon_name,
-                size=22,
-                theme='breeze-dark',
-                extensions=['png', 'svg', 'xpm'])
-            try:
-                pixmap = QtGui.QPixmap(icon_path)
-            except Exception as err:
-                logging.error(err)
-                pixmap = QtGui.QPixmap(os.path.join(
-                    os.path.abspath(os.path.dirname(__file__)),
-                    'static/defaultapp.svg'))
-
-            pixmap = pixmap.scaled(
-                22, 22, QtCore.Qt.KeepAspectRatio)
-            self.__icon_view.set_pixmap(pixmap)
             self.__text_layout.add_widget(self.__icon_view)
 
         # Text
@@ -152,24 +302,26 @@ class AppLauncherContextMenuButton(QtWidgets.QWidget):
 
 
 class AppLauncherContextMenu(QtWidgets.QWidget):
-    """Application launcher context menu widget"""
+    """Application launcher context menu widget
+
+    A single menu is shared by all the launchers of a grid. It is moved to
+    the launcher that was right-clicked, see 'set_desktop_file'.
+    """
     __clicked_signal = QtCore.Signal(object)
     __enter_event_signal = QtCore.Signal(object)
 
     def __init__(
             self,
-            desktop_file: DesktopFile,
             pin_desktop_file_list: list,
             *args, **kwargs) -> None:
         """Class constructor
 
         Initialize class attributes.
 
-        :param desktop_file: DesktopFile object
-        :param pin_desktop_file_list: list of pinned DesktopFile objects
+        :param pin_desktop_file_list: registry of pinned DesktopFile objects
         """
         super().__init__(*args, **kwargs)
-        self.__desktop_file = desktop_file
+        self.__desktop_file = None
         self.__pin_desktop_file_list = pin_desktop_file_list
 
         self.set_style_sheet('background-color: rgba(100, 100, 100, 0.05);')
@@ -200,8 +352,6 @@ class AppLauncherContextMenu(QtWidgets.QWidget):
         body_layout.add_widget(back)
 
         # Action button
-        desktop_file_urls = [x.url for x in self.__pin_desktop_file_list]
-
         self.__pin_remove_button = AppLauncherContextMenuButton(
             text='Unpin', icon_name='window-unpin', button_id='unpin')
         self.__pin_remove_button.clicked_signal().connect(
@@ -209,8 +359,6 @@ class AppLauncherContextMenu(QtWidgets.QWidget):
         self.__pin_remove_button.enter_event_signal().connect(
             self.__on_button_enter_event)
         body_layout.add_widget(self.__pin_remove_button)
-        if self.__desktop_file.url not in desktop_file_urls:
-            self.__pin_remove_button.set_visible(False)
 
         self.__pin_button = AppLauncherContextMenuButton(
             text='Pin', icon_name='window-pin', button_id='pin')
@@ -218,8 +366,6 @@ class AppLauncherContextMenu(QtWidgets.QWidget):
         self.__pin_button.enter_event_signal().connect(
             self.__on_button_enter_event)
         body_layout.add_widget(self.__pin_button)
-        if self.__desktop_file.url in desktop_file_urls:
-            self.__pin_button.set_visible(False)
 
         shortcut = AppLauncherContextMenuButton(
             text='Shortcut', icon_name='link', button_id='shortcut')
@@ -233,12 +379,32 @@ class AppLauncherContextMenu(QtWidgets.QWidget):
         # hide.enter_event_signal().connect(self.__on_button_enter_event)
         # body_layout.add_widget(hide)
 
+    def desktop_file(self) -> DesktopFile | None:
+        """Desktop file of the menu
+
+        Gets the DesktopFile object of the launcher that shows the menu.
+        """
+        return self.__desktop_file
+
+    def set_desktop_file(self, desktop_file: DesktopFile) -> None:
+        """Set the desktop file of the menu
+
+        Shows the 'pin' or the 'unpin' button, depending on whether the
+        desktop file is in the pin registry.
+
+        :param desktop_file: DesktopFile object
+        """
+        self.__desktop_file = desktop_file
+        is_pinned = desktop_file in self.__pin_desktop_file_list
+        self.__pin_remove_button.set_visible(is_pinned)
+        self.__pin_button.set_visible(not is_pinned)
+
     def toggle_pin_button(self) -> None:
         """Toggle pin button.
 
         Will go from 'pin' to 'unpin'.
         """
-        if self.__pin_button.is_visible():
+        if not self.__pin_button.is_hidden():
             self.__pin_button.set_visible(False)
             self.__pin_remove_button.set_visible(True)
         else:
@@ -250,7 +416,7 @@ class AppLauncherContextMenu(QtWidgets.QWidget):
 
         Gets a boolean value indicating whether the favorite button is visible.
         """
-        return self.__pin_button.is_visible()
+        return not self.__pin_button.is_hidden()
 
     def clicked_signal(self) -> QtCore.Signal:
         """Mouse clicked signal
@@ -287,7 +453,8 @@ class AppLauncherContextMenu(QtWidgets.QWidget):
         self.__enter_event_signal.emit(widget)
 
     def __str__(self) -> str:
-        name = self.__desktop_file.content['[Desktop Entry]']['Name']
+        name = (self.__desktop_file.content['[Desktop Entry]']['Name']
+                if self.__desktop_file else None)
         return f'<AppLauncherContextMenu: {name}>'
 
 
@@ -300,42 +467,41 @@ class AppLauncher(QtWidgets.QWidget):
     __right_clicked_signal = QtCore.Signal(object)
     __enter_event_signal = QtCore.Signal(object)
     __leave_event_signal = QtCore.Signal(object)
-    __mount_app_launcher_signal = QtCore.Signal(object)
     __bg_colors = [x for x in range(50, 111, 20)]
     __last_bg_color_index = __bg_colors[0]
+    __palette = {
+        color: (QtGui.QColor(color, color, color, 13),   # 0.05
+                QtGui.QColor(color, color, color, 26))   # 0.1
+        for color in __bg_colors}
+    __accent_color = QtGui.QColor(255, 255, 255, 77)     # 0.3
+    __accent_height = 5
+    __badge_files = {
+        'Snap': 'static/snap.svg',
+        'Flatpak': 'static/flatpak.svg',
+        'AppImage': 'static/appimage.svg'}
+    __badge_pixmaps = {}
 
     def __init__(
             self,
             desktop_file: DesktopFile,
-            pin_desktop_file_list: list,
-            no_thread: bool = False,
             *args, **kwargs) -> None:
         """Class constructor
 
         Initialize class attributes.
 
         :param desktop_file: DesktopFile object
-        :param pin_desktop_file_list: list of pinned DesktopFile objects
-        :param no_thread:
-            Boolean that indicates if this widget will use
-            thread to build itself
         """
         super().__init__(*args, **kwargs)
         self.__desktop_file = desktop_file
-        self.__pin_desktop_file_list = pin_desktop_file_list
-        self.__no_thread = no_thread
-        self.__context_menu_is_visible = False
+        self.__hovered = False
 
         # Self setting
         self.set_contents_margins(0, 0, 0, 0)
         self.set_fixed_height(150)
 
-        # Bg color
-        color = self.__bg_color()
-        self.__style_sheet = (
-            f'background-color: rgba({color}, 0.05)')
-        self.__style_sheet_hover = (
-            f'background-color: rgba({color}, 0.1)')
+        # Bg color (drawn in paint_event)
+        self.__bg_color, self.__bg_color_hover = (
+            self.__palette[self.__random_bg_color()])
 
         # Main layout and container
         self.__main_layout = QtWidgets.QVBoxLayout()
@@ -345,39 +511,24 @@ class AppLauncher(QtWidgets.QWidget):
 
         # Body
         self.__body_container = QtWidgets.QWidget()
-        self.__body_container.set_style_sheet(self.__style_sheet)
+        self.__body_container.set_style_sheet('background: transparent;')
         self.__main_layout.add_widget(self.__body_container)
 
         self.__body_layout = QtWidgets.QVBoxLayout()
         self.__body_layout.set_contents_margins(0, 30, 0, 0)
         self.__body_container.set_layout(self.__body_layout)
 
-        # Context
+        # Context (shared menu of the grid, see 'set_app_launcher_context_menu')
         self.__app_launcher_context_menu = None
-
-        self.__contex_container = QtWidgets.QWidget()
-        self.__contex_container.set_visible(False)
-        self.__contex_container.set_style_sheet(self.__style_sheet)
-        self.__main_layout.add_widget(self.__contex_container)
-
-        self.__context_layout = QtWidgets.QVBoxLayout()
-        self.__context_layout.set_contents_margins(0, 0, 0, 0)
-        self.__contex_container.set_layout(self.__context_layout)
+        self.__contex_container = None
 
         # Accent
         self.__bottom_highlight_line = QtWidgets.QWidget()
+        self.__bottom_highlight_line.set_style_sheet('background: transparent;')
         self.__main_layout.add_widget(self.__bottom_highlight_line)
 
         # Mount app laucher body (icon, name)
-        if self.__no_thread:
-            self.__mount_app_launcher()
-        else:
-            self.__mount_app_launcher_signal.connect(
-                self.__mount_app_launcher)
-
-            mount_app_launcher_thread = threading.Thread(
-                target=self.__mount_app_launcher_thread)
-            mount_app_launcher_thread.start()
+        self.__mount_app_launcher()
 
         # self.set_focus()
         # self.install_event_filter(self)
@@ -390,19 +541,32 @@ class AppLauncher(QtWidgets.QWidget):
         """
         return self.__desktop_file
 
-    def app_launcher_context_menu(self) -> AppLauncherContextMenu:
+    def app_launcher_context_menu(self) -> AppLauncherContextMenu | None:
         """Application launcher context menu
 
         Gets the object which is the application launcher context menu.
         """
         return self.__app_launcher_context_menu
 
+    def set_app_launcher_context_menu(
+            self, context_menu: AppLauncherContextMenu) -> None:
+        """Set the application launcher context menu
+
+        The menu is shared with the other launchers, so it is only moved to
+        this launcher when it is made visible.
+
+        :param context_menu: AppLauncherContextMenu object
+        """
+        self.__app_launcher_context_menu = context_menu
+
     def context_menu_is_visible(self) -> bool:
         """Whether the context menu is visible
 
         Gets a boolean value indicating whether the context menu is visible.
         """
-        return self.__context_menu_is_visible
+        return bool(
+            self.__contex_container and
+            not self.__contex_container.is_hidden())
 
     def set_context_menu_to_visible(self, visible: bool) -> None:
         """Configure context menu visibility.
@@ -412,15 +576,27 @@ class AppLauncher(QtWidgets.QWidget):
 
         :param visible: Boolean value
         """
+        if not self.__app_launcher_context_menu:
+            return
+
         if visible:
-            if not self.__contex_container.is_visible():
+            if not self.context_menu_is_visible():
+                self.__mount_context_menu()
                 self.__body_container.set_visible(False)
                 self.__contex_container.set_visible(True)
         else:
-            if self.__contex_container.is_visible():
+            if self.context_menu_is_visible():
                 self.__body_container.set_visible(True)
                 self.__contex_container.set_visible(False)
 
+                # Back to the grid, so the menu is not deleted with this
+                # launcher
+                if (self.__app_launcher_context_menu.parent_widget() is
+                        self.__contex_container):
+                    self.__app_launcher_context_menu.set_parent(
+                        self.parent_widget())
+                    self.__app_launcher_context_menu.set_visible(False)
+
     def toggle_pin_button(self) -> None:
         """Toggle pin button.
 
@@ -459,44 +635,23 @@ class AppLauncher(QtWidgets.QWidget):
         return self.__leave_event_signal
 
     @classmethod
-    def __bg_color(cls) -> str:
+    def __random_bg_color(cls) -> int:
         # Background color
         len_colors = len(cls.__bg_colors)
         while True:
             color = cls.__bg_colors[random.randint(0, len_colors - 1)]
             if color != cls.__last_bg_color_index:
                 cls.__last_bg_color_index = color
-                return f'{color}, {color}, {color}'
-
-    def __mount_app_launcher_thread(self) -> None:
-        # Wait for the widget to render to assemble the app launcher body
-        time.sleep(0.05)
-        self.__mount_app_launcher_signal.emit(0)
+                return color
 
     def __mount_app_launcher(self) -> None:
         # Mount AppLauncher body
 
         # Icon
-        icon_view = QtWidgets.QLabel()
-        if 'Icon' in self.__desktop_file.content['[Desktop Entry]']:
-            icon_path = IconTheme.getIconPath(
-                iconname=self.__desktop_file.content[
-                    '[Desktop Entry]']['Icon'],
-                size=48,
-                theme='breeze-dark',
-                extensions=['png', 'svg', 'xpm'])
-            try:
-                pixmap = QtGui.QPixmap(icon_path)
-            except Exception as err:
-                logging.error(err)
-                pixmap = QtGui.QPixmap(os.path.join(
-                    os.path.abspath(os.path.dirname(__file__)),
-                    'static/defaultapp.svg'))
-
-            scaled_pixmap = pixmap.scaled(
-                48, 48, QtCore.Qt.KeepAspectRatio)
-            icon_view.set_pixmap(scaled_pixmap)
-
+        icon_view = IconView(
+            icon_name=self.__desktop_file.content['[Desktop Entry]'].get(
+                'Icon'),
+            size=48)
         icon_view.set_alignment(QtCore.Qt.AlignCenter)
         icon_view.set_style_sheet('background-color: transparent;')
         icon_view.set_size_policy(
@@ -522,28 +677,45 @@ class AppLauncher(QtWidgets.QWidget):
         app_name_layout.add_widget(app_name)
         self.__body_layout.add_layout(app_name_layout)
 
-        # Context
-        self.__app_launcher_context_menu = AppLauncherContextMenu(
-            desktop_file=self.__desktop_file,
-            pin_desktop_file_list=self.__pin_desktop_file_list)
-        self.__app_launcher_context_menu.clicked_signal().connect(
-            self.__on_context)
-        self.__context_layout.add_widget(self.__app_launcher_context_menu)
-
         # Accent
-        self.__bottom_highlight_line.set_style_sheet(self.__style_sheet)
-        self.__bottom_highlight_line.set_fixed_height(5)
+        self.__bottom_highlight_line.set_fixed_height(self.__accent_height)
+
+    def __mount_context_menu(self) -> None:
+        # Move the shared context menu to this launcher
+        if not self.__contex_container:
+            self.__contex_container = QtWidgets.QWidget()
+            self.__contex_container.set_visible(False)
+            self.__contex_container.set_style_sheet(
+                'background: transparent;')
+            self.__main_layout.insert_widget(1, self.__contex_container)
+
+            context_layout = QtWidgets.QVBoxLayout()
+            context_layout.set_contents_margins(0, 0, 0, 0)
+            self.__contex_container.set_layout(context_layout)
+
+        self.__app_launcher_context_menu.set_desktop_file(self.__desktop_file)
+        self.__contex_container.layout().add_widget(
+            self.__app_launcher_context_menu)
+        self.__app_launcher_context_menu.set_visible(True)
+
+    def set_hovered(self, hovered: bool) -> None:
+        """Highlight the widget
+
+        Only this widget is repainted.
+
+        :param hovered: Boolean value
+        """
+        if self.__hovered != hovered:
+            self.__hovered = hovered
+            self.update()
 
     def focus_in_event(self, event: QtGui.QFocusEvent) -> None:
-        self.__body_container.set_style_sheet(self.__style_sheet_hover)
-        self.__bottom_highlight_line.set_style_sheet(
-            'background-color: rgba(255, 255, 255, 0.3);')
+        self.set_hovered(True)
         self.__enter_event_signal.emit(self)
         event.ignore()
 
     def focus_out_event(self, event: QtGui.QFocusEvent) -> None:
-        self.__body_container.set_style_sheet(self.__style_sheet)
-        self.__bottom_highlight_line.set_style_sheet(self.__style_sheet)
+        self.set_hovered(False)
         self.__leave_event_signal.emit(self)
         event.ignore()
 
@@ -554,10 +726,7 @@ class AppLauncher(QtWidgets.QWidget):
 
         :param event: QEvent received by sent signal
         """
-
-        self.__body_container.set_style_sheet(self.__style_sheet_hover)
-        self.__bottom_highlight_line.set_style_sheet(
-            'background-color: rgba(255, 255, 255, 0.3);')
+        self.set_hovered(True)
         self.__enter_event_signal.emit(self)
         event.ignore()
 
@@ -568,8 +737,7 @@ class AppLauncher(QtWidgets.QWidget):
 
         :param event: QEvent received by sent signal
         """
-        self.__body_container.set_style_sheet(self.__style_sheet)
-        self.__bottom_highlight_line.set_style_sheet(self.__style_sheet)
+        self.set_hovered(False)
         self.__leave_event_signal.emit(self)
         event.ignore()
 
@@ -588,38 +756,44 @@ class AppLauncher(QtWidgets.QWidget):
     def paint_event(self, event: QtCore.QEvent) -> None:
         """Drawing event
 
-        Draws a logo of a package installer type.
+        Draws the background, the accent line and a logo of a package
+        installer type.
 
         :param event: QEvent received by sent signal
         """
-        img_path = None
-        if 'snapd' in self.__desktop_file.url:
-            img_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)),
-                'static/snap.svg')
-        elif 'flatpak' in self.__desktop_file.url:
-            img_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)),
-                'static/flatpak.svg')
-        elif (  # APPIMAGE_EXTRACT_AND_RUN=1 /opt/Telegram/Telegram
-                'AppImage' in self.__desktop_file.content[
-                    '[Desktop Entry]']['Exec'] or
-                'Telegram' in self.__desktop_file.content[
-                    '[Desktop Entry]']['Exec']):
-            img_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)),
-                'static/appimage.svg')
-
-        if img_path:
-            pixmap = QtGui.QPixmap(img_path)
-            painter = QtGui.QPainter(self)
-            painter.draw_pixmap(QtCore.QPoint(10, 10), pixmap)
+        painter = QtGui.QPainter(self)
+        body_rect = self.rect().adjusted(0, 0, 0, -self.__accent_height)
+        accent_rect = self.rect().adjusted(
+            0, body_rect.height(), 0, 0)
+        painter.fill_rect(
+            body_rect,
+            self.__bg_color_hover if self.__hovered else self.__bg_color)
+        painter.fill_rect(
+            accent_rect,
+            self.__accent_color if self.__hovered else self.__bg_color)
+
+        origin = self.__desktop_file.origin
+        if origin:
+            painter.draw_pixmap(
+                QtCore.QPoint(10, 10),
+                self.__badge_pixmap(origin, self.device_pixel_ratio_f()))
 
         event.ignore()
 
-    def __on_context(self, widget) -> None:
-        # Emit a clicked signal
-        self.__clicked_signal.emit(widget)
+    @classmethod
+    def __badge_pixmap(cls, origin: str, dpr: float) -> QtGui.QPixmap:
+        # Package format logo, rasterized once per device pixel ratio
+        key = (origin, dpr)
+        if key not in cls.__badge_pixmaps:
+            reader = QtGui.QImageReader(os.path.join(
+                os.path.abspath(os.path.dirname(__file__)),
+                cls.__badge_files[origin]))
+            reader.set_scaled_size(reader.size() * dpr)
+            pixmap = QtGui.QPixmap.from_image(reader.read())
+            pixmap.set_device_pixel_ratio(dpr)
+            cls.__badge_pixmaps[key] = pixmap
+
+        return cls.__badge_pixmaps[key]
 
     def __str__(self) -> str:
         return ('<AppLauncher: '
@@ -651,13 +825,11 @@ class GhostAppLauncher(QtWidgets.QWidget):
         self.set_layout(self.__layout_container)
 
         # Icon
-        self.__pixmap = QtGui.QPixmap(os.path.join(
-            os.path.abspath(os.path.dirname(__file__)),
-            'static/ghostapp.svg'))
-        self.__pixmap = self.__pixmap.scaled(
-            48, 48, QtCore.Qt.KeepAspectRatio)
-        self.__icon_view = QtWidgets.QLabel(self)
-        self.__icon_view.set_pixmap(self.__pixmap)
+        self.__icon_view = IconView(
+            icon_name=os.path.join(
+                os.path.abspath(os.path.dirname(__file__)),
+                'static/ghostapp.svg'),
+            size=48, parent=self)
         self.__icon_view.set_alignment(QtCore.Qt.AlignCenter)
         self.__icon_view.set_size_policy(
             QtWidgets.QSizePolicy.Expanding,
@@ -698,6 +870,10 @@ class CategoryButton(QtWidgets.QWidget):
     """
     __clicked_signal = QtCore.Signal(object)
     __enter_event_signal = QtCore.Signal(object)
+    __checked_color = QtGui.QColor(255, 255, 255, 13)  # 0.05
+    __hover_color = QtGui.QColor(255, 255, 255, 8)     # 0.03
+    __accent_color = QtGui.QColor(255, 255, 255, 77)   # 0.3
+    __accent_width = 3
 
     def __init__(
             self, text: str = None, icon_name: str = None,
@@ -715,6 +891,7 @@ class CategoryButton(QtWidgets.QWidget):
         self.__text = text
         self.__icon_name = icon_name
         self.__state = False
+        self.__hovered = False
         self.__enter_event_enabled = True
 
         self.__main_layout = QtWidgets.QHBoxLayout()
@@ -736,32 +913,15 @@ class CategoryButton(QtWidgets.QWidget):
 
         # Accent
         self.__bottom_highlight_line = QtWidgets.QWidget()
-        self.__bottom_highlight_line.set_fixed_width(3)
+        self.__bottom_highlight_line.set_fixed_width(self.__accent_width)
         self.__bottom_highlight_line.set_style_sheet(
             'background: transparent;')
         self.__body_layout.add_widget(self.__bottom_highlight_line)
 
         # Icon
         if self.__icon_name:
-            icon_view = QtWidgets.QLabel()
+            icon_view = IconView(icon_name=self.__icon_name, size=22)
             icon_view.set_contents_margins(10, 0, 0, 0)
-            icon_path = IconTheme.getIconPath(
-                iconname=self.__icon_name,
-                size=22,
-                theme='breeze-dark',
-                extensions=['png', 'svg', 'xpm'])
-            try:
-                pixmap = QtGui.QPixmap(icon_path)
-            except Exception as err:
-                logging.error(err)
-                pixmap = QtGui.QPixmap(os.path.join(
-                    os.path.abspath(os.path.dirname(__file__)),
-                    'static/defaultapp.svg'))
-
-            pixmap = pixmap.scaled(
-                22, 22, QtCore.Qt.KeepAspectRatio)
-            icon_view.set_pixmap(pixmap)
-
             icon_view.set_alignment(
                 QtCore.Qt.AlignLeft | QtCore.Qt.AlignCenter)
             icon_view.set_style_sheet('background-color: transparent;')
@@ -807,17 +967,9 @@ class CategoryButton(QtWidgets.QWidget):
 
         :param state: a boolean to enable or disable the button state
         """
-        self.__state = state
-        if state:
-            self.__main_container.set_style_sheet("""
-                background-color: rgba(255, 255, 255, 0.05);""")
-            self.__bottom_highlight_line.set_style_sheet("""
-                background-color: rgba(255, 255, 255, 0.3);""")
-        else:
-            self.__main_container.set_style_sheet("""
-                background: transparent;""")
-            self.__bottom_highlight_line.set_style_sheet("""
-                background: transparent;""")
+        if self.__state != state:
+            self.__state = state
+            self.update()
 
     def text(self) -> str:
         """Widget text
@@ -854,9 +1006,9 @@ class CategoryButton(QtWidgets.QWidget):
         :param event: QEvent received by sent signal
         """
         if self.__enter_event_enabled:
+            self.__hovered = True
             if not self.__state:
-                self.__main_container.set_style_sheet("""
-                    background-color: rgba(255, 255, 255, 0.03);""")
+                self.update()
             # self.__clicked_signal.emit(self)
             self.__enter_event_signal.emit(self)
             event.ignore()
@@ -869,11 +1021,31 @@ class CategoryButton(QtWidgets.QWidget):
         :param event: QEvent received by sent signal
         """
         if self.__enter_event_enabled:
+            self.__hovered = False
             if not self.__state:
-                self.__main_container.set_style_sheet("""
-                    background: transparent;""")
+                self.update()
             event.ignore()
 
+    def paint_event(self, event: QtCore.QEvent) -> None:
+        """Drawing event
+
+        Draws the highlight colors of the checked and hover states.
+
+        :param event: QEvent received by sent signal
+        """
+        rect = self.contents_rect()
+        if self.__state:
+            painter = QtGui.QPainter(self)
+            painter.fill_rect(rect, self.__checked_color)
+            painter.fill_rect(
+                QtCore.QRect(
+                    rect.x(), rect.y(), self.__accent_width, rect.height()),
+                self.__accent_color)
+        elif self.__hovered:
+            painter = QtGui.QPainter(self)
+            painter.fill_rect(rect, self.__hover_color)
+        event.ignore()
+
     def __str__(self) -> str:
         return f'<CategoryButton: {self.__text}>'
 
@@ -886,6 +1058,7 @@ class EnergyButton(QtWidgets.QWidget):
     __clicked_signal = QtCore.Signal(object)
     __enter_event_signal = QtCore.Signal(object)
     __leave_event_signal = QtCore.Signal(object)
+    __hover_color = QtGui.QColor(255, 255, 255, 13)  # 0.05
 
     def __init__(
             self,
@@ -903,35 +1076,19 @@ class EnergyButton(QtWidgets.QWidget):
         self.__text = text
         self.__name_id = name_id if name_id else self.__icon_name
         self.__enter_event_enabled = True
+        self.__hovered = False
 
         self.__main_layout = QtWidgets.QVBoxLayout()
         self.__main_layout.set_contents_margins(0, 0, 0, 0)
         self.__main_layout.set_spacing(0)
         self.set_layout(self.__main_layout)
 
-        self.__icon_view = QtWidgets.QLabel()
+        self.__icon_view = IconView(icon_name=self.__icon_name, size=32)
         self.__icon_view.set_fixed_height(80)
         self.__icon_view.set_fixed_width(80)
         self.__icon_view.set_contents_margins(0, 0, 0, 0)
         self.__icon_view.set_alignment(QtCore.Qt.AlignCenter)
         self.__icon_view.set_style_sheet('background-color: transparent;')
-
-        icon_path = IconTheme.getIconPath(
-            iconname=self.__icon_name,
-            size=48,
-            theme='breeze-dark',
-            extensions=['png', 'svg', 'xpm'])
-        try:
-            pixmap = QtGui.QPixmap(icon_path)
-        except Exception as err:
-            logging.error(err)
-            pixmap = QtGui.QPixmap(os.path.join(
-                os.path.abspath(os.path.dirname(__file__)),
-                'static/defaultapp.svg'))
-
-        scaled_pixmap = pixmap.scaled(
-            32, 32, QtCore.Qt.KeepAspectRatio)
-        self.__icon_view.set_pixmap(scaled_pixmap)
         self.__main_layout.add_widget(self.__icon_view)
 
     def name_id(self) -> str:
@@ -1005,9 +1162,8 @@ class EnergyButton(QtWidgets.QWidget):
         :param event: QEvent received by sent signal
         """
         if self.__enter_event_enabled:
-            self.__icon_view.set_style_sheet("""
-                border-radius: 40px;
-                background-color: rgba(255, 255, 255, 0.05);""")
+            self.__hovered = True
+            self.update()
         self.__enter_event_signal.emit(self)
         event.ignore()
 
@@ -1019,21 +1175,147 @@ class EnergyButton(QtWidgets.QWidget):
         :param event: QEvent received by sent signal
         """
         if self.__enter_event_enabled:
-            self.__icon_view.set_style_sheet('background: transparent;')
+            self.__hovered = False
+            self.update()
         self.__leave_event_signal.emit(self)
         event.ignore()
 
+    def paint_event(self, event: QtCore.QEvent) -> None:
+        """Drawing event
+
+        Draws a circle behind the icon when the mouse hovers over the widget.
+
+        :param event: QEvent received by sent signal
+        """
+        if self.__hovered:
+            painter = QtGui.QPainter(self)
+            painter.set_render_hint(QtGui.QPainter.Antialiasing)
+            painter.set_pen(QtCore.Qt.NoPen)
+            painter.set_brush(self.__hover_color)
+            painter.draw_ellipse(self.__icon_view.geometry())
+        event.ignore()
+
     def __str__(self) -> str:
         return f'<EnergyButton: {self.__icon_name}>'
 
 
+class MountScheduler(QtCore.QObject):
+    """Widget mounting scheduler
+
+    Builds widgets in small batches from the event loop. Each batch runs for
+    at most one frame time budget, so the window keeps painting and
+    receiving input while large grids are mounted. There is a single
+    scheduler for the whole process, see 'instance'.
+    """
+    __instance = None
+
+    def __init__(self, frame_budget: float = 0.008, *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param frame_budget: Seconds of work per event loop turn
+        """
+        super().__init__(*args, **kwargs)
+        self.__frame_budget = frame_budget
+        self.__jobs = []
+
+        self.__timer = QtCore.QTimer(self)
+        self.__timer.set_single_shot(True)
+        self.__timer.timeout.connect(self.__run_batch)
+
+    @classmethod
+    def instance(cls) -> 'MountScheduler':
+        """Process scheduler
+
+        Gets the scheduler shared by all widgets.
+        """
+        if cls.__instance is None:
+            cls.__instance = MountScheduler()
+        return cls.__instance
+
+    def schedule(
+            self, widget: QtCore.QObject, steps: Iterator[None],
+            priority: bool = False) -> None:
+        """Schedule a widget to be mounted
+
+        :param widget:
+            Widget whose layout is disabled during a batch, or another
+            object that identifies the job, like a layout
+        :param steps:
+            Generator that builds part of the widget on each step, in the
+            order they should appear (first row first)
+        :param priority: Mount before the widgets already scheduled
+        """
+        job = (widget, steps)
+        if priority:
+            self.__jobs.insert(0, job)
+        else:
+            self.__jobs.append(job)
+
+        if not self.__timer.is_active():
+            self.__timer.start(0)
+
+    def cancel(self, widget: QtCore.QObject) -> None:
+        """Stop mounting a widget
+
+        The steps that have not run are kept by the caller, which can
+        schedule them again.
+
+        :param widget: Widget passed to 'schedule'
+        """
+        self.__jobs = [x for x in self.__jobs if x[0] is not widget]
+
+    def __run_batch(self) -> None:
+        # Run steps until the frame time is over
+        start_time = time.perf_counter()
+        while (self.__jobs and
+                time.perf_counter() - start_time < self.__frame_budget):
+            job = self.__jobs[0]
+            widget, steps = job
+            try:
+                layout = self.__widget_layout(widget)
+                if layout:
+                    layout.set_enabled(False)
+                try:
+                    while (time.perf_counter() - start_time <
+                            self.__frame_budget):
+                        next(steps)
+                finally:
+                    if layout:
+                        layout.set_enabled(True)
+            except StopIteration:
+                self.__jobs.remove(job)
+            except RuntimeError as err:
+                # Widget has been deleted
+                logging.debug(err)
+                self.__jobs.remove(job)
+
+        if self.__jobs:
+            self.__timer.start(0)
+
+    @staticmethod
+    def __widget_layout(widget: QtCore.QObject) -> QtWidgets.QLayout | None:
+        # Layout that receives the widgets of a job. While it is disabled
+        # the new widgets are not placed, so the grid is laid out and
+        # repainted once per batch instead of once per widget
+        if isinstance(widget, QtWidgets.QScrollArea):
+            widget = widget.widget()
+        if isinstance(widget, QtWidgets.QWidget):
+            return widget.layout()
+        return None
+
+    def __str__(self) -> str:
+        return f'<MountScheduler: {len(self.__jobs)}>'
+
+
 class AppGrid(QtWidgets.QScrollArea):
     """App launcher grid widget"""
     __clicked_signal = QtCore.Signal(object)
     __right_clicked_signal = QtCore.Signal(object)
     __enter_event_signal = QtCore.Signal(object)
     __leave_event_signal = QtCore.Signal(object)
-    __mount_grid_signal = QtCore.Signal(object)
+    __mounted_signal = QtCore.Signal(object)
 
     def __init__(
             self,
@@ -1041,15 +1323,19 @@ class AppGrid(QtWidgets.QScrollArea):
             pin_desktop_file_list: list,
             columns_num: int = 5,
             empty_lines: int = 0,
+            priority: bool = True,
             *args, **kwargs) -> None:
         """Class constructor
 
         Initialize class attributes.
 
         :param desktop_file_list: DesktopFile objects list
-        :param pin_desktop_file_list: Pinned DesktopFile objects list
+        :param pin_desktop_file_list: Pinned DesktopFile objects registry
         :param columns_num: Number of grid columns, default is 5
         :param empty_lines: Number of empty lines, default is 0
+        :param priority:
+            Mount before the grids already scheduled, for the page the user
+            asked for. False for pages built in advance
         """
         super().__init__(*args, **kwargs)
         self.__desktop_file_list = desktop_file_list
@@ -1057,6 +1343,8 @@ class AppGrid(QtWidgets.QScrollArea):
         self.__columns_num = columns_num
         self.__empty_lines = empty_lines
         self.__widgets_list = []
+        self.__is_mounted = False
+        self.__app_launcher_context_menu = None  # Created on right-click
 
         # Style
         self.set_alignment(QtCore.Qt.AlignTop)
@@ -1079,11 +1367,11 @@ class AppGrid(QtWidgets.QScrollArea):
         self.__main_layout.set_spacing(0)
         self.__main_container.set_layout(self.__main_layout)
 
-        # Grid creation
+        # Grid creation (a few tiles per event loop turn)
         self.__line_layout = None
-        self.__mount_grid_signal.connect(self.__mount_grid)
-        mount_grid_thread = threading.Thread(target=self.__mount_grid_thread)
-        mount_grid_thread.start()
+        self.__mount_steps = self.__mount_grid()
+        MountScheduler.instance().schedule(
+            self, self.__mount_steps, priority=priority)
 
     def clicked_signal(self) -> QtCore.Signal:
         """Mouse button click signal
@@ -1114,6 +1402,34 @@ class AppGrid(QtWidgets.QScrollArea):
         """
         return self.__leave_event_signal
 
+    def mounted_signal(self) -> QtCore.Signal:
+        """Grid mounted signal
+
+        Gets the signal that is emitted when all the widgets of the grid
+        have been created.
+        """
+        return self.__mounted_signal
+
+    def is_mounted(self) -> bool:
+        """Whether all the widgets of the grid have been created"""
+        return self.__is_mounted
+
+    def schedule_mount(self, priority: bool = True) -> None:
+        """Schedule the widgets not yet created
+
+        Moves the grid in the queue of the 'MountScheduler', or puts it back
+        after 'MountScheduler.cancel'. The grid continues from the last
+        widget created.
+
+        :param priority: Mount before the grids already scheduled
+        """
+        if self.__is_mounted:
+            return
+
+        mount_scheduler = MountScheduler.instance()
+        mount_scheduler.cancel(self)
+        mount_scheduler.schedule(self, self.__mount_steps, priority=priority)
+
     def widgets_list(self) -> list:
         """Widgets list
 
@@ -1121,50 +1437,108 @@ class AppGrid(QtWidgets.QScrollArea):
         """
         return self.__widgets_list
 
-    def __mount_grid_thread(self) -> None:
-        # Wait for the widget to render to assemble the app launcher
-        time.sleep(0.05)
-        self.__mount_grid_signal.emit(0)
+    def set_desktop_file_list(self, desktop_file_list: list) -> None:
+        """Update the apps of the grid
+
+        The grid is changed in place: the app launchers of the apps that
+        are still in the list are kept, new apps get a new app launcher and
+        the ones of removed apps are deleted. Then the app launchers are
+        placed in the order of the list.
+
+        :param desktop_file_list: DesktopFile objects list
+        """
+        if not self.__is_mounted:
+            MountScheduler.instance().cancel(self)
+            for _ in self.__mount_steps:
+                pass
+
+        app_launchers = {x.desktop_file(): x for x in self.__widgets_list}
+        self.__desktop_file_list = desktop_file_list
+        self.__widgets_list = []
+        for desktop_file in desktop_file_list:
+            app_launcher = app_launchers.pop(desktop_file, None)
+            if not app_launcher:
+                app_launcher = self.__create_app_launcher(desktop_file)
+            self.__widgets_list.append(app_launcher)
+
+        for app_launcher in app_launchers.values():
+            app_launcher.set_visible(False)
+            app_launcher.delete_later()
+
+        self.__main_container.set_updates_enabled(False)
+        self.__clear_grid()
+        if self.__widgets_list:
+            for num, app_launcher in enumerate(self.__widgets_list):
+                if num % self.__columns_num == 0:
+                    self.__add_line_layout()
+                self.__line_layout.add_widget(app_launcher)
+            self.__complete_grid_line()
+            self.__main_layout.add_stretch(1)
+        else:
+            self.__mount_ghost_grid()
+        self.__main_container.set_updates_enabled(True)
 
-    def __mount_grid(self) -> None:
-        # Mount app launcher
+    def __mount_grid(self) -> Iterator[None]:
+        # Mount app launcher, row by row. Yields after each widget so that
+        # the MountScheduler can pause when the frame time is over
         if not self.__desktop_file_list:
             self.__mount_ghost_grid()
+            self.__set_mounted()
             return
 
+        # A line is added to the grid once it is complete: a partial line
+        # is laid out with wider tiles, and each batch would move them
         for num, desktop_file in enumerate(self.__desktop_file_list):
             if num % self.__columns_num == 0:
-                self.__line_layout = QtWidgets.QHBoxLayout()
-                self.__line_layout.set_alignment(QtCore.Qt.AlignTop)
-                self.__line_layout.set_contents_margins(0, 0, 0, 0)
-                self.__line_layout.set_spacing(0)
-                self.__main_layout.add_layout(self.__line_layout)
-
-            no_thread = False
-            if len(self.__desktop_file_list) < 7:
-                no_thread = True
-
-            app_launcher = AppLauncher(
-                pin_desktop_file_list=self.__favorite_desktop_file_list,
-                desktop_file=desktop_file,
-                no_thread=no_thread)
-            app_launcher.set_focus_policy(QtCore.Qt.StrongFocus)
-            app_launcher.clicked_signal().connect(
-                self.__on_app_launcher_clicked_signal)
-            app_launcher.right_clicked_signal().connect(
-                self.__on_app_launcher_right_clicked_signal)
-            app_launcher.enter_event_signal().connect(
-                self.__on_launcher_enter_event_signal)
-            app_launcher.leave_event_signal().connect(
-                self.__on_launcher_leave_event_signal)
+                self.__line_layout = self.__create_line_layout()
 
+            app_launcher = self.__create_app_launcher(desktop_file)
             self.__widgets_list.append(app_launcher)
             self.__line_layout.add_widget(app_launcher)
+            if self.__line_layout.count() == self.__columns_num:
+                self.__main_layout.add_layout(self.__line_layout)
+            yield
 
-        # Complete grid line
+        if self.__line_layout.count() < self.__columns_num:
+            self.__complete_grid_line()
+            self.__main_layout.add_layout(self.__line_layout)
+        self.__main_layout.add_stretch(1)
+        self.__set_mounted()
+
+    def __create_app_launcher(self, desktop_file: DesktopFile) -> AppLauncher:
+        # AppLauncher with the grid signals connected
+        app_launcher = AppLauncher(
+            desktop_file=desktop_file, parent=self.__main_container)
+        app_launcher.set_focus_policy(QtCore.Qt.StrongFocus)
+        app_launcher.clicked_signal().connect(
+            self.__on_app_launcher_clicked_signal)
+        app_launcher.right_clicked_signal().connect(
+            self.__on_app_launcher_right_clicked_signal)
+        app_launcher.enter_event_signal().connect(
+            self.__on_launcher_enter_event_signal)
+        app_launcher.leave_event_signal().connect(
+            self.__on_launcher_leave_event_signal)
+        return app_launcher
+
+    def __add_line_layout(self) -> None:
+        # New grid line
+        self.__line_layout = self.__create_line_layout()
+        self.__main_layout.add_layout(self.__line_layout)
+
+    @staticmethod
+    def __create_line_layout() -> QtWidgets.QHBoxLayout:
+        # Grid line, not yet added to the grid
+        line_layout = QtWidgets.QHBoxLayout()
+        line_layout.set_alignment(QtCore.Qt.AlignTop)
+        line_layout.set_contents_margins(0, 0, 0, 0)
+        line_layout.set_spacing(0)
+        return line_layout
+
+    def __complete_grid_line(self) -> None:
+        # Fill the last line with ghost widgets
         missing_items_num = (
                 self.__columns_num -
-                (len(self.__desktop_file_list) % self.__columns_num))
+                (len(self.__widgets_list) % self.__columns_num))
         if missing_items_num != self.__columns_num:
             for item in range(missing_items_num):
                 app_launcher = GhostAppLauncher()
@@ -1172,17 +1546,35 @@ class AppGrid(QtWidgets.QScrollArea):
                     self.__on_app_launcher_clicked_signal)
                 self.__line_layout.add_widget(app_launcher)
 
-        self.__main_layout.add_stretch(1)
+    def __clear_grid(self) -> None:
+        # Remove the lines and ghost widgets, keeping the app launchers
+        while self.__main_layout.count():
+            line_layout = self.__main_layout.item_at(0).layout()
+            if not line_layout:  # Stretch
+                self.__main_layout.take_at(0)
+                continue
+
+            while line_layout.count():
+                widget = line_layout.take_at(0).widget()
+                if isinstance(widget, GhostAppLauncher):
+                    widget.set_visible(False)
+                    widget.delete_later()
+
+            self.__main_layout.remove_item(line_layout)
+            line_layout.delete_later()
+
+        self.__line_layout = None
+
+    def __set_mounted(self) -> None:
+        # All widgets have been created
+        self.__is_mounted = True
+        self.__mounted_signal.emit(self)
 
     def __mount_ghost_grid(self) -> None:
         # Mount an empty grid without apps
         if self.__empty_lines:
             for _ in range(self.__empty_lines):
-                self.__line_layout = QtWidgets.QHBoxLayout()
-                self.__line_layout.set_alignment(QtCore.Qt.AlignTop)
-                self.__line_layout.set_contents_margins(0, 0, 0, 0)
-                self.__line_layout.set_spacing(0)
-                self.__main_layout.add_layout(self.__line_layout)
+                self.__add_line_layout()
 
                 for item in range(self.__columns_num):
                     app_launcher = GhostAppLauncher()
@@ -1192,17 +1584,45 @@ class AppGrid(QtWidgets.QScrollArea):
 
             self.__main_layout.add_stretch(1)
 
+    def __context_menu(self) -> AppLauncherContextMenu:
+        # Context menu shared by the launchers of the grid
+        if not self.__app_launcher_context_menu:
+            self.__app_launcher_context_menu = AppLauncherContextMenu(
+                pin_desktop_file_list=self.__favorite_desktop_file_list,
+                parent=self.__main_container)
+            self.__app_launcher_context_menu.set_visible(False)
+            self.__app_launcher_context_menu.clicked_signal().connect(
+                self.__on_app_launcher_clicked_signal)
+            self.__app_launcher_context_menu.enter_event_signal().connect(
+                self.__on_launcher_enter_event_signal)
+            # Deleted with a launcher that was removed while showing it
+            self.__app_launcher_context_menu.destroyed.connect(
+                self.__on_context_menu_destroyed)
+
+        return self.__app_launcher_context_menu
+
+    def __on_context_menu_destroyed(self) -> None:
+        # Create a new context menu on the next right-click
+        self.__app_launcher_context_menu = None
+
     def __on_app_launcher_clicked_signal(
-            self, widget: GhostAppLauncher | AppLauncher) -> None:
+            self,
+            widget:
+            GhostAppLauncher |
+            AppLauncher |
+            AppLauncherContextMenuButton) -> None:
         # When the app is clicked, this method is triggered
         self.__clicked_signal.emit(widget)
 
     def __on_app_launcher_right_clicked_signal(
             self, widget: GhostAppLauncher | AppLauncher) -> None:
         # When the app is clicked, this method is triggered
+        if isinstance(widget, AppLauncher):
+            widget.set_app_launcher_context_menu(self.__context_menu())
         self.__right_clicked_signal.emit(widget)
 
-    def __on_launcher_enter_event_signal(self, widget: AppLauncher) -> None:
+    def __on_launcher_enter_event_signal(
+            self, widget: AppLauncher | AppLauncherContextMenuButton) -> None:
         # Emits a signal when the mouse hovers over the widget
         self.enter_event_signal().emit(widget)
 
@@ -1214,6 +1634,206 @@ class AppGrid(QtWidgets.QScrollArea):
         return f'<AppGrid: {id(self)}>'
 
 
+class HomeSnapshotView(QtWidgets.QWidget):
+    """Home page snapshot widget
+
+    Shows the image of the Home page saved in the last run, over the real
+    page, while its widgets are mounted. Clicks on the app launcher areas
+    are emitted with the desktop file ID.
+    """
+    __clicked_signal = QtCore.Signal(object)
+
+    def __init__(
+            self, image_path: str, device_pixel_ratio: float, tiles: list,
+            *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param image_path: Snapshot image path
+        :param device_pixel_ratio: Device pixel ratio of the image
+        :param tiles:
+            App launcher areas, like:
+            [('firefox.desktop', (x, y, width, height))]
+        """
+        super().__init__(*args, **kwargs)
+        self.__pixmap = QtGui.QPixmap(image_path)
+        self.__pixmap.set_device_pixel_ratio(device_pixel_ratio)
+        self.__tiles = [(x, QtCore.QRect(*y)) for x, y in tiles]
+        self.set_mouse_tracking(True)
+        self.resize(self.__pixmap.device_independent_size().to_size())
+
+    def clicked_signal(self) -> QtCore.Signal:
+        """Mouse clicked signal
+
+        Gets the signal that is emitted with the desktop file ID when an app
+        launcher area is clicked.
+        """
+        return self.__clicked_signal
+
+    def is_null(self) -> bool:
+        """Whether the image could not be read"""
+        return self.__pixmap.is_null()
+
+    def mouse_move_event(self, event: QtGui.QMouseEvent) -> None:
+        """Mouse move event
+
+        Shows the pointing hand over the app launcher areas.
+
+        :param event: QMouseEvent received by sent signal
+        """
+        if self.__tile_at(event.position().to_point()):
+            self.set_cursor(QtCore.Qt.PointingHandCursor)
+        else:
+            self.unset_cursor()
+
+    def mouse_press_event(self, event: QtGui.QMouseEvent) -> None:
+        """Mouse click event on the widget
+
+        Emits the desktop file ID of the clicked area.
+
+        :param event: QMouseEvent received by sent signal
+        """
+        desktop_file_id = self.__tile_at(event.position().to_point())
+        if event.button() == QtCore.Qt.LeftButton and desktop_file_id:
+            self.__clicked_signal.emit(desktop_file_id)
+        event.accept()
+
+    def paint_event(self, event: QtGui.QPaintEvent) -> None:
+        """Drawing event
+
+        Draws the snapshot image.
+
+        :param event: QEvent received by sent signal
+        """
+        painter = QtGui.QPainter(self)
+        painter.draw_pixmap(QtCore.QPoint(0, 0), self.__pixmap)
+
+    def __tile_at(self, point: QtCore.QPoint) -> str | None:
+        # Desktop file ID of the area under the point
+        for desktop_file_id, rect in self.__tiles:
+            if rect.contains(point):
+                return desktop_file_id
+        return None
+
+    def __str__(self) -> str:
+        return f'<HomeSnapshotView: {id(self)}>'
+
+
+class PerformanceHud(QtWidgets.QLabel):
+    """Performance overlay
+
+    Shows frame times, event loop lag, process memory and the values of a
+    callback, sampled on a low frequency timer. The frames of the window
+    are only timed while the overlay is visible; when hidden, it does not
+    filter events or run the timer.
+    """
+    def __init__(
+            self, window: QtWidgets.QWidget, sample_callback,
+            interval: int = 500, *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param window: Top level widget whose frames are timed
+        :param sample_callback:
+            Function that returns a dict with the other values to show,
+            like: {'Search': '12.3 ms'}. Called on each sample
+        :param interval: Milliseconds between samples
+        """
+        super().__init__(*args, **kwargs)
+        self.__window = window
+        self.__sample_callback = sample_callback
+        self.__interval = interval
+        self.__frame_times = []
+        self.__last_sample_time = None
+
+        self.__timer = QtCore.QTimer(self)
+        self.__timer.set_interval(interval)
+        self.__timer.timeout.connect(self.__sample)
+
+        self.set_attribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.set_alignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        self.set_style_sheet(
+            'background-color: rgba(0, 0, 0, 0.7);'
+            'font-family: monospace;'
+            'font-size: 12px;'
+            'padding: 8px;')
+        self.set_visible(False)
+
+    def event_filter(
+            self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        """Times the frames of the window
+
+        The update request of the window paints all its widgets, so it is
+        delivered here and its duration is the frame time.
+
+        :param watched: Window that receives the event
+        :param event: QEvent received by the window
+        """
+        if (watched is self.__window and
+                event.type() == QtCore.QEvent.UpdateRequest):
+            start_time = time.perf_counter()
+            result = watched.event(event)
+            self.__frame_times.append(time.perf_counter() - start_time)
+            return result
+        return False
+
+    def show_event(self, event: QtGui.QShowEvent) -> None:
+        """Show event
+
+        Starts timing the frames and sampling.
+
+        :param event: QShowEvent received by sent signal
+        """
+        self.__frame_times.clear()
+        self.__last_sample_time = time.perf_counter()
+        self.__window.install_event_filter(self)
+        self.__timer.start()
+        self.__sample()
+
+    def hide_event(self, event: QtGui.QHideEvent) -> None:
+        """Hide event
+
+        Stops timing the frames and sampling.
+
+        :param event: QHideEvent received by sent signal
+        """
+        self.__timer.stop()
+        self.__window.remove_event_filter(self)
+
+    def __sample(self) -> None:
+        # Timer is late by the time the event loop was busy
+        now = time.perf_counter()
+        lag = max(0.0, now - self.__last_sample_time - self.__interval / 1000)
+        self.__last_sample_time = now
+
+        frame_times = self.__frame_times
+        self.__frame_times = []
+        values = {
+            'Frames': (
+                f'{len(frame_times)}, last {frame_times[-1] * 1000:.1f} ms, '
+                f'max {max(frame_times) * 1000:.1f} ms'
+                if frame_times else '0'),
+            'Event loop lag': f'{lag * 1000:.1f} ms',
+            'RSS': self.__rss_text()}
+        values.update(self.__sample_callback())
+
+        self.set_text('\n'.join(f'{x}: {y}' for x, y in values.items()))
+        self.adjust_size()
+        self.raise_()
+
+    @staticmethod
+    def __rss_text() -> str:
+        # Resident memory of the process, from the Linux proc filesystem
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return 'n/a'
+        return f'{resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20:.1f} MiB'
+
+
 class SearchApps(QtWidgets.QLineEdit):
     """A QLineEdit custom widget"""
     __text_changed = QtCore.Signal(object)
@@ -1255,6 +1875,200 @@ class SearchApps(QtWidgets.QLineEdit):
         return f'<SearchApps: {id(self)}>'
 
 
+class SearchResultButton(QtWidgets.QWidget):
+    """Search provider result widget
+
+    Icon, title and description of a 'SearchResult'.
+    """
+    __clicked_signal = QtCore.Signal(object)
+    __enter_event_signal = QtCore.Signal(object)
+    __bg_color = QtGui.QColor(255, 255, 255, 13)        # 0.05
+    __bg_color_hover = QtGui.QColor(255, 255, 255, 26)  # 0.1
+
+    def __init__(
+            self, search_result: 'SearchResult', *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param search_result: SearchResult object
+        """
+        super().__init__(*args, **kwargs)
+        self.__search_result = search_result
+        self.__hovered = False
+        self.set_fixed_height(40)
+        self.set_style_sheet('font-size: 14px;')
+
+        layout = QtWidgets.QHBoxLayout()
+        layout.set_contents_margins(10, 0, 10, 0)
+        layout.set_spacing(10)
+        self.set_layout(layout)
+
+        icon_view = IconView(icon_name=search_result.icon_name, size=22)
+        icon_view.set_style_sheet('background: transparent;')
+        layout.add_widget(icon_view)
+
+        title = ElidedLabel(search_result.title)
+        title.set_style_sheet('background: transparent;')
+        layout.add_widget(title, 1)
+
+        if search_result.description:
+            description = ElidedLabel(search_result.description)
+            description.set_style_sheet(
+                'background: transparent; color: rgba(255, 255, 255, 0.5);')
+            layout.add_widget(description, 2)
+
+    def search_result(self) -> 'SearchResult':
+        """Search result
+
+        Gets the SearchResult object shown by the widget.
+        """
+        return self.__search_result
+
+    def clicked_signal(self) -> QtCore.Signal:
+        """Mouse button click signal
+
+        Gets the signal that is emitted when a mouse button is pressed.
+        """
+        return self.__clicked_signal
+
+    def enter_event_signal(self) -> QtCore.Signal:
+        """Mouse hover event
+
+        Gets the signal that is emitted when the mouse hovers over the widget.
+        """
+        return self.__enter_event_signal
+
+    def mouse_press_event(self, event: QtCore.QEvent) -> None:
+        """Mouse click event on the widget
+
+        Emits a signal that the widget has been clicked.
+
+        :param event: QEvent received by sent signal
+        """
+        if event.button() == QtCore.Qt.LeftButton:
+            self.__clicked_signal.emit(self)
+
+    def enter_event(self, event: QtCore.QEvent) -> None:
+        """Mouse hover event
+
+        Highlight colors when mouse hovers over widget.
+
+        :param event: QEvent received by sent signal
+        """
+        self.__hovered = True
+        self.update()
+        self.__enter_event_signal.emit(self)
+        event.ignore()
+
+    def leave_event(self, event: QtCore.QEvent) -> None:
+        """Mouse-over event outside the widget
+
+        Remove highlighting colors when the mouse leaves the widget.
+
+        :param event: QEvent received by sent signal
+        """
+        self.__hovered = False
+        self.update()
+        event.ignore()
+
+    def paint_event(self, event: QtCore.QEvent) -> None:
+        """Drawing event
+
+        Draws the background, lighter when the mouse hovers over the widget.
+
+        :param event: QEvent received by sent signal
+        """
+        painter = QtGui.QPainter(self)
+        painter.fill_rect(
+            self.rect(),
+            self.__bg_color_hover if self.__hovered else self.__bg_color)
+        event.ignore()
+
+    def __str__(self) -> str:
+        return f'<SearchResultButton: {self.__search_result.title}>'
+
+
+class SearchResultsView(QtWidgets.QWidget):
+    """Results of the search providers
+
+    A list of results grouped by provider, in the order of the providers.
+    Hidden while there are no results.
+    """
+    __clicked_signal = QtCore.Signal(object)
+    __enter_event_signal = QtCore.Signal(object)
+
+    def __init__(self, provider_names: list, *args, **kwargs) -> None:
+        """Class constructor
+
+        Initialize class attributes.
+
+        :param provider_names: Provider names in the order they are shown
+        """
+        super().__init__(*args, **kwargs)
+        self.__provider_names = provider_names
+        self.__buttons = {x: [] for x in provider_names}
+        self.set_visible(False)
+
+        self.__main_layout = QtWidgets.QVBoxLayout()
+        self.__main_layout.set_contents_margins(10, 5, 10, 5)
+        self.__main_layout.set_spacing(1)
+        self.set_layout(self.__main_layout)
+
+    def clicked_signal(self) -> QtCore.Signal:
+        """Mouse button click signal
+
+        Gets the signal that is emitted with the SearchResultButton that
+        was clicked.
+        """
+        return self.__clicked_signal
+
+    def enter_event_signal(self) -> QtCore.Signal:
+        """Mouse hover event
+
+        Gets the signal that is emitted with the SearchResultButton that the
+        mouse hovers over.
+        """
+        return self.__enter_event_signal
+
+    def set_results(self, provider_name: str, search_results: list) -> None:
+        """Show the results of a provider
+
+        Replaces the results that the provider had.
+
+        :param provider_name: Provider name
+        :param search_results: SearchResult objects
+        """
+        for button in self.__buttons[provider_name]:
+            self.__main_layout.remove_widget(button)
+            button.set_visible(False)
+            button.delete_later()
+
+        # Position after the results of the previous providers
+        index = sum(
+            len(self.__buttons[x]) for x in self.__provider_names[
+                :self.__provider_names.index(provider_name)])
+        buttons = []
+        for search_result in search_results:
+            button = SearchResultButton(search_result)
+            button.clicked_signal().connect(self.__clicked_signal.emit)
+            button.enter_event_signal().connect(self.__enter_event_signal.emit)
+            self.__main_layout.insert_widget(index + len(buttons), button)
+            buttons.append(button)
+        self.__buttons[provider_name] = buttons
+
+        self.set_visible(any(self.__buttons.values()))
+
+    def clear(self) -> None:
+        """Remove all results"""
+        for provider_name in self.__provider_names:
+            if self.__buttons[provider_name]:
+                self.set_results(provider_name, [])
+
+    def __str__(self) -> str:
+        return f'<SearchResultsView: {id(self)}>'
+
+
 class ElidedLabel(QtWidgets.QLabel):
     """A label widget that can display only the necessary text
 
@@ -1309,7 +2123,7 @@ class ActionButton(QtWidgets.QWidget):
         self.__main_layout.set_spacing(0)
         self.set_layout(self.__main_layout)
 
-        self.__icon_view = QtWidgets.QLabel()
+        self.__icon_view = IconView(size=22)
         self.__icon_view.set_fixed_height(30)
         self.__icon_view.set_fixed_width(30)
         self.__icon_view.set_contents_margins(0, 0, 0, 0)
@@ -1350,22 +2164,7 @@ class ActionButton(QtWidgets.QWidget):
         Set the icon used in the button.
         """
         self.__icon_name = icon_name
-        icon_path = IconTheme.getIconPath(
-            iconname=self.__icon_name,
-            size=22,
-            theme='breeze-dark',
-            extensions=['png', 'svg', 'xpm'])
-        try:
-            pixmap = QtGui.QPixmap(icon_path)
-        except Exception as err:
-            logging.error(err)
-            pixmap = QtGui.QPixmap(os.path.join(
-                os.path.abspath(os.path.dirname(__file__)),
-                'static/defaultapp.svg'))
-
-        scaled_pixmap = pixmap.scaled(
-            22, 22, QtCore.Qt.KeepAspectRatio)
-        self.__icon_view.set_pixmap(scaled_pixmap)
+        self.__icon_view.set_icon_name(self.__icon_name)
 
     def clicked_signal(self) -> QtCore.Signal:
         """Mouse clicked signal
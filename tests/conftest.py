@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+from PySide6 import QtCore, QtWidgets
+from __feature__ import snake_case
+
+SRC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qt_app():
+    """QApplication shared by the tests, offscreen by default"""
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def wait_until(condition, timeout: int = 3000) -> bool:
+    """Run the event loop until the condition is true
+
+    :param condition: Callable without arguments
+    :param timeout: Milliseconds
+    :return: The last value of the condition
+    """
+    deadline = QtCore.QDeadlineTimer(timeout)
+    while not condition() and not deadline.has_expired():
+        QtCore.QCoreApplication.process_events(
+            QtCore.QEventLoop.AllEvents, 50)
+    return bool(condition())
+
+
+@pytest.fixture
+def xdg_home(tmp_path, monkeypatch):
+    """Empty $HOME and XDG dirs
+
+    Desktop files are added with 'add_desktop_file(name)'.
+    """
+    for name in ('home', 'data', 'sys', 'cache'):
+        (tmp_path / name).mkdir()
+    (tmp_path / 'data' / 'applications').mkdir()
+
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+    monkeypatch.setenv('XDG_DATA_DIRS', str(tmp_path / 'sys'))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('TUXMENU_INDEX', str(tmp_path / 'cache' / 'index'))
+
+    def add_desktop_file(name: str, categories: str = 'Utility;') -> str:
+        path = tmp_path / 'data' / 'applications' / f'{name}.desktop'
+        path.write_text(
+            '[Desktop Entry]\nType=Application\n'
+            f'Name={name}\nExec={name}\nCategories={categories}\n')
+        return f'{name}.desktop'
+
+    return add_desktop_file
@@ -0,0 +1,66 @@
+from PySide6 import QtCore
+from __feature__ import snake_case
+
+import attachments
+import widgets
+from conftest import wait_until
+
+
+def mounted_grid(desktop_files: list, pin_apps) -> widgets.AppGrid:
+    # Grid with all its launchers created
+    grid = widgets.AppGrid(
+        desktop_file_list=desktop_files, pin_desktop_file_list=pin_apps)
+    assert wait_until(grid.is_mounted)
+    return grid
+
+
+def live_objects(grid: widgets.AppGrid) -> int:
+    # QObjects of the grid, after the pending deletions
+    QtCore.QCoreApplication.send_posted_events(
+        None, QtCore.QEvent.DeferredDelete)
+    return len(grid.find_children(QtCore.QObject))
+
+
+def context_menus(grid: widgets.AppGrid) -> list:
+    return grid.find_children(widgets.AppLauncherContextMenu)
+
+
+def test_one_context_menu_per_grid(qt_app, xdg_home):
+    desktop_file_index = attachments.DesktopFileIndex()
+    desktop_files = [
+        desktop_file_index.get(xdg_home(f'app{x}')) for x in range(12)]
+    grid = mounted_grid(desktop_files, attachments.DesktopFileRegistry())
+
+    # No launcher has its own context menu
+    assert len(grid.widgets_list()) == 12
+    assert context_menus(grid) == []
+
+    for app_launcher in grid.widgets_list()[:3]:
+        app_launcher.right_clicked_signal().emit(app_launcher)
+        app_launcher.set_context_menu_to_visible(True)
+        assert app_launcher.context_menu_is_visible()
+        app_launcher.set_context_menu_to_visible(False)
+
+    assert len(context_menus(grid)) == 1
+
+
+def test_pin_updates_keep_the_object_count(qt_app, xdg_home):
+    desktop_file_index = attachments.DesktopFileIndex()
+    desktop_files = [
+        desktop_file_index.get(xdg_home(f'app{x}')) for x in range(8)]
+    pin_apps = attachments.DesktopFileRegistry(desktop_files[:4])
+    grid = mounted_grid(list(pin_apps), pin_apps)
+
+    app_launcher = grid.widgets_list()[0]
+    app_launcher.right_clicked_signal().emit(app_launcher)
+    objects = live_objects(grid)
+
+    for desktop_file in desktop_files[4:]:
+        # Pin, then unpin
+        pin_apps.append(desktop_file)
+        grid.set_desktop_file_list(list(pin_apps))
+        pin_apps.remove(desktop_file)
+        grid.set_desktop_file_list(list(pin_apps))
+        assert live_objects(grid) == objects
+
+    assert [x.desktop_file() for x in grid.widgets_list()] == list(pin_apps)
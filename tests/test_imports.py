@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+
+from conftest import SRC_DIR
+
+# Loaded on first use, not to show the window
+LAZY_MODULES = [
+    'BlurWindow',
+    'PySide6.QtDBus',
+    'appindex',
+    'prewarm',
+    'providers',
+    'query',
+    'session',
+    'subprocess',
+    'xdg',
+    'xdg.IconTheme']
+
+
+def imported_modules(*modules: str) -> set:
+    # Modules in a new interpreter after importing the given ones
+    code = (
+        'import json, sys\n'
+        f'sys.path.insert(0, {SRC_DIR!r})\n' +
+        ''.join(f'import {x}\n' for x in modules) +
+        'print(json.dumps(sorted(sys.modules)))\n')
+    output = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True,
+        text=True).stdout
+    return set(json.loads(output))
+
+
+def test_main_does_not_import_optional_modules():
+    modules = imported_modules('tuxmenu', 'main')
+    assert 'main' in modules
+    assert sorted(modules.intersection(LAZY_MODULES)) == []
+
+
+def test_command_line_does_not_import_qt():
+    modules = imported_modules('tuxmenu', 'query')
+    assert not [x for x in modules if x.startswith('PySide6')]
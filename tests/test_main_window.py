@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+import main
+import widgets
+from conftest import wait_until
+
+
+@pytest.fixture
+def main_window(qt_app, xdg_home):
+    """Menu window with 20 apps, once its menu schema is loaded"""
+    for number in range(20):
+        xdg_home(f'app{number}')
+
+    window = main.MainWindow()
+    window.resize(1100, 650)
+    window.show()
+    assert wait_until(lambda: window._MainWindow__menu_schema is not None)
+    yield window
+    window.hide()
+    window.delete_later()
+
+
+def test_stale_search_grid_is_ignored(main_window, monkeypatch):
+    menu_schema = main_window._MainWindow__menu_schema
+    search = menu_schema.search
+
+    def slow_search(text: str, is_cancelled=None) -> list | None:
+        # The grid of the previous text has time to mount meanwhile
+        time.sleep(0.3)
+        return search(text=text, is_cancelled=is_cancelled)
+
+    monkeypatch.setattr(menu_schema, 'search', slow_search)
+
+    shown_grids = []
+    on_search_results_shown = main_window._MainWindow__on_search_results_shown
+    monkeypatch.setattr(
+        main_window, '_MainWindow__on_search_results_shown',
+        lambda: (
+            shown_grids.append(main_window._MainWindow__stack_grids['search']),
+            on_search_results_shown()))
+
+    # Results of the first text arrive, then the next keystroke, before
+    # the grid of the first text is mounted
+    search_input = main_window._MainWindow__search_input
+    search_input.set_text('app')
+    main_window._MainWindow__on_searched_apps(
+        main_window._MainWindow__search_worker.generation, 'app',
+        search('app'))
+    stack_grids = main_window._MainWindow__stack_grids
+    first_grid = stack_grids['search']
+    search_input.set_text('app1')
+
+    assert wait_until(lambda: stack_grids['search'] is not first_grid)
+    second_grid = stack_grids['search']
+    assert wait_until(second_grid.is_mounted)
+    assert shown_grids == [second_grid]
+    assert [x.desktop_file().desktop_file_id
+            for x in second_grid.widgets_list()][0].startswith('app1')
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import attachments
+import menuspec
+
+MENU = '''<!DOCTYPE Menu PUBLIC "-//freedesktop//DTD Menu 1.0//EN"
+ "http://www.freedesktop.org/standards/menu-spec/1.0/menu.dtd">
+<Menu>
+  <Name>Applications</Name>
+  <Menu>
+    <Name>Dev</Name>
+    <Include><Category>Development</Category></Include>
+  </Menu>
+  <Menu>
+    <Name>Other</Name>
+    <OnlyUnallocated/>
+    <Include><All/></Include>
+  </Menu>
+  <DefaultMergeDirs/>
+</Menu>
+'''
+
+MERGED_MENU = '''<!DOCTYPE Menu PUBLIC "-//freedesktop//DTD Menu 1.0//EN"
+ "http://www.freedesktop.org/standards/menu-spec/1.0/menu.dtd">
+<Menu>
+  <Name>Applications</Name>
+  <Menu>
+    <Name>Other</Name>
+    {flags}
+    <Include><Filename>c.desktop</Filename></Include>
+  </Menu>
+</Menu>
+'''
+
+
+@pytest.fixture
+def menu_path(xdg_home, tmp_path, monkeypatch):
+    """Menu file with a merged fragment for 'Other'
+
+    The fragment is written with 'write_merged_menu(flags)'.
+    """
+    xdg_home('a', categories='Development;')
+    xdg_home('b', categories='Utility;')
+    xdg_home('c', categories='Development;')
+
+    config_dir = tmp_path / 'config'
+    merged_dir = config_dir / 'menus' / 'applications-merged'
+    merged_dir.mkdir(parents=True)
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(config_dir))
+    monkeypatch.setenv('XDG_CONFIG_DIRS', str(tmp_path / 'sys'))
+    monkeypatch.delenv('XDG_MENU_PREFIX', raising=False)
+
+    path = config_dir / 'menus' / 'applications.menu'
+    path.write_text(MENU)
+
+    def write_merged_menu(flags: str) -> str:
+        (merged_dir / 'other.menu').write_text(MERGED_MENU.format(flags=flags))
+        return str(path)
+
+    return write_merged_menu
+
+
+def menus(path: str) -> dict:
+    tree = menuspec.MenuTree(
+        desktop_file_index=attachments.DesktopFileIndex(), menu_path=path)
+    return {x['name']: sorted(x['entries']) for x in tree.root['menus']}
+
+
+def test_merged_menu_keeps_only_unallocated(menu_path):
+    assert menus(menu_path(flags='')) == {
+        'Dev': ['a.desktop', 'c.desktop'],
+        'Other': ['b.desktop']}
+
+
+def test_last_only_unallocated_element_wins(menu_path):
+    assert menus(menu_path(flags='<NotOnlyUnallocated/>')) == {
+        'Dev': ['a.desktop', 'c.desktop'],
+        'Other': ['a.desktop', 'b.desktop', 'c.desktop']}
+
+
+def test_merged_menu_can_delete(menu_path):
+    assert menus(menu_path(flags='<Deleted/>')) == {
+        'Dev': ['a.desktop', 'c.desktop']}
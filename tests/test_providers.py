@@ -0,0 +1,96 @@
+import threading
+import time
+
+import providers
+from conftest import wait_until
+
+
+class BlockingProvider(providers.SearchProvider):
+    """Provider whose first query waits to be released"""
+    name = 'blocking'
+    budget = 5
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.texts = []
+
+    def search(self, query: providers.SearchQuery):
+        self.texts.append(query.text)
+        self.started.set()
+        self.release.wait(timeout=3)
+        yield providers.SearchResult(title=query.text)
+
+
+class SlowProvider(providers.SearchProvider):
+    """Provider that finds its result after the budget"""
+    name = 'slow'
+    budget = 0.05
+
+    def search(self, query: providers.SearchQuery):
+        time.sleep(0.1)
+        yield providers.SearchResult(title=query.text)
+
+
+def start_runner(provider_list: list) -> tuple:
+    # Runner and the results it delivers, as (generation, name, titles)
+    results = []
+    lock = threading.Lock()
+
+    def on_results(generation: int, name: str, result_list: list) -> None:
+        with lock:
+            results.append((generation, name, [x.title for x in result_list]))
+
+    return providers.SearchProviderRunner(provider_list, on_results), results
+
+
+def test_command_keeps_the_case(tmp_path, monkeypatch):
+    command = tmp_path / 'Notes'
+    command.write_text('#!/bin/sh\n')
+    command.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmp_path))
+
+    runner, results = start_runner([providers.CommandProvider()])
+    generation = runner.search('Notes Today.txt')
+    assert wait_until(lambda: results)
+    assert results == [(generation, 'command', ['Run: Notes Today.txt'])]
+
+
+def test_recent_files_ignore_the_case(xdg_home, monkeypatch, tmp_path):
+    document = tmp_path / 'Report.odt'
+    document.write_text('')
+    data_home = tmp_path / 'recent'
+    data_home.mkdir()
+    (data_home / 'recently-used.xbel').write_text(
+        f'<xbel><bookmark href="file://{document}" modified="2026-01-01"/>'
+        '</xbel>')
+    monkeypatch.setenv('XDG_DATA_HOME', str(data_home))
+
+    runner, results = start_runner([providers.RecentFilesProvider()])
+    generation = runner.search('REPORT')
+    assert wait_until(lambda: results)
+    assert results == [(generation, 'recent-files', ['Report.odt'])]
+
+
+def test_only_the_latest_query_is_delivered():
+    provider = BlockingProvider()
+    runner, results = start_runner([provider])
+    runner.search('f')
+    assert provider.started.wait(timeout=3)
+    runner.search('fi')
+    generation = runner.search('fir')
+    provider.release.set()
+
+    assert wait_until(lambda: len(provider.texts) == 2 and results)
+    assert provider.texts == ['f', 'fir']
+    assert results == [(generation, 'blocking', ['fir'])]
+
+
+def test_provider_over_the_budget_is_a_timeout():
+    runner, results = start_runner([SlowProvider()])
+    runner.search('firefox')
+
+    assert wait_until(lambda: runner.timeouts['slow'])
+    assert runner.timeouts == {'slow': 1}
+    assert runner.latencies['slow'] > SlowProvider.budget
+    assert results == []
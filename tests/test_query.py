@@ -0,0 +1,8 @@
+import query
+
+
+def test_list_categories_matches_the_buttons(xdg_home):
+    xdg_home('editor', categories='Utility;')
+    xdg_home('player', categories='AudioVideo;')
+
+    assert query.list_categories() == ['Multimedia', 'Utility']
@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+
+import attachments
+
+
+def saved_ids(name: str) -> list:
+    path = os.path.join(
+        os.environ['HOME'], '.config', 'tuxmenu', name + '.json')
+    with open(path, 'r') as f:
+        return json.load(f)[name]
+
+
+def pin(saved_apps: attachments.SavedApps, desktop_file_id: str) -> None:
+    saved_apps.apps.append(
+        attachments.DesktopFileIndex().get(desktop_file_id))
+    saved_apps.save_apps()
+    saved_apps.flush()
+
+
+def test_two_instances_keep_each_other_pins(xdg_home):
+    for name in ('a', 'b', 'c'):
+        xdg_home(name)
+
+    first = attachments.SavedApps(config_name='pin', save_delay=60)
+    second = attachments.SavedApps(config_name='pin', save_delay=60)
+
+    pin(second, 'b.desktop')
+    pin(first, 'a.desktop')
+    assert saved_ids('pin') == ['a.desktop', 'b.desktop']
+
+    pin(first, 'c.desktop')
+    assert saved_ids('pin') == ['a.desktop', 'c.desktop', 'b.desktop']
+
+
+def test_removal_by_another_instance_is_kept(xdg_home):
+    for name in ('a', 'b'):
+        xdg_home(name)
+
+    first = attachments.SavedApps(config_name='pin', save_delay=60)
+    pin(first, 'a.desktop')
+    pin(first, 'b.desktop')
+
+    second = attachments.SavedApps(config_name='pin', save_delay=60)
+    second.apps.remove('a.desktop')
+    second.save_apps()
+    second.flush()
+
+    first.save_apps()
+    first.flush()
+    assert saved_ids('pin') == ['b.desktop']
+
+
+def test_flush_is_not_reverted_by_the_save_thread(xdg_home, monkeypatch):
+    for name in ('a', 'b'):
+        xdg_home(name)
+
+    saved_apps = attachments.SavedApps(config_name='pin', save_delay=0)
+    write_apps = saved_apps._SavedApps__write_apps
+    thread_writes = threading.Event()
+    flushed = threading.Event()
+
+    def write_after_flush(desktop_file_ids: list) -> None:
+        # The save thread is slow, the flush at exit runs meanwhile
+        if threading.current_thread() is not threading.main_thread():
+            thread_writes.set()
+            flushed.wait(timeout=0.5)
+        write_apps(desktop_file_ids)
+
+    monkeypatch.setattr(
+        saved_apps, '_SavedApps__write_apps', write_after_flush)
+
+    index = attachments.DesktopFileIndex()
+    saved_apps.apps.append(index.get('a.desktop'))
+    saved_apps.save_apps()
+    save_thread = saved_apps._SavedApps__save_thread
+    assert thread_writes.wait(timeout=3)
+
+    saved_apps.apps.append(index.get('b.desktop'))
+    saved_apps.save_apps()
+    saved_apps.flush()
+    flushed.set()
+
+    save_thread.join(timeout=3)
+    assert saved_ids('pin') == ['a.desktop', 'b.desktop']
@@ -0,0 +1,63 @@
+import threading
+
+import attachments
+from conftest import wait_until
+
+
+def test_only_the_latest_query_is_delivered():
+    started = threading.Event()
+    release = threading.Event()
+    searched = []
+
+    def search(text: str, is_cancelled) -> list:
+        # The first query blocks while the next ones are typed
+        searched.append(text)
+        started.set()
+        release.wait(timeout=3)
+        return [text]
+
+    results = []
+    worker = attachments.SearchWorker(
+        search, lambda *args: results.append(args))
+    worker.search('f')
+    assert started.wait(timeout=3)
+    worker.search('fi')
+    generation = worker.search('fir')
+    release.set()
+
+    assert wait_until(lambda: results)
+    assert results == [(generation, 'fir', ['fir'])]
+    assert searched == ['f', 'fir']
+
+
+def test_cancelled_search_returns_nothing():
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def search(text: str, is_cancelled) -> list | None:
+        # Runs until the query is replaced
+        started.set()
+        while not is_cancelled():
+            pass
+        stopped.set()
+        return None
+
+    results = []
+    worker = attachments.SearchWorker(
+        search, lambda *args: results.append(args))
+    worker.search('firefox')
+    assert started.wait(timeout=3)
+    worker.search('')
+
+    assert stopped.wait(timeout=3)
+    assert not wait_until(lambda: results, timeout=200)
+
+
+def test_menu_search_stops_when_cancelled(xdg_home):
+    for number in range(150):
+        xdg_home(f'app{number}')
+    menu_schema = attachments.MenuSchema(
+        desktop_file_index=attachments.DesktopFileIndex())
+
+    assert len(menu_schema.search('app')) == 150
+    assert menu_schema.search('app', is_cancelled=lambda: True) is None
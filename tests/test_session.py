@@ -0,0 +1,168 @@
+import shutil
+import subprocess
+
+import pytest
+from PySide6 import QtCore, QtDBus
+from __feature__ import snake_case
+
+import attachments
+import session
+from conftest import wait_until
+
+pytestmark = pytest.mark.skipif(
+    not shutil.which('dbus-daemon'), reason='dbus-daemon is not installed')
+
+
+@QtCore.ClassInfo({'D-Bus Interface': 'org.freedesktop.login1.Manager'})
+class Login1Manager(QtCore.QObject):
+    """logind stand-in that can reboot but not suspend"""
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    @QtCore.Slot(result=str)
+    def CanSuspend(self) -> str:
+        return 'no'
+
+    @QtCore.Slot(result=str)
+    def CanReboot(self) -> str:
+        return 'challenge'
+
+    @QtCore.Slot(result=str)
+    def CanPowerOff(self) -> str:
+        return 'yes'
+
+    @QtCore.Slot(bool)
+    def Reboot(self, interactive: bool) -> None:
+        self.calls.append(('Reboot', interactive))
+
+
+@QtCore.ClassInfo({'D-Bus Interface': 'org.freedesktop.login1.Session'})
+class Login1Session(QtCore.QObject):
+    """logind session stand-in"""
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    @QtCore.Slot()
+    def Lock(self) -> None:
+        self.calls.append(('Lock',))
+
+    @QtCore.Slot()
+    def Terminate(self) -> None:
+        self.calls.append(('Terminate',))
+
+
+@QtCore.ClassInfo({'D-Bus Interface': 'org.xfce.Session.Manager'})
+class XfceSessionManager(QtCore.QObject):
+    """Xfce session manager stand-in"""
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    @QtCore.Slot(bool, bool)
+    def Logout(self, show_dialog: bool, allow_save: bool) -> None:
+        self.calls.append(('Logout', show_dialog, allow_save))
+
+
+@pytest.fixture(scope='module')
+def bus(qt_app):
+    """Local dbus-daemon with the logind stand-ins
+
+    Used as the system and the session bus.
+    """
+    daemon = subprocess.Popen(
+        ['dbus-daemon', '--session', '--print-address', '--nofork'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    address = daemon.stdout.readline().strip()
+
+    connection = QtDBus.QDBusConnection.connect_to_bus(
+        address, 'tuxmenu-test-services')
+    services = {
+        'manager': Login1Manager(),
+        'session': Login1Session()}
+    connection.register_service('org.freedesktop.login1')
+    connection.register_object(
+        '/org/freedesktop/login1', services['manager'],
+        QtDBus.QDBusConnection.ExportAllSlots)
+    connection.register_object(
+        '/org/freedesktop/login1/session/auto', services['session'],
+        QtDBus.QDBusConnection.ExportAllSlots)
+
+    yield address, connection, services
+
+    QtDBus.QDBusConnection.disconnect_from_bus('tuxmenu-test-services')
+    daemon.kill()
+    daemon.wait()
+
+
+def session_actions(address: str) -> tuple:
+    # Executor on the local bus and the list of its results
+    schema = attachments.EnergyButtonsSchema().schema
+    schema['log-out'] = dict(schema['log-out'], command=['false'])
+
+    actions = session.SessionActions(
+        schema=schema, timeout=2000,
+        bus_addresses={'system': address, 'session': address})
+    results = []
+    actions.availability_signal().connect(
+        lambda action_id, available: results.append(
+            ('available', action_id, available)))
+    actions.finished_signal().connect(
+        lambda action_id, error: results.append(
+            ('finished', action_id, error)))
+    return actions, results
+
+
+def test_probe_hides_unavailable_actions(bus):
+    address, _, _ = bus
+    actions, results = session_actions(address)
+    actions.probe()
+
+    assert wait_until(lambda: len(results) == 3)
+    assert actions.is_available('suspend') is False
+    assert actions.is_available('reboot') is True
+    assert actions.is_available('shutdown') is True
+    assert actions.is_available('log-out') is True
+
+
+def test_run_calls_logind(bus):
+    address, _, services = bus
+    actions, results = session_actions(address)
+    actions.run('reboot')
+
+    assert wait_until(lambda: results)
+    assert results == [('finished', 'reboot', None)]
+    assert services['manager'].calls == [('Reboot', True)]
+
+
+def test_log_out_uses_the_session_manager(bus):
+    address, connection, services = bus
+    xfce = XfceSessionManager()
+    connection.register_service('org.xfce.SessionManager')
+    connection.register_object(
+        '/org/xfce/SessionManager', xfce,
+        QtDBus.QDBusConnection.ExportAllSlots)
+    try:
+        actions, results = session_actions(address)
+        actions.run('log-out')
+
+        assert wait_until(lambda: results)
+        assert results == [('finished', 'log-out', None)]
+        assert xfce.calls == [('Logout', True, True)]
+    finally:
+        connection.unregister_object('/org/xfce/SessionManager')
+        connection.unregister_service('org.xfce.SessionManager')
+
+    assert ('Terminate',) not in services['session'].calls
+
+
+def test_log_out_never_terminates_the_session(bus):
+    address, _, services = bus
+    actions, results = session_actions(address)
+    actions.run('log-out')
+
+    # No session manager: the command runs, and fails
+    assert wait_until(lambda: results, timeout=5000)
+    assert results == [('finished', 'log-out', 'Exit code 1')]
+    assert services['session'].calls == []
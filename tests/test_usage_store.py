@@ -0,0 +1,69 @@
+import os
+import time
+
+import attachments
+from conftest import wait_until
+
+
+def config_path(name: str) -> str:
+    return os.path.join(os.environ['HOME'], '.config', 'tuxmenu', name)
+
+
+def write_log(name: str, desktop_file_ids: list) -> None:
+    os.makedirs(config_path(''), exist_ok=True)
+    timestamp = int(time.time())
+    with open(config_path(name + '.log'), 'w') as f:
+        for desktop_file_id in desktop_file_ids:
+            f.write(f'{timestamp} {desktop_file_id}\n')
+
+
+def test_log_keeps_launch_order(xdg_home):
+    usage_store = attachments.UsageStore()
+    for desktop_file_id in ('a', 'a', 'b', 'b', 'a'):
+        usage_store.record(desktop_file_id)
+    usage_store.flush()
+
+    with open(config_path('usage.log'), 'r') as f:
+        assert [x.split()[1] for x in f] == ['a', 'a', 'b', 'b', 'a']
+
+
+def test_compaction_folds_the_log(xdg_home):
+    write_log('usage', ['a', 'a', 'b'])
+    attachments.UsageStore(compact_threshold=1)
+    assert wait_until(lambda: os.path.getsize(config_path('usage.log')) == 0)
+
+    usage_store = attachments.UsageStore()
+    assert usage_store.count('a') == 2
+    assert usage_store.count('b') == 1
+    assert usage_store.ranked_ids() == ['a', 'b']
+
+
+def test_interrupted_compaction_counts_launches_once(xdg_home, monkeypatch):
+    write_log('usage', ['a', 'a', 'b'])
+
+    # The snapshot is written, then the process dies before the log is
+    # replaced
+    write_file_atomically = attachments.write_file_atomically
+    interrupted = []
+
+    def write_snapshot_only(path: str, data: bytes) -> None:
+        if path.endswith('.log'):
+            interrupted.append(path)
+            raise OSError('Interrupted')
+        write_file_atomically(path=path, data=data)
+
+    monkeypatch.setattr(
+        attachments, 'write_file_atomically', write_snapshot_only)
+    attachments.UsageStore(compact_threshold=1)
+    assert wait_until(lambda: interrupted)
+    monkeypatch.setattr(
+        attachments, 'write_file_atomically', write_file_atomically)
+
+    usage_store = attachments.UsageStore()
+    assert usage_store.count('a') == 2
+    assert usage_store.count('b') == 1
+
+    # Launches after the interruption are still counted
+    usage_store.record('b')
+    usage_store.flush()
+    assert attachments.UsageStore().count('b') == 2